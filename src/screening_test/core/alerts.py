@@ -0,0 +1,246 @@
+"""ウォッチリストのアラート: 銘柄ごとの条件を一括で判定
+
+アラート条件はウォッチリストと同じデータベース（watchlist.db）に銘柄ごとに保存する。
+`check_alerts` は条件を持つ全銘柄の現在値を1回の一括取得で、ファンダメンタルズを並行取得でまとめて取り、
+スコアは銘柄×プリセットごとに1回だけ計算するため、条件が数百件あっても取得回数は増えない。
+
+通知は条件が成立した時点の1回だけ行う（前回の判定値を保存し、不成立 → 成立に変わったときに通知）。
+スコア変化は前回通知時（初回は最初の判定時）のスコアを基準とする。cronから定期的に実行することを想定している。
+"""
+
+from collections.abc import Callable
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from screening_test.core.scoring import PRESET_WEIGHTS, calculate_preset_score
+from screening_test.core.watchlist import _transaction
+from screening_test.data.client import StockInfo, YFinanceClient, get_default_client
+
+# 条件の種類 → 説明
+ALERT_RULES = {
+    "price_above": "株価が閾値以上",
+    "price_below": "株価が閾値以下",
+    "per_above": "PERが閾値以上",
+    "per_below": "PERが閾値以下",
+    "pbr_above": "PBRが閾値以上",
+    "pbr_below": "PBRが閾値以下",
+    "score_change": "プリセットスコアが前回通知時から閾値ポイント以上変化",
+    "near_52w_low": "52週安値からの上昇率が閾値%以内",
+}
+# 現在値の一括取得だけで判定できる条件
+PRICE_RULES = {"price_above", "price_below"}
+DEFAULT_PRESET = "balanced"
+
+_CONDITIONS: dict[str, Callable[[float, float], bool]] = {
+    "price_above": lambda value, threshold: value >= threshold,
+    "price_below": lambda value, threshold: value <= threshold,
+    "per_above": lambda value, threshold: value >= threshold,
+    "per_below": lambda value, threshold: value <= threshold,
+    "pbr_above": lambda value, threshold: value >= threshold,
+    "pbr_below": lambda value, threshold: value <= threshold,
+    "near_52w_low": lambda value, threshold: value <= threshold,
+}
+
+
+class AlertRule(BaseModel):
+    """アラート条件（last_valueは前回の判定値、スコア変化では基準のスコア）"""
+
+    id: int
+    ticker: str
+    rule: str
+    threshold: float
+    preset: str
+    last_value: float | None = None
+    triggered_at: str | None = None
+    created_at: str
+
+
+class TriggeredAlert(BaseModel):
+    """通知するアラート"""
+
+    alert_id: int
+    ticker: str
+    rule: str
+    threshold: float
+    value: float
+    previous: float | None = None
+    message: str
+
+
+class AlertCheckResult(BaseModel):
+    """アラート判定の結果モデル（missingは値を取得できず判定を見送った銘柄）"""
+
+    checked_at: str
+    rules: int
+    tickers: int
+    triggered: list[TriggeredAlert]
+    missing: list[str] = []
+
+
+def add_alert(ticker: str, rule: str, threshold: float, preset: str = DEFAULT_PRESET) -> str:
+    """ウォッチリストの銘柄にアラート条件を追加"""
+    if rule not in ALERT_RULES:
+        return f"エラー: 不明な条件 '{rule}'。利用可能: {', '.join(ALERT_RULES)}"
+    if preset not in PRESET_WEIGHTS:
+        return f"エラー: 不明なプリセット '{preset}'。利用可能: {', '.join(PRESET_WEIGHTS)}"
+    if rule in ("score_change", "near_52w_low") and threshold <= 0:
+        return "エラー: thresholdは正の値で指定してください"
+
+    with _transaction(write=True) as conn:
+        if conn.execute("SELECT 1 FROM watchlist WHERE ticker = ?", (ticker,)).fetchone() is None:
+            return f"エラー: {ticker}はウォッチリストに登録されていません"
+        cursor = conn.execute(
+            "INSERT INTO alerts (ticker, rule, threshold, preset, created_at) VALUES (?, ?, ?, ?, ?)",
+            (ticker, rule, threshold, preset, datetime.now().isoformat()),
+        )
+    return f"アラートを追加: #{cursor.lastrowid} {ticker} {ALERT_RULES[rule]}（{threshold:g}）"
+
+
+def remove_alert(alert_id: int) -> str:
+    """アラート条件を削除"""
+    with _transaction(write=True) as conn:
+        cursor = conn.execute("DELETE FROM alerts WHERE id = ?", (alert_id,))
+    if cursor.rowcount == 0:
+        return f"アラート #{alert_id} は登録されていません"
+    return f"アラートを削除: #{alert_id}"
+
+
+def get_alerts() -> list[AlertRule]:
+    """アラート条件を銘柄・登録順に取得"""
+    with _transaction() as conn:
+        rows = conn.execute("SELECT * FROM alerts ORDER BY ticker, id").fetchall()
+    return [AlertRule(**dict(row)) for row in rows]
+
+
+def show_alerts() -> str:
+    """アラート条件の一覧を表示"""
+    alerts = get_alerts()
+    if not alerts:
+        return "アラートは登録されていません"
+
+    lines = ["[bold]アラート条件[/bold]\n"]
+    lines.append(f"{'ID':>5s} {'ティッカー':12s} {'条件':14s} {'閾値':>10s} {'前回値':>10s} {'最終通知'}")
+    lines.append("-" * 70)
+    for alert in alerts:
+        last = f"{alert.last_value:.2f}" if alert.last_value is not None else "-"
+        triggered = alert.triggered_at[:16] if alert.triggered_at else "-"
+        lines.append(
+            f"{alert.id:>5d} {alert.ticker:12s} {alert.rule:14s} {alert.threshold:>10g} {last:>10s} {triggered}"
+        )
+    return "\n".join(lines)
+
+
+def _metric(
+    alert: AlertRule,
+    price: float | None,
+    info: StockInfo | None,
+    scores: dict[tuple[str, str], float],
+) -> float | None:
+    """条件の判定に使う現在の値（取得できなければNone）"""
+    if alert.rule in PRICE_RULES:
+        return price
+    if info is None:
+        return None
+    if alert.rule in ("per_above", "per_below"):
+        return info.per
+    if alert.rule in ("pbr_above", "pbr_below"):
+        return info.pbr
+    if alert.rule == "score_change":
+        key = (alert.ticker, alert.preset)
+        if key not in scores:
+            scores[key] = calculate_preset_score(info, alert.preset)
+        return scores[key]
+    # near_52w_low
+    current = price if price is not None else info.current_price
+    low = info.fifty_two_week_low
+    if current is None or not low:
+        return None
+    return (current / low - 1) * 100
+
+
+def _evaluate(alert: AlertRule, value: float) -> tuple[bool, float]:
+    """(通知するか, 保存する判定値)"""
+    if alert.rule == "score_change":
+        if alert.last_value is None:
+            return False, value
+        if abs(value - alert.last_value) >= alert.threshold:
+            return True, value
+        return False, alert.last_value
+
+    condition = _CONDITIONS[alert.rule]
+    was_met = alert.last_value is not None and condition(alert.last_value, alert.threshold)
+    return condition(value, alert.threshold) and not was_met, value
+
+
+def _message(alert: AlertRule, value: float) -> str:
+    """通知の文面"""
+    if alert.rule == "score_change":
+        change = value - (alert.last_value or 0.0)
+        return f"{alert.preset}スコアが{change:+.1f}ポイント変化（{alert.last_value:.1f} → {value:.1f}）"
+    if alert.rule == "near_52w_low":
+        return f"52週安値から{value:+.1f}%（閾値 {alert.threshold:g}%以内）"
+    label = {"price": "株価", "per": "PER", "pbr": "PBR"}[alert.rule.split("_")[0]]
+    direction = "以上" if alert.rule.endswith("_above") else "以下"
+    return f"{label}が{alert.threshold:g}{direction}になりました（現在 {value:,.2f}）"
+
+
+def check_alerts(client: YFinanceClient | None = None) -> AlertCheckResult:
+    """全アラート条件を一括取得したデータで判定し、通知したアラートの判定値と通知日時を保存"""
+    alerts = get_alerts()
+    now = datetime.now().isoformat()
+    tickers = list(dict.fromkeys(alert.ticker for alert in alerts))
+    result = AlertCheckResult(checked_at=now, rules=len(alerts), tickers=len(tickers), triggered=[])
+    if not alerts:
+        return result
+
+    if client is None:
+        client = get_default_client()
+    price_tickers = list(dict.fromkeys(a.ticker for a in alerts if a.rule in PRICE_RULES | {"near_52w_low"}))
+    info_tickers = list(dict.fromkeys(a.ticker for a in alerts if a.rule not in PRICE_RULES))
+    quotes = client.get_quotes(price_tickers) if price_tickers else {}
+    infos = client.get_stock_info_batch(info_tickers) if info_tickers else {}
+
+    scores: dict[tuple[str, str], float] = {}
+    updates: list[tuple[float, str | None, int]] = []
+    missing: set[str] = set()
+    for alert in alerts:
+        value = _metric(alert, quotes.get(alert.ticker), infos.get(alert.ticker), scores)
+        if value is None:
+            missing.add(alert.ticker)
+            continue
+        fired, stored = _evaluate(alert, value)
+        if fired:
+            result.triggered.append(
+                TriggeredAlert(
+                    alert_id=alert.id,
+                    ticker=alert.ticker,
+                    rule=alert.rule,
+                    threshold=alert.threshold,
+                    value=value,
+                    previous=alert.last_value,
+                    message=_message(alert, value),
+                )
+            )
+        updates.append((stored, now if fired else alert.triggered_at, alert.id))
+
+    with _transaction(write=True) as conn:
+        conn.executemany("UPDATE alerts SET last_value = ?, triggered_at = ? WHERE id = ?", updates)
+    result.missing = [t for t in tickers if t in missing]
+    return result
+
+
+def render_alert_check(result: AlertCheckResult) -> str:
+    """アラート判定の結果モデルをRichマークアップ付きテキストに整形"""
+    if result.rules == 0:
+        return "アラートは登録されていません"
+
+    lines = [f"[bold]アラート判定[/bold]（{result.tickers}銘柄・{result.rules}条件、{result.checked_at[:16]}）\n"]
+    if result.triggered:
+        for alert in result.triggered:
+            lines.append(f"[yellow]#{alert.alert_id} {alert.ticker}[/yellow]: {alert.message}")
+    else:
+        lines.append("新たに成立した条件はありません")
+    if result.missing:
+        lines.append(f"\n[dim]※ データを取得できず判定を見送った銘柄: {', '.join(result.missing)}[/dim]")
+    return "\n".join(lines)
@@ -0,0 +1,278 @@
+"""プリセットのヒストリカルバックテスト
+
+各リバランス日に、その時点で利用可能なファンダメンタルズのスナップショットから
+プリセットスコアを計算し、上位N銘柄を均等ウェイトで保有する。
+リターン・ドローダウン・回転率は日付×銘柄の行列演算でまとめて算出する。
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from screening_test.core.scoring import PRESET_WEIGHTS, calculate_preset_score
+from screening_test.data.client import StockInfo, YFinanceClient, get_default_client
+from screening_test.data.history import get_close_matrix
+from screening_test.data.scheduler import Priority
+from screening_test.data.snapshots import load_snapshots
+from screening_test.data.tickers import get_tickers
+
+TRADING_DAYS_PER_YEAR = 252
+
+# リバランス頻度 → pandasの期間エイリアス
+REBALANCE_FREQUENCIES = {
+    "weekly": "W",
+    "monthly": "M",
+    "quarterly": "Q",
+}
+
+BENCHMARK_NAME = "universe"
+
+
+class BacktestResult(BaseModel):
+    """バックテスト結果"""
+
+    preset: str
+    top_n: int
+    start_date: str
+    end_date: str
+    total_return_pct: float
+    cagr_pct: float
+    volatility_pct: float
+    sharpe_ratio: float | None
+    max_drawdown_pct: float
+    avg_turnover_pct: float
+    rebalance_count: int
+    lookahead_bias: bool = False
+    dates: list[str]
+    nav: list[float]
+
+
+def _rebalance_indices(dates: pd.DatetimeIndex, frequency: str) -> np.ndarray:
+    """各期間の最初の営業日の行番号"""
+    periods = dates.to_period(REBALANCE_FREQUENCIES[frequency])
+    return np.flatnonzero(np.r_[True, np.asarray(periods[1:] != periods[:-1])])
+
+
+def _score_matrix(
+    snapshots: dict[date, list[StockInfo]],
+    tickers: list[str],
+    preset: str,
+    rebalance_dates: np.ndarray,
+) -> tuple[np.ndarray, bool]:
+    """リバランス日×銘柄のスコア行列（各日付でそれ以前の最新スナップショットを使用）
+
+    最初のスナップショットより前の日付には最古のスナップショットを使い、
+    ルックアヘッドバイアスが生じたかどうかを合わせて返す。
+    """
+    snapshot_dates = sorted(snapshots)
+    column = {ticker: j for j, ticker in enumerate(tickers)}
+    snapshot_scores = np.full((len(snapshot_dates), len(tickers)), np.nan)
+    for row, as_of in enumerate(snapshot_dates):
+        for stock in snapshots[as_of]:
+            j = column.get(stock.ticker)
+            if j is not None:
+                snapshot_scores[row, j] = calculate_preset_score(stock, preset)
+
+    positions = np.searchsorted(np.array(snapshot_dates, dtype="datetime64[D]"), rebalance_dates, side="right") - 1
+    lookahead = bool((positions < 0).any())
+    return snapshot_scores[np.clip(positions, 0, None)], lookahead
+
+
+def _top_n_weights(scores: np.ndarray, rebalance_prices: np.ndarray, top_n: int) -> np.ndarray:
+    """スコア上位N銘柄の均等ウェイト行列（スコア・価格が欠損している銘柄は対象外）"""
+    ranked = np.where(np.isnan(scores) | np.isnan(rebalance_prices), -np.inf, scores)
+    order = np.argsort(-ranked, axis=1, kind="stable")[:, :top_n]
+    selected = np.isfinite(np.take_along_axis(ranked, order, axis=1))
+
+    weights = np.zeros_like(scores)
+    np.put_along_axis(weights, order, selected.astype(float), axis=1)
+    counts = weights.sum(axis=1, keepdims=True)
+    return weights / np.where(counts > 0, counts, 1.0)
+
+
+def _simulate(prices: np.ndarray, rebalance_idx: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """リバランス間はバイ・アンド・ホールドとしてNAVと各リバランスの回転率を計算
+
+    Args:
+        prices: 日付×銘柄の終値行列
+        rebalance_idx: リバランス日の行番号
+        weights: リバランス日×銘柄の目標ウェイト（合計が1未満の分は現金）
+
+    Returns:
+        (日次NAV, リバランスごとの片道回転率)
+    """
+    n_days = prices.shape[0]
+    period_of_day = np.searchsorted(rebalance_idx, np.arange(n_days), side="right") - 1
+    cash = 1.0 - weights.sum(axis=1)
+
+    # 期中の価値: 直近リバランス日を基準とした価格比でウェイトを増減させる
+    with np.errstate(invalid="ignore", divide="ignore"):
+        relative = np.nan_to_num(prices / prices[rebalance_idx[period_of_day]])
+        period_end_relative = np.nan_to_num(prices[rebalance_idx[1:]] / prices[rebalance_idx[:-1]])
+    period_value = (weights[period_of_day] * relative).sum(axis=1) + cash[period_of_day]
+
+    # 期間ごとの成長率を連鎖させて各期首のNAVを求める
+    drifted = weights[:-1] * period_end_relative
+    period_growth = drifted.sum(axis=1) + cash[:-1]
+    nav_at_rebalance = np.concatenate([[1.0], np.cumprod(period_growth)])
+    nav = nav_at_rebalance[period_of_day] * period_value
+
+    # 回転率: リバランス直前の（値動きで変化した）ウェイトから目標ウェイトへの変更量
+    before = np.column_stack([drifted, cash[:-1]]) / period_growth[:, None]
+    after = np.column_stack([weights[1:], cash[1:]])
+    turnover = 0.5 * np.abs(after - before).sum(axis=1)
+    return nav, turnover
+
+
+def _summarize(
+    name: str,
+    top_n: int,
+    dates: pd.DatetimeIndex,
+    nav: np.ndarray,
+    turnover: np.ndarray,
+    lookahead: bool,
+) -> BacktestResult:
+    """NAV系列から成績指標を計算"""
+    daily_returns = nav[1:] / nav[:-1] - 1
+    volatility = float(daily_returns.std()) if len(daily_returns) > 1 else 0.0
+    sharpe = float(daily_returns.mean()) / volatility * np.sqrt(TRADING_DAYS_PER_YEAR) if volatility > 0 else None
+    years = (dates[-1] - dates[0]).days / 365.25
+    cagr = nav[-1] ** (1 / years) - 1 if years > 0 else 0.0
+    drawdown = nav / np.maximum.accumulate(nav) - 1
+
+    return BacktestResult(
+        preset=name,
+        top_n=top_n,
+        start_date=dates[0].date().isoformat(),
+        end_date=dates[-1].date().isoformat(),
+        total_return_pct=float(nav[-1] - 1) * 100,
+        cagr_pct=float(cagr) * 100,
+        volatility_pct=volatility * np.sqrt(TRADING_DAYS_PER_YEAR) * 100,
+        sharpe_ratio=sharpe,
+        max_drawdown_pct=float(drawdown.min()) * 100,
+        avg_turnover_pct=float(turnover.mean()) * 100 if len(turnover) else 0.0,
+        rebalance_count=len(turnover) + 1,
+        lookahead_bias=lookahead,
+        dates=[d.date().isoformat() for d in dates],
+        nav=nav.round(6).tolist(),
+    )
+
+
+def backtest_presets(
+    prices: pd.DataFrame,
+    snapshots: dict[date, list[StockInfo]],
+    presets: list[str] | None = None,
+    top_n: int = 5,
+    rebalance: str = "monthly",
+    include_benchmark: bool = True,
+) -> list[BacktestResult]:
+    """価格行列とスナップショットからプリセットごとのバックテストを実行
+
+    Args:
+        prices: 日付×銘柄の終値（get_close_matrixの出力）
+        snapshots: 日付ごとの銘柄情報（point-in-timeのファンダメンタルズ）
+        presets: 対象プリセット（省略時はPRESET_WEIGHTSの全プリセット）
+        top_n: 各リバランスで保有する銘柄数
+        rebalance: リバランス頻度 (weekly, monthly, quarterly)
+        include_benchmark: 全銘柄均等ウェイトのベンチマークを結果に含めるか
+
+    Raises:
+        ValueError: プリセット・リバランス頻度が不正、またはデータが不足している場合
+    """
+    presets = presets or list(PRESET_WEIGHTS)
+    unknown = [p for p in presets if p not in PRESET_WEIGHTS]
+    if unknown:
+        msg = f"不明なプリセット: {unknown}。利用可能: {list(PRESET_WEIGHTS)}"
+        raise ValueError(msg)
+    if rebalance not in REBALANCE_FREQUENCIES:
+        msg = f"不明なリバランス頻度: {rebalance}。利用可能: {list(REBALANCE_FREQUENCIES)}"
+        raise ValueError(msg)
+    if prices.empty or len(prices) < 2:
+        msg = "価格データが不足しています"
+        raise ValueError(msg)
+    if not snapshots:
+        msg = "ファンダメンタルズのスナップショットがありません"
+        raise ValueError(msg)
+
+    tickers = [str(c) for c in prices.columns]
+    dates = pd.DatetimeIndex(prices.index)
+    price_matrix = prices.to_numpy(dtype=float)
+    rebalance_idx = _rebalance_indices(dates, rebalance)
+    rebalance_prices = price_matrix[rebalance_idx]
+    rebalance_dates = dates[rebalance_idx].to_numpy().astype("datetime64[D]")
+
+    results: list[BacktestResult] = []
+    for preset in presets:
+        scores, lookahead = _score_matrix(snapshots, tickers, preset, rebalance_dates)
+        weights = _top_n_weights(scores, rebalance_prices, top_n)
+        nav, turnover = _simulate(price_matrix, rebalance_idx, weights)
+        results.append(_summarize(preset, top_n, dates, nav, turnover, lookahead))
+
+    if include_benchmark:
+        listed = (~np.isnan(rebalance_prices)).astype(float)
+        weights = listed / np.maximum(listed.sum(axis=1, keepdims=True), 1)
+        nav, turnover = _simulate(price_matrix, rebalance_idx, weights)
+        results.append(_summarize(BENCHMARK_NAME, len(tickers), dates, nav, turnover, lookahead=False))
+    return results
+
+
+def run_backtest(
+    market: str = "jpx",
+    presets: list[str] | None = None,
+    top_n: int = 5,
+    period: str = "3y",
+    rebalance: str = "monthly",
+    client: YFinanceClient | None = None,
+) -> str:
+    """市場のティッカーでプリセットのバックテストを実行し、結果を整形して返す
+
+    スナップショットが保存されていない場合は現在のファンダメンタルズを全期間に適用する
+    （ルックアヘッドバイアスを含む結果になる）。
+    """
+    if client is None:
+        client = get_default_client()
+
+    try:
+        tickers = get_tickers(market)
+    except ValueError as e:
+        return f"エラー: {e}"
+
+    snapshots = load_snapshots(market)
+    with client.priority(Priority.BATCH):
+        prices = get_close_matrix(client, tickers, period)
+        if not snapshots:
+            current = [info for info in client.get_stock_info_batch(tickers).values() if info is not None]
+            if current:
+                snapshots = {date.today(): current}
+
+    try:
+        results = backtest_presets(prices, snapshots, presets=presets, top_n=top_n, rebalance=rebalance)
+    except ValueError as e:
+        return f"エラー: {e}"
+    return format_backtest_results(market, results)
+
+
+def format_backtest_results(market: str, results: list[BacktestResult]) -> str:
+    """バックテスト結果のフォーマット"""
+    first = results[0]
+    lines = [
+        f"市場: {market} | 期間: {first.start_date} 〜 {first.end_date} | リバランス回数: {first.rebalance_count}\n",
+        f"{'プリセット':12s} {'累積':>9s} {'年率':>8s} {'ボラ':>8s} {'シャープ':>8s} {'最大DD':>9s} {'回転率':>8s}",
+        "-" * 70,
+    ]
+    for r in results:
+        sharpe = f"{r.sharpe_ratio:>8.2f}" if r.sharpe_ratio is not None else f"{'N/A':>8s}"
+        color = "green" if r.total_return_pct >= 0 else "red"
+        lines.append(
+            f"{r.preset:12s} [{color}]{r.total_return_pct:>+8.1f}%[/{color}] {r.cagr_pct:>+7.1f}% "
+            f"{r.volatility_pct:>7.1f}% {sharpe} {r.max_drawdown_pct:>8.1f}% {r.avg_turnover_pct:>7.1f}%"
+        )
+
+    if any(r.lookahead_bias for r in results):
+        lines.append(
+            "\n[yellow]※ スナップショットより前の期間は最古のファンダメンタルズで代用しています"
+            "（ルックアヘッドバイアスあり）[/yellow]"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,190 @@
+"""共分散・相関行列: 複数銘柄のリターンの関係をキャッシュ付きで計算
+
+キャッシュされた過去株価から日次対数リターンの行列を作り、直近window日の共分散・相関をNumPyで計算する。
+直近window日の和・積和を銘柄の組み合わせ・window日数ごとに保持し、新しい日付が追加されたときは
+入れ替わった日付の分だけ差分で更新する（過去の値が修正されていた場合は全体を再計算する）。
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from screening_test.data.client import YFinanceClient, get_default_client
+from screening_test.data.history import get_log_return_matrix
+
+SHRINKAGE_METHODS = ("none", "ledoit_wolf")
+DEFAULT_WINDOW = 252
+
+
+class CovarianceMatrix(BaseModel):
+    """日次対数リターンの共分散・相関行列（銘柄の並びはtickersの順）"""
+
+    tickers: list[str]
+    as_of: str
+    window: int
+    observations: int
+    shrinkage: str
+    shrinkage_intensity: float
+    covariance: list[list[float]]
+    correlation: list[list[float]]
+    missing: list[str] = []
+
+
+# (銘柄の組み合わせ, window日数) → (日付, リターン, 列ごとの和, 積和行列)
+_WindowStats = tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, np.ndarray]
+_cache: dict[tuple[tuple[str, ...], int], _WindowStats] = {}
+_cache_lock = threading.Lock()
+
+
+def ledoit_wolf_intensity(returns: np.ndarray, covariance: np.ndarray) -> float:
+    """Ledoit-Wolf法による、対角（平均分散×単位行列）への縮小強度（0〜1）"""
+    n_obs, n_assets = returns.shape
+    centered = returns - returns.mean(axis=0)
+    sample = covariance * (n_obs - 1) / n_obs
+    target = np.trace(sample) / n_assets * np.eye(n_assets)
+    distance = float(((sample - target) ** 2).sum())
+    if distance == 0:
+        return 0.0
+    # 各日の外積 x x' と標本共分散との距離の和 = Σ||x||^4 - T||S||^2
+    row_norms = (centered**2).sum(axis=1)
+    dispersion = float((row_norms**2).sum() - n_obs * (sample**2).sum()) / n_obs**2
+    return float(np.clip(dispersion / distance, 0.0, 1.0))
+
+
+def shrink_covariance(
+    returns: np.ndarray,
+    covariance: np.ndarray,
+    shrinkage: str = "none",
+) -> tuple[np.ndarray, float]:
+    """共分散行列に縮小推定を適用し、(縮小後の共分散, 縮小強度) を返す"""
+    if shrinkage not in SHRINKAGE_METHODS:
+        msg = f"不明な縮小推定: {shrinkage}。利用可能: {list(SHRINKAGE_METHODS)}"
+        raise ValueError(msg)
+    if shrinkage == "none":
+        return covariance, 0.0
+    intensity = ledoit_wolf_intensity(returns, covariance)
+    target = np.trace(covariance) / len(covariance) * np.eye(len(covariance))
+    return intensity * target + (1 - intensity) * covariance, intensity
+
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    """共分散行列から相関行列を計算（分散が0の銘柄の相関は0）"""
+    std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+    scale = np.outer(std, std)
+    correlation = np.where(scale > 0, covariance / np.where(scale > 0, scale, 1.0), 0.0)
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+def _window_stats(dates: pd.DatetimeIndex, returns: np.ndarray) -> _WindowStats:
+    """window内のリターンの和・積和を一から計算"""
+    return dates, returns, returns.sum(axis=0), returns.T @ returns
+
+
+def _update_window_stats(cached: _WindowStats | None, dates: pd.DatetimeIndex, returns: np.ndarray) -> _WindowStats:
+    """キャッシュ済みのwindowを、新しく追加された日付・外れた日付の差分だけ更新"""
+    if cached is None:
+        return _window_stats(dates, returns)
+    old_dates, old_returns, total, cross = cached
+    if old_dates[-1] not in dates:
+        return _window_stats(dates, returns)
+
+    kept_until = int(dates.searchsorted(old_dates[-1])) + 1
+    departed = int(old_dates.searchsorted(dates[0]))
+    overlap = old_returns[departed:]
+    if not old_dates[departed:].equals(dates[:kept_until]) or not np.array_equal(overlap, returns[:kept_until]):
+        return _window_stats(dates, returns)
+
+    added = returns[kept_until:]
+    removed = old_returns[:departed]
+    return (
+        dates,
+        returns,
+        total + added.sum(axis=0) - removed.sum(axis=0),
+        cross + added.T @ added - removed.T @ removed,
+    )
+
+
+def get_covariance(
+    tickers: list[str],
+    window: int = DEFAULT_WINDOW,
+    shrinkage: str = "none",
+    period: str = "2y",
+    client: YFinanceClient | None = None,
+) -> CovarianceMatrix:
+    """銘柄群の直近window日の日次対数リターンの共分散・相関行列を取得
+
+    銘柄の組み合わせは順序によらず同じキャッシュを使い、結果の並びはティッカーの昇順になる。
+
+    Raises:
+        ValueError: 縮小推定が不正・データ不足の場合
+    """
+    if shrinkage not in SHRINKAGE_METHODS:
+        msg = f"不明な縮小推定: {shrinkage}。利用可能: {list(SHRINKAGE_METHODS)}"
+        raise ValueError(msg)
+    if window < 2:
+        msg = "windowは2以上を指定してください"
+        raise ValueError(msg)
+    if client is None:
+        client = get_default_client()
+
+    requested = sorted(dict.fromkeys(tickers))
+    log_returns = get_log_return_matrix(client, requested, period)
+    available = [t for t in requested if t in log_returns.columns]
+    missing = [t for t in requested if t not in available]
+    recent = log_returns[available].iloc[-window:]
+    if len(available) == 0 or len(recent) < 2:
+        msg = "共分散を推定するための過去株価が不足しています"
+        raise ValueError(msg)
+
+    key = (tuple(available), window)
+    dates = pd.DatetimeIndex(recent.index)
+    with _cache_lock:
+        cached = _cache.get(key)
+    stats = _update_window_stats(cached, dates, recent.to_numpy())
+    with _cache_lock:
+        _cache[key] = stats
+
+    _, returns, total, cross = stats
+    n_obs = len(returns)
+    mean = total / n_obs
+    covariance = (cross - n_obs * np.outer(mean, mean)) / (n_obs - 1)
+    covariance, intensity = shrink_covariance(returns, covariance, shrinkage)
+
+    return CovarianceMatrix(
+        tickers=available,
+        as_of=str(dates[-1].date()),
+        window=window,
+        observations=n_obs,
+        shrinkage=shrinkage,
+        shrinkage_intensity=intensity,
+        covariance=covariance.tolist(),
+        correlation=correlation_from_covariance(covariance).tolist(),
+        missing=missing,
+    )
+
+
+def render_correlation(result: CovarianceMatrix) -> str:
+    """相関行列をRichマークアップ付きテキストに整形（高い相関を強調）"""
+    width = max(8, *(len(t) + 1 for t in result.tickers))
+    lines = [
+        f"基準日: {result.as_of} | 観測日数: {result.observations} | 縮小推定: {result.shrinkage}"
+        + (f"（強度 {result.shrinkage_intensity:.2f}）" if result.shrinkage != "none" else "")
+        + "\n",
+        " " * width + "".join(f"{t:>{width}s}" for t in result.tickers),
+    ]
+    for ticker, row in zip(result.tickers, result.correlation, strict=True):
+        cells = []
+        for other, value in zip(result.tickers, row, strict=True):
+            cell = f"{value:>{width}.2f}"
+            if other != ticker and value >= 0.7:
+                cell = f"[red]{cell}[/red]"
+            elif other != ticker and value <= 0.2:
+                cell = f"[green]{cell}[/green]"
+            cells.append(cell)
+        lines.append(f"{ticker:<{width}s}" + "".join(cells))
+    if result.missing:
+        lines.append(f"\n[yellow]※ 過去株価を取得できず除外: {', '.join(result.missing)}[/yellow]")
+    return "\n".join(lines)
@@ -0,0 +1,275 @@
+"""ヒストリカル・ストレステスト: ベータ推定と過去の危機期間の再現
+
+セクター感応度の代わりに、銘柄ごとにベンチマーク指数に対するベータを過去株価から推定し、
+- 過去の危機期間（リーマンショック等）の実際の値動きを再現（上場前の期間はベータ×指数の変動で推定）
+- 仮想シナリオ（SCENARIOS）のショックをベータで銘柄ごとに調整
+の2種類のストレスを計算する。
+
+ベータと期間リターンはベンチマークごとに全銘柄まとめて行列演算で計算し、結果は銘柄ごとにメモ化する。
+メモは銘柄・指数の過去株価の最終日付とともに保持し、新しい日付のデータが届いたときだけ再計算する。
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from screening_test.core.stress_test import SCENARIOS, ScenarioResult, _classify_impact
+from screening_test.data.client import YFinanceClient, get_default_client
+from screening_test.data.history import to_close_matrix
+from screening_test.data.tickers import get_benchmark
+
+HISTORY_PERIOD = "max"
+BETA_WINDOW = 504  # ベータ推定に使う直近の営業日数（約2年）
+BETA_MIN_OBSERVATIONS = 60
+
+# 再現する過去の危機期間（指数の高値から安値まで）
+HISTORICAL_SCENARIOS: list[dict[str, str]] = [
+    {
+        "name": "リーマンショック",
+        "description": "世界金融危機（2008年9月〜2009年3月）",
+        "start": "2008-09-12",
+        "end": "2009-03-09",
+    },
+    {
+        "name": "欧州債務危機",
+        "description": "ギリシャ危機の拡大（2011年7月〜10月）",
+        "start": "2011-07-22",
+        "end": "2011-10-03",
+    },
+    {
+        "name": "チャイナショック",
+        "description": "人民元切り下げと中国株急落（2015年8月〜2016年2月）",
+        "start": "2015-08-10",
+        "end": "2016-02-11",
+    },
+    {
+        "name": "コロナショック",
+        "description": "パンデミックによる急落（2020年2月〜3月）",
+        "start": "2020-02-19",
+        "end": "2020-03-23",
+    },
+    {
+        "name": "2022年利上げ局面",
+        "description": "インフレと急速な利上げ（2022年1月〜10月）",
+        "start": "2022-01-03",
+        "end": "2022-10-12",
+    },
+]
+
+
+class ReplayResult(ScenarioResult):
+    """過去の危機期間を再現したシナリオ結果"""
+
+    benchmark_change_pct: float | None
+    replayed: bool  # 実際の値動きならTrue、上場前のためベータ×指数の変動で推定した場合False
+
+
+class HistoricalStressResult(BaseModel):
+    """ヒストリカル・ストレステストの結果モデル"""
+
+    ticker: str
+    benchmark: str
+    current_price: float
+    beta: float
+    observations: int
+    replays: list[ReplayResult]
+    scenarios: list[ScenarioResult]  # SCENARIOSのショック×ベータ
+    worst_scenario: str
+
+
+_memo: dict[str, tuple[tuple[str, str], HistoricalStressResult]] = {}
+_memo_lock = threading.Lock()
+
+
+def estimate_betas(returns: np.ndarray, market: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """日付×銘柄のリターン行列と指数リターンから、全銘柄のベータを一括で推定
+
+    銘柄ごとに値がそろっている日付だけを使う（上場前などのNaNは除外）。
+
+    Returns:
+        (ベータ, 観測日数)。観測日数が不足する銘柄のベータはNaN
+    """
+    mask = ~np.isnan(returns) & ~np.isnan(market)[:, None]
+    counts = mask.sum(axis=0)
+    safe_counts = np.where(counts > 0, counts, 1)
+    r = np.where(mask, returns, 0.0)
+    m = np.where(mask, np.nan_to_num(market)[:, None], 0.0)
+    r_dev = np.where(mask, r - r.sum(axis=0) / safe_counts, 0.0)
+    m_dev = np.where(mask, m - m.sum(axis=0) / safe_counts, 0.0)
+    covariance = (r_dev * m_dev).sum(axis=0)
+    variance = (m_dev**2).sum(axis=0)
+    valid = (counts >= BETA_MIN_OBSERVATIONS) & (variance > 0)
+    betas = np.full(returns.shape[1], np.nan)
+    betas[valid] = covariance[valid] / variance[valid]
+    return betas, counts
+
+
+def window_changes(closes: pd.DataFrame, windows: list[dict[str, str]]) -> np.ndarray:
+    """期間×銘柄の騰落率（開始日・終了日以前の直近終値で計算、データがなければNaN）"""
+    index = closes.index
+    starts = index.searchsorted(pd.to_datetime([w["start"] for w in windows]), side="right") - 1
+    ends = index.searchsorted(pd.to_datetime([w["end"] for w in windows]), side="right") - 1
+    values = closes.to_numpy()
+    changes = np.full((len(windows), values.shape[1]), np.nan)
+    available = (starts >= 0) & (ends > starts)
+    changes[available] = values[ends[available]] / values[starts[available]] - 1
+    return changes
+
+
+def _compute_group(
+    tickers: list[str],
+    benchmark: str,
+    histories: dict[str, pd.DataFrame],
+) -> dict[str, HistoricalStressResult]:
+    """同じベンチマークの銘柄群のベータ・危機期間の騰落率をまとめて計算"""
+    closes = to_close_matrix({t: histories[t] for t in [*tickers, benchmark]})
+    if benchmark not in closes.columns:
+        return {}
+    tickers = [t for t in tickers if t in closes.columns]
+    returns = np.log(closes.to_numpy()[1:] / closes.to_numpy()[:-1])[-BETA_WINDOW:]
+    names = list(closes.columns)
+    columns = [names.index(t) for t in tickers]
+    market = names.index(benchmark)
+    betas, counts = estimate_betas(returns[:, columns], returns[:, market])
+
+    changes = window_changes(closes, HISTORICAL_SCENARIOS)
+    benchmark_changes = changes[:, market]
+    stock_changes = changes[:, columns]
+    # 上場前の期間はベータ×指数の騰落率で推定する
+    estimated = betas[None, :] * benchmark_changes[:, None]
+    replay_changes = np.where(np.isnan(stock_changes), estimated, stock_changes) * 100
+    shocks = np.array([scenario["shock_pct"] for scenario in SCENARIOS], dtype=float)
+    scenario_changes = np.outer(shocks, betas)  # シナリオ×銘柄
+
+    results: dict[str, HistoricalStressResult] = {}
+    last_closes = closes.iloc[-1].to_numpy()
+    for j, ticker in enumerate(tickers):
+        if np.isnan(betas[j]):
+            continue
+        price = float(last_closes[columns[j]])
+        replays = [
+            ReplayResult(
+                name=window["name"],
+                description=window["description"],
+                price_change_pct=float(replay_changes[i, j]),
+                estimated_price=price * (1 + replay_changes[i, j] / 100),
+                impact=_classify_impact(float(replay_changes[i, j])),
+                benchmark_change_pct=None if np.isnan(benchmark_changes[i]) else float(benchmark_changes[i]) * 100,
+                replayed=not np.isnan(stock_changes[i, j]),
+            )
+            for i, window in enumerate(HISTORICAL_SCENARIOS)
+            if not np.isnan(replay_changes[i, j])
+        ]
+        scenarios = [
+            ScenarioResult(
+                name=str(scenario["name"]),
+                description=str(scenario["description"]),
+                price_change_pct=float(scenario_changes[i, j]),
+                estimated_price=price * (1 + scenario_changes[i, j] / 100),
+                impact=_classify_impact(float(scenario_changes[i, j])),
+            )
+            for i, scenario in enumerate(SCENARIOS)
+        ]
+        worst = min([*replays, *scenarios], key=lambda x: x.price_change_pct)
+        results[ticker] = HistoricalStressResult(
+            ticker=ticker,
+            benchmark=benchmark,
+            current_price=price,
+            beta=float(betas[j]),
+            observations=int(counts[j]),
+            replays=replays,
+            scenarios=scenarios,
+            worst_scenario=worst.name,
+        )
+    return results
+
+
+def build_historical_stress_tests(
+    tickers: list[str],
+    client: YFinanceClient | None = None,
+) -> dict[str, HistoricalStressResult | None]:
+    """複数銘柄のヒストリカル・ストレステストを実行（データ不足の銘柄はNone）
+
+    過去株価は銘柄・指数をまとめて1回の並行取得で取得し、メモ済みの銘柄は再計算しない。
+    """
+    if client is None:
+        client = get_default_client()
+    benchmarks = {ticker: get_benchmark(ticker) for ticker in tickers}
+    histories = client.get_historical_data_batch([*tickers, *benchmarks.values()], HISTORY_PERIOD)
+
+    results: dict[str, HistoricalStressResult | None] = {}
+    stale: dict[str, list[str]] = {}
+    keys: dict[str, tuple[str, str]] = {}
+    for ticker, benchmark in benchmarks.items():
+        history, index_history = histories[ticker], histories[benchmark]
+        if history.empty or index_history.empty:
+            results[ticker] = None
+            continue
+        keys[ticker] = (str(history.index[-1]), str(index_history.index[-1]))
+        with _memo_lock:
+            cached = _memo.get(ticker)
+        if cached is not None and cached[0] == keys[ticker]:
+            results[ticker] = cached[1]
+        else:
+            stale.setdefault(benchmark, []).append(ticker)
+
+    for benchmark, group in stale.items():
+        computed = _compute_group(group, benchmark, histories)
+        with _memo_lock:
+            for ticker, result in computed.items():
+                _memo[ticker] = (keys[ticker], result)
+        for ticker in group:
+            results[ticker] = computed.get(ticker)
+
+    return {ticker: results[ticker] for ticker in benchmarks}
+
+
+def build_historical_stress_test(
+    ticker: str,
+    client: YFinanceClient | None = None,
+) -> HistoricalStressResult | None:
+    """ティッカーのヒストリカル・ストレステストを実行し、結果モデルを返す（データ不足時はNone）"""
+    return build_historical_stress_tests([ticker], client)[ticker]
+
+
+def run_historical_stress_test(
+    ticker: str,
+    client: YFinanceClient | None = None,
+) -> str:
+    """ティッカーのヒストリカル・ストレステストを実行"""
+    result = build_historical_stress_test(ticker, client)
+    if result is None:
+        return f"エラー: {ticker}のベータを推定するための過去株価を取得できませんでした"
+    return render_historical_stress_test(result)
+
+
+def _scenario_line(r: ScenarioResult, note: str = "") -> str:
+    """シナリオ結果の1行表示"""
+    impact_color = {"低": "green", "中": "yellow", "高": "red", "極高": "bold red"}.get(r.impact, "white")
+    return (
+        f"{r.name:20s} {r.price_change_pct:>+7.1f}% {r.estimated_price:>12,.2f} "
+        f"[{impact_color}]{r.impact}[/{impact_color}]{note}"
+    )
+
+
+def render_historical_stress_test(result: HistoricalStressResult) -> str:
+    """ヒストリカル・ストレステストの結果モデルをRichマークアップ付きテキストに整形"""
+    lines = [
+        f"銘柄: {result.ticker} | 現在値: {result.current_price:,.2f} | "
+        f"ベンチマーク: {result.benchmark} | ベータ: {result.beta:.2f}（{result.observations}日）\n",
+        f"{'シナリオ':20s} {'変動率':>8s} {'予想価格':>12s} {'影響度':>6s}",
+        "-" * 52,
+        "[bold]過去の危機の再現[/bold]",
+    ]
+    for r in result.replays:
+        note = f"  指数 {r.benchmark_change_pct:+.1f}%" if r.benchmark_change_pct is not None else ""
+        lines.append(_scenario_line(r, note + ("" if r.replayed else " [dim](ベータから推定)[/dim]")))
+
+    lines.append("[bold]仮想シナリオ（ショック×ベータ）[/bold]")
+    lines.extend(_scenario_line(r) for r in result.scenarios)
+
+    worst = min([*result.replays, *result.scenarios], key=lambda x: x.price_change_pct)
+    lines.append(f"\n最悪シナリオ: {worst.name} ({worst.price_change_pct:+.1f}%) → {worst.estimated_price:,.2f}")
+    return "\n".join(lines)
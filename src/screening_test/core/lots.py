@@ -0,0 +1,254 @@
+"""税務ロット台帳: 取引履歴から購入単位（ロット）ごとの保有と実現損益を再構成
+
+購入はロットとして銘柄ごとのキューに積み、売却は先入先出（FIFO）で古いロットから消化する。
+売却時にロットを指定した場合（個別法）はそのロットから先に消化する。
+実現損益は売却ごとに記録するとともに年月×銘柄の索引に積み上げるため、年初来などの期間集計は
+取引件数によらず月数分の加算で求まる。
+
+台帳はDBファイルごとにメモ化し、新しい取引が既存の最終日以降に追加された場合は追加分だけを反映する。
+データベースが前回から変わっていなければ（portfolio.get_store_version）取引履歴の検索も省く。
+"""
+
+import threading
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from datetime import date
+
+from pydantic import BaseModel
+
+from screening_test.core import portfolio
+from screening_test.core.portfolio import Transaction, get_store_version, get_transactions
+from screening_test.data.client import YFinanceClient, get_default_client
+
+
+class Lot(BaseModel):
+    """保有ロット（1回の購入で取得した株式の残り）"""
+
+    lot_id: int  # 購入取引のID
+    ticker: str
+    date: str
+    shares: int  # 残り株数
+    price: float
+
+
+class RealizedGain(BaseModel):
+    """売却1件のうち、1つのロットから消化した分の実現損益"""
+
+    sell_id: int
+    lot_id: int
+    ticker: str
+    date: str  # 売却日時
+    acquired: str  # 取得日時
+    shares: int
+    cost: float
+    proceeds: float
+    pnl: float
+
+
+class LotLedger:
+    """銘柄ごとのロットのキューと実現損益の索引"""
+
+    def __init__(self, transactions: Iterable[Transaction] = ()) -> None:
+        self.lots: dict[str, deque[Lot]] = defaultdict(deque)
+        self.realized: list[RealizedGain] = []
+        self.unmatched: dict[str, int] = {}  # 対応するロットがなかった売却株数（取引履歴より前からの保有）
+        self.last_id = 0
+        self.last_date = ""
+        # 年月（YYYY-MM） → 銘柄 → 実現損益
+        self._index: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.apply(transactions)
+
+    def apply(self, transactions: Iterable[Transaction]) -> None:
+        """取引を日付順に反映"""
+        for t in transactions:
+            if t.action == "buy":
+                self.lots[t.ticker].append(
+                    Lot(lot_id=t.id, ticker=t.ticker, date=t.date, shares=t.shares, price=t.price)
+                )
+            else:
+                self._sell(t)
+            self.last_id = max(self.last_id, t.id)
+            self.last_date = max(self.last_date, t.date)
+
+    def find_lot(self, ticker: str, lot_id: int) -> Lot | None:
+        """保有中のロットをIDで検索"""
+        return next((lot for lot in self.lots.get(ticker, ()) if lot.lot_id == lot_id), None)
+
+    def _sell(self, t: Transaction) -> None:
+        """売却を指定ロット → 古いロットの順に消化し、実現損益を記録"""
+        queue = self.lots[t.ticker]
+        remaining = t.shares
+        specified = self.find_lot(t.ticker, t.lot_id) if t.lot_id is not None else None
+        if specified is not None:
+            remaining -= self._realize(t, specified, remaining)
+        while remaining > 0 and queue:
+            remaining -= self._realize(t, queue[0], remaining)
+        if remaining > 0:
+            self.unmatched[t.ticker] = self.unmatched.get(t.ticker, 0) + remaining
+
+    def _realize(self, t: Transaction, lot: Lot, shares: int) -> int:
+        """ロットからshares株まで消化して実現損益を記録し、消化した株数を返す"""
+        taken = min(shares, lot.shares)
+        cost = lot.price * taken
+        proceeds = t.price * taken
+        self.realized.append(
+            RealizedGain(
+                sell_id=t.id,
+                lot_id=lot.lot_id,
+                ticker=t.ticker,
+                date=t.date,
+                acquired=lot.date,
+                shares=taken,
+                cost=cost,
+                proceeds=proceeds,
+                pnl=proceeds - cost,
+            )
+        )
+        self._index[t.date[:7]][t.ticker] += proceeds - cost
+        lot.shares -= taken
+        if lot.shares == 0:
+            self.lots[t.ticker].remove(lot)
+        return taken
+
+    def realized_by_ticker(self, period: str) -> dict[str, float]:
+        """期間（YYYY または YYYY-MM）の銘柄ごとの実現損益"""
+        totals: dict[str, float] = defaultdict(float)
+        for month, by_ticker in self._index.items():
+            if month.startswith(period):
+                for ticker, pnl in by_ticker.items():
+                    totals[ticker] += pnl
+        return dict(totals)
+
+    def open_lots(self) -> list[Lot]:
+        """保有中の全ロット（銘柄ごとに取得の古い順）"""
+        return [lot.model_copy() for queue in self.lots.values() for lot in queue]
+
+
+class TickerLotSummary(BaseModel):
+    """銘柄ごとの保有・実現損益・含み損益（現在値を取得できなかった場合は評価関連がNone）"""
+
+    ticker: str
+    shares: int
+    cost_basis: float
+    realized_pnl: float
+    current_price: float | None = None
+    market_value: float | None = None
+    unrealized_pnl: float | None = None
+
+
+class LotSummary(BaseModel):
+    """ロット台帳の年間集計の結果モデル（含み損益の合計は現在値を取得できた銘柄のみ）"""
+
+    year: int
+    lots: list[Lot]
+    tickers: list[TickerLotSummary]
+    realized_pnl: float
+    unrealized_pnl: float
+    unmatched: dict[str, int] = {}
+
+
+# DBファイル → (反映済みのデータベースのバージョン, ロット台帳)
+_memo: dict[str, tuple[tuple[int, int, int] | None, LotLedger]] = {}
+_memo_lock = threading.Lock()
+
+
+def _ledger() -> LotLedger:
+    """メモ済みの台帳に新しい取引を反映して返す（呼び出し側で_memo_lockを保持すること）"""
+    key = str(portfolio.DB_FILE)
+    version = get_store_version()
+    cached = _memo.get(key)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+
+    if cached is None:
+        ledger = LotLedger(get_transactions())
+    else:
+        ledger = cached[1]
+        added = get_transactions(after_id=ledger.last_id)
+        if any(t.date < ledger.last_date for t in added):
+            # 過去の日付の取引が追加された場合は順序が変わるため作り直す
+            ledger = LotLedger(get_transactions())
+        else:
+            ledger.apply(added)
+    _memo[key] = (version, ledger)
+    return ledger
+
+
+def build_lot_summary(year: int | None = None, client: YFinanceClient | None = None) -> LotSummary:
+    """保有ロットと、指定した年（省略時は今年）の実現損益・現在の含み損益を集計"""
+    if year is None:
+        year = date.today().year
+    with _memo_lock:
+        ledger = _ledger()
+        lots = ledger.open_lots()
+        realized = ledger.realized_by_ticker(f"{year:04d}")
+        unmatched = dict(ledger.unmatched)
+
+    held: dict[str, list[Lot]] = defaultdict(list)
+    for lot in lots:
+        held[lot.ticker].append(lot)
+    quotes: dict[str, float | None] = {}
+    if held:
+        if client is None:
+            client = get_default_client()
+        quotes = client.get_quotes(list(held))
+
+    tickers: list[TickerLotSummary] = []
+    for ticker in list(held) + [t for t in realized if t not in held]:
+        shares = sum(lot.shares for lot in held.get(ticker, []))
+        cost_basis = sum(lot.shares * lot.price for lot in held.get(ticker, []))
+        summary = TickerLotSummary(
+            ticker=ticker, shares=shares, cost_basis=cost_basis, realized_pnl=realized.get(ticker, 0.0)
+        )
+        current_price = quotes.get(ticker)
+        if shares > 0 and current_price is not None:
+            summary.current_price = current_price
+            summary.market_value = current_price * shares
+            summary.unrealized_pnl = summary.market_value - cost_basis
+        tickers.append(summary)
+
+    return LotSummary(
+        year=year,
+        lots=lots,
+        tickers=tickers,
+        realized_pnl=sum(realized.values()),
+        unrealized_pnl=sum(t.unrealized_pnl for t in tickers if t.unrealized_pnl is not None),
+        unmatched=unmatched,
+    )
+
+
+def show_lots(year: int | None = None) -> str:
+    """保有ロットと年間の実現・含み損益を表示"""
+    return render_lots(build_lot_summary(year))
+
+
+def _signed(value: float, width: int = 12) -> str:
+    """損益を符号付きで色分け"""
+    color = "green" if value >= 0 else "red"
+    return f"[{color}]{f'{value:+,.0f}':>{width}s}[/{color}]"
+
+
+def render_lots(summary: LotSummary) -> str:
+    """ロット台帳の結果モデルをRichマークアップ付きテキストに整形"""
+    if not summary.lots and not summary.tickers:
+        return "保有ロット・実現損益はありません"
+
+    lines = ["[bold]保有ロット（先入先出）[/bold]\n"]
+    lines.append(f"{'ロットID':>8s} {'ティッカー':12s} {'取得日':12s} {'株数':>8s} {'取得単価':>12s}")
+    lines.append("-" * 56)
+    for lot in summary.lots:
+        lines.append(f"{lot.lot_id:>8d} {lot.ticker:12s} {lot.date[:10]:12s} {lot.shares:>8d} {lot.price:>12.2f}")
+
+    lines.append(f"\n[bold]{summary.year}年の損益[/bold]\n")
+    lines.append(f"{'ティッカー':12s} {'株数':>8s} {'取得原価':>14s} {'実現損益':>12s} {'含み損益':>12s}")
+    lines.append("-" * 62)
+    for t in summary.tickers:
+        unrealized = _signed(t.unrealized_pnl) if t.unrealized_pnl is not None else f"{'-':>12s}"
+        lines.append(f"{t.ticker:12s} {t.shares:>8d} {t.cost_basis:>14,.0f} {_signed(t.realized_pnl)} {unrealized}")
+    lines.append(
+        f"\n実現損益（年初来）: {_signed(summary.realized_pnl, 0)} | 含み損益: {_signed(summary.unrealized_pnl, 0)}"
+    )
+    if summary.unmatched:
+        unmatched = ", ".join(f"{ticker} {shares}株" for ticker, shares in summary.unmatched.items())
+        lines.append(f"\n[yellow]※ 取引履歴に取得記録がない売却（損益の集計対象外）: {unmatched}[/yellow]")
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""モンテカルロ・リスクエンジン: 過去リターンの分布から VaR / CVaR を推定
+
+対象銘柄の日次対数リターンから分布を推定し、保有期間（ホライズン）後のリターンを
+銘柄間の相関を保ったままシミュレーションする。
+
+- normal: 日次リターンを多変量正規分布とみなす。独立同分布の日次ステップの和は
+  N(h·μ, h·Σ) に従うため、ホライズンhのパスはコレスキー分解で1ステップで生成する。
+- bootstrap: 過去の日付（全銘柄の同日リターンの組）を復元抽出してh日分を足し合わせる。
+  ファットテールや非線形な依存関係をそのまま反映する。
+
+シミュレーションはチャンク単位で行い、保持するのはパスごとのポートフォリオリターンのみのため、
+パス数・銘柄数が大きくてもメモリ使用量は一定に抑えられる。
+"""
+
+import numpy as np
+from pydantic import BaseModel
+
+from screening_test.core.portfolio import get_portfolio_view
+from screening_test.data.client import YFinanceClient, get_default_client
+from screening_test.data.history import get_close_matrix, to_log_returns
+
+METHODS = ("normal", "bootstrap")
+DEFAULT_HORIZONS = (1, 10)
+DEFAULT_CONFIDENCES = (0.95, 0.99)
+DEFAULT_PATHS = 100_000
+
+# 1チャンクで生成する乱数の要素数の上限（float64で約64MB）
+MAX_CHUNK_ELEMENTS = 8_000_000
+
+
+class VaRResult(BaseModel):
+    """ホライズン・信頼水準ごとのVaR / CVaR（損失を正の値で表す）"""
+
+    horizon_days: int
+    confidence: float
+    var: float
+    var_pct: float
+    cvar: float
+    cvar_pct: float
+
+
+class MonteCarloResult(BaseModel):
+    """モンテカルロ・シミュレーションの結果モデル"""
+
+    target: str  # "portfolio" またはティッカー
+    tickers: list[str]
+    weights: list[float]
+    portfolio_value: float
+    method: str
+    n_paths: int
+    seed: int | None
+    observations: int
+    results: list[VaRResult]
+    missing: list[str] = []
+
+
+def _cholesky(cov: np.ndarray) -> np.ndarray:
+    """共分散行列のコレスキー因子（半正定値で失敗する場合は固有値分解で代用）"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        factor: np.ndarray = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+        return factor
+
+
+def simulate_portfolio_returns(
+    log_returns: np.ndarray,
+    weights: np.ndarray,
+    horizon: int,
+    n_paths: int,
+    method: str = "normal",
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """ホライズン後のポートフォリオ単純リターンをパス数分シミュレーション
+
+    Args:
+        log_returns: 日付×銘柄の日次対数リターン
+        weights: 銘柄ウェイト（評価額ベース）
+        horizon: 保有期間（営業日）
+        n_paths: シミュレーションするパス数
+        method: normal（多変量正規）または bootstrap（過去日付の復元抽出）
+        rng: 乱数生成器（再現性のためシードを固定して渡す）
+
+    Returns:
+        パスごとのポートフォリオリターン（長さ n_paths）
+    """
+    if method not in METHODS:
+        msg = f"不明なシミュレーション手法: {method}。利用可能: {list(METHODS)}"
+        raise ValueError(msg)
+    rng = rng or np.random.default_rng()
+    n_obs, n_assets = log_returns.shape
+    per_path = n_assets * (horizon if method == "bootstrap" else 1)
+    chunk_size = max(1, MAX_CHUNK_ELEMENTS // per_path)
+
+    if method == "normal":
+        mean = log_returns.mean(axis=0) * horizon
+        factor = _cholesky(np.atleast_2d(np.cov(log_returns, rowvar=False))) * np.sqrt(horizon)
+
+    portfolio_returns = np.empty(n_paths)
+    for start in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - start)
+        if method == "normal":
+            cumulative = mean + rng.standard_normal((size, n_assets)) @ factor.T
+        else:
+            days = rng.integers(0, n_obs, size=(size, horizon))
+            cumulative = log_returns[days].sum(axis=1)
+        portfolio_returns[start : start + size] = np.expm1(cumulative) @ weights
+    return portfolio_returns
+
+
+def value_at_risk(
+    portfolio_returns: np.ndarray,
+    portfolio_value: float,
+    horizon: int,
+    confidences: tuple[float, ...] | list[float] = DEFAULT_CONFIDENCES,
+) -> list[VaRResult]:
+    """シミュレーション結果から信頼水準ごとのVaR / CVaRを計算"""
+    losses = -portfolio_returns
+    results: list[VaRResult] = []
+    for confidence in confidences:
+        var_pct = float(np.quantile(losses, confidence))
+        tail = losses[losses >= var_pct]
+        cvar_pct = float(tail.mean()) if tail.size else var_pct
+        results.append(
+            VaRResult(
+                horizon_days=horizon,
+                confidence=confidence,
+                var=var_pct * portfolio_value,
+                var_pct=var_pct * 100,
+                cvar=cvar_pct * portfolio_value,
+                cvar_pct=cvar_pct * 100,
+            )
+        )
+    return results
+
+
+def build_monte_carlo(
+    ticker: str | None = None,
+    use_portfolio: bool = False,
+    n_paths: int = DEFAULT_PATHS,
+    horizons: list[int] | None = None,
+    confidences: list[float] | None = None,
+    method: str = "normal",
+    seed: int | None = 42,
+    period: str = "2y",
+    client: YFinanceClient | None = None,
+) -> MonteCarloResult:
+    """銘柄またはポートフォリオ全体のVaR / CVaRをモンテカルロ法で推定
+
+    銘柄指定時は1株あたり、ポートフォリオ指定時は保有株数×直近終値の評価額に対する損失額を返す。
+    価格・リターンはいずれもキャッシュされた過去株価から求め、追加の通信は行わない。
+
+    Raises:
+        ValueError: 対象が未指定・データ不足・パラメータ不正の場合
+    """
+    if method not in METHODS:
+        msg = f"不明なシミュレーション手法: {method}。利用可能: {list(METHODS)}"
+        raise ValueError(msg)
+    if n_paths <= 0:
+        msg = "パス数は1以上を指定してください"
+        raise ValueError(msg)
+    horizons = horizons or list(DEFAULT_HORIZONS)
+    confidences = confidences or list(DEFAULT_CONFIDENCES)
+    if any(h <= 0 for h in horizons) or any(not 0 < c < 1 for c in confidences):
+        msg = "ホライズンは1以上、信頼水準は0〜1の範囲で指定してください"
+        raise ValueError(msg)
+
+    if use_portfolio:
+        shares = {p.ticker: p.shares for p in get_portfolio_view().positions}
+        if not shares:
+            msg = "ポートフォリオは空です"
+            raise ValueError(msg)
+    elif ticker is not None:
+        shares = {ticker: 1}
+    else:
+        msg = "ティッカーかポートフォリオを指定してください"
+        raise ValueError(msg)
+
+    if client is None:
+        client = get_default_client()
+    closes = get_close_matrix(client, list(shares), period)
+    tickers = [str(c) for c in closes.columns]
+    missing = [t for t in shares if t not in tickers]
+    log_returns = to_log_returns(closes).to_numpy()
+    if not tickers or len(log_returns) < 2:
+        msg = "リターンを推定するための過去株価が不足しています"
+        raise ValueError(msg)
+
+    values = closes.iloc[-1].to_numpy() * np.array([shares[t] for t in tickers], dtype=float)
+    portfolio_value = float(values.sum())
+    weights = values / portfolio_value
+
+    rng = np.random.default_rng(seed)
+    results: list[VaRResult] = []
+    for horizon in horizons:
+        simulated = simulate_portfolio_returns(log_returns, weights, horizon, n_paths, method, rng)
+        results.extend(value_at_risk(simulated, portfolio_value, horizon, confidences))
+
+    return MonteCarloResult(
+        target="portfolio" if use_portfolio else tickers[0],
+        tickers=tickers,
+        weights=weights.tolist(),
+        portfolio_value=portfolio_value,
+        method=method,
+        n_paths=n_paths,
+        seed=seed,
+        observations=len(log_returns),
+        results=results,
+        missing=missing,
+    )
+
+
+def run_monte_carlo(
+    ticker: str | None = None,
+    use_portfolio: bool = False,
+    n_paths: int = DEFAULT_PATHS,
+    horizons: list[int] | None = None,
+    confidences: list[float] | None = None,
+    method: str = "normal",
+    seed: int | None = 42,
+    period: str = "2y",
+    client: YFinanceClient | None = None,
+) -> str:
+    """モンテカルロ法でVaR / CVaRを推定し、結果を整形して返す"""
+    try:
+        result = build_monte_carlo(
+            ticker=ticker,
+            use_portfolio=use_portfolio,
+            n_paths=n_paths,
+            horizons=horizons,
+            confidences=confidences,
+            method=method,
+            seed=seed,
+            period=period,
+            client=client,
+        )
+    except ValueError as e:
+        return f"エラー: {e}"
+    return render_monte_carlo(result)
+
+
+def render_monte_carlo(result: MonteCarloResult) -> str:
+    """モンテカルロ・シミュレーションの結果モデルをRichマークアップ付きテキストに整形"""
+    target = "ポートフォリオ" if result.target == "portfolio" else result.target
+    lines = [
+        f"対象: {target} | 評価額: {result.portfolio_value:,.2f} | 手法: {result.method} | "
+        f"パス数: {result.n_paths:,} | 観測日数: {result.observations}\n",
+        f"{'期間':>6s} {'信頼水準':>8s} {'VaR':>14s} {'VaR率':>8s} {'CVaR':>14s} {'CVaR率':>8s}",
+        "-" * 64,
+    ]
+    for r in result.results:
+        lines.append(
+            f"{r.horizon_days:>5d}日 {r.confidence * 100:>7.1f}% {r.var:>14,.2f} {r.var_pct:>7.2f}% "
+            f"[red]{r.cvar:>14,.2f} {r.cvar_pct:>7.2f}%[/red]"
+        )
+    if result.missing:
+        lines.append(f"\n[yellow]※ 過去株価を取得できず除外: {', '.join(result.missing)}[/yellow]")
+    return "\n".join(lines)
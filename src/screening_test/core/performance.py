@@ -0,0 +1,208 @@
+"""パフォーマンス: 取引履歴と過去株価から日次の評価額・リターン・ドローダウンを再構成
+
+取引履歴を日付×銘柄の株数変化の行列にし、累積和で日々の保有株数を求めて終値行列との積で評価額を計算する。
+リターンは入出金（売買代金）の影響を除いた時間加重リターンで、購入はその日の始め、売却はその日の終わりに
+行われたものとみなす。
+
+結果は取引履歴の最新IDとともにメモ化し、取引がなく新しい日付の終値だけが届いた場合は、
+最後の保有株数のまま追加された日付の分だけ延長する。
+"""
+
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from screening_test.core import portfolio
+from screening_test.core.portfolio import Transaction, get_transactions
+from screening_test.data.client import YFinanceClient, get_default_client
+from screening_test.data.history import get_close_matrix
+
+# 取引開始日をカバーする最短の取得期間を選ぶ（yfinanceのperiod指定）
+HISTORY_PERIODS = [(30, "1mo"), (91, "3mo"), (182, "6mo"), (365, "1y"), (730, "2y"), (1826, "5y"), (3652, "10y")]
+
+
+class PerformanceResult(BaseModel):
+    """ポートフォリオの日次パフォーマンスの結果モデル（系列は dates と同じ順序）"""
+
+    dates: list[str]
+    nav: list[float]  # 保有銘柄の評価額
+    net_flows: list[float]  # 購入代金 - 売却代金
+    cumulative_return_pct: list[float]  # 時間加重の累積リターン
+    drawdown_pct: list[float]
+    total_return_pct: float
+    max_drawdown_pct: float
+    missing: list[str] = []  # 過去株価を取得できず取引価格で評価した銘柄
+
+
+# DBファイル → (最新の取引ID, 銘柄, 最終日の保有株数, 累積リターンの最大値, 結果)
+_memo: dict[str, tuple[int, list[str], np.ndarray, float, PerformanceResult]] = {}
+_memo_lock = threading.Lock()
+
+
+def _period_covering(start: date) -> str:
+    """開始日から今日までをカバーする最短のperiod"""
+    days = (date.today() - start).days + 7
+    return next((period for limit, period in HISTORY_PERIODS if days <= limit), "max")
+
+
+def _trade_matrices(
+    transactions: list[Transaction],
+    dates: pd.DatetimeIndex,
+    tickers: list[str],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """取引を営業日に割り当て、(株数変化, 売買代金, 直近の取引価格) の日付×銘柄行列を作る
+
+    休日の取引は次の営業日に割り当てる。
+    """
+    trades = pd.DataFrame([t.model_dump() for t in transactions])
+    trade_dates = pd.to_datetime(trades["date"].str[:10])
+    rows = np.minimum(dates.searchsorted(trade_dates), len(dates) - 1)
+    columns = np.array([tickers.index(ticker) for ticker in trades["ticker"]])
+    signed = np.where(trades["action"] == "buy", 1, -1) * trades["shares"].to_numpy()
+
+    share_changes = np.zeros((len(dates), len(tickers)))
+    flows = np.zeros((len(dates), len(tickers)))
+    np.add.at(share_changes, (rows, columns), signed)
+    np.add.at(flows, (rows, columns), signed * trades["price"].to_numpy())
+
+    last_prices = np.full((len(dates), len(tickers)), np.nan)
+    last_prices[rows, columns] = trades["price"].to_numpy()
+    last_prices = pd.DataFrame(last_prices).ffill().to_numpy()
+    return share_changes, flows, last_prices
+
+
+def _daily_returns(nav: np.ndarray, flows: np.ndarray, previous_nav: float) -> np.ndarray:
+    """入出金を除いた日次リターン（購入は日の始め、売却は日の終わりとみなす）"""
+    prev = np.concatenate([[previous_nav], nav[:-1]])
+    invested = prev + np.clip(flows, 0.0, None)
+    gain = nav - flows - prev
+    return np.where(invested > 0, gain / np.where(invested > 0, invested, 1.0), 0.0)
+
+
+def build_performance(client: YFinanceClient | None = None) -> PerformanceResult | None:
+    """取引履歴から日次の評価額・累積リターン・ドローダウンを計算（取引がなければNone）"""
+    transactions = get_transactions()
+    if not transactions:
+        return None
+    if client is None:
+        client = get_default_client()
+
+    tickers = list(dict.fromkeys(t.ticker for t in transactions))
+    start = date.fromisoformat(transactions[0].date[:10])
+    closes = get_close_matrix(client, tickers, _period_covering(start))
+    calendar = closes.index[closes.index >= pd.Timestamp(start)] if not closes.empty else pd.DatetimeIndex([])
+    if len(calendar) == 0:
+        calendar = pd.bdate_range(start, date.today())
+    calendar = pd.DatetimeIndex(calendar)
+
+    key = str(portfolio.DB_FILE)
+    last_id = transactions[-1].id
+    with _memo_lock:
+        cached = _memo.get(key)
+    if cached is not None and cached[0] == last_id and cached[1] == tickers:
+        extended = _extend(cached, closes, calendar)
+        if extended is not None:
+            with _memo_lock:
+                _memo[key] = extended
+            return extended[4]
+
+    prices = closes.reindex(index=calendar, columns=tickers).to_numpy()
+    share_changes, flows, last_prices = _trade_matrices(transactions, calendar, tickers)
+    prices = np.where(np.isnan(prices), last_prices, prices)
+    holdings = np.cumsum(share_changes, axis=0)
+
+    nav = np.nansum(holdings * prices, axis=1)
+    net_flows = flows.sum(axis=1)
+    growth = np.cumprod(1 + _daily_returns(nav, net_flows, 0.0))
+    peak = np.maximum.accumulate(growth)
+    missing = [t for t in tickers if t not in closes.columns]
+
+    result = PerformanceResult(
+        dates=[str(d.date()) for d in calendar],
+        nav=nav.tolist(),
+        net_flows=net_flows.tolist(),
+        cumulative_return_pct=((growth - 1) * 100).tolist(),
+        drawdown_pct=((growth / peak - 1) * 100).tolist(),
+        total_return_pct=float(growth[-1] - 1) * 100,
+        max_drawdown_pct=float((growth / peak - 1).min()) * 100,
+        missing=missing,
+    )
+    with _memo_lock:
+        _memo[key] = (last_id, tickers, holdings[-1], float(peak[-1]), result)
+    return result
+
+
+def _extend(
+    cached: tuple[int, list[str], np.ndarray, float, PerformanceResult],
+    closes: pd.DataFrame,
+    calendar: pd.DatetimeIndex,
+) -> tuple[int, list[str], np.ndarray, float, PerformanceResult] | None:
+    """取引がない場合に、メモ済みの結果を新しい日付の分だけ延長（延長できなければNone）"""
+    last_id, tickers, holdings, peak, result = cached
+    known = pd.DatetimeIndex(pd.to_datetime(result.dates))
+    if not calendar[: len(known)].equals(known):
+        return None
+    new_dates = calendar[len(known) :]
+    if len(new_dates) == 0:
+        return cached
+    if any(t not in closes.columns for t in tickers if t not in result.missing):
+        return None
+
+    prices = closes.reindex(index=new_dates, columns=tickers).to_numpy()
+    last_prices = closes.reindex(index=known[-1:], columns=tickers).to_numpy()
+    prices = pd.DataFrame(np.vstack([last_prices, prices])).ffill().to_numpy()[1:]
+    if np.isnan(prices[:, holdings != 0]).any():
+        return None
+
+    nav = np.nansum(holdings * prices, axis=1)
+    flows = np.zeros(len(new_dates))
+    growth = (1 + result.cumulative_return_pct[-1] / 100) * np.cumprod(1 + _daily_returns(nav, flows, result.nav[-1]))
+    peaks = np.maximum.accumulate(np.concatenate([[peak], growth]))[1:]
+    drawdown = (growth / peaks - 1) * 100
+
+    extended = result.model_copy(
+        update={
+            "dates": result.dates + [str(d.date()) for d in new_dates],
+            "nav": result.nav + nav.tolist(),
+            "net_flows": result.net_flows + flows.tolist(),
+            "cumulative_return_pct": result.cumulative_return_pct + ((growth - 1) * 100).tolist(),
+            "drawdown_pct": result.drawdown_pct + drawdown.tolist(),
+            "total_return_pct": float(growth[-1] - 1) * 100,
+            "max_drawdown_pct": min(result.max_drawdown_pct, float(drawdown.min())),
+        }
+    )
+    return last_id, tickers, holdings, float(peaks[-1]), extended
+
+
+def show_performance(client: YFinanceClient | None = None) -> str:
+    """ポートフォリオの日次パフォーマンスを表示"""
+    result = build_performance(client)
+    if result is None:
+        return "取引履歴がありません"
+    return render_performance(result)
+
+
+def render_performance(result: PerformanceResult, months: int = 12) -> str:
+    """パフォーマンスの結果モデルをRichマークアップ付きテキストに整形（直近の月末の推移を表示）"""
+    color = "green" if result.total_return_pct >= 0 else "red"
+    lines = [
+        "[bold]ポートフォリオ パフォーマンス[/bold]\n",
+        f"期間: {result.dates[0]} 〜 {result.dates[-1]} | 評価額: {result.nav[-1]:,.0f}",
+        f"累積リターン（時間加重）: [{color}]{result.total_return_pct:+.2f}%[/{color}] | "
+        f"最大ドローダウン: [red]{result.max_drawdown_pct:.2f}%[/red]\n",
+        f"{'月末':12s} {'評価額':>14s} {'累積リターン':>12s} {'ドローダウン':>12s}",
+        "-" * 54,
+    ]
+    index = pd.DatetimeIndex(pd.to_datetime(result.dates))
+    series = pd.DataFrame(
+        {"nav": result.nav, "ret": result.cumulative_return_pct, "dd": result.drawdown_pct}, index=index
+    )
+    month_ends = series.groupby(index.to_period("M")).tail(1).iloc[-months:]
+    for day, nav, ret, dd in zip(month_ends.index, month_ends["nav"], month_ends["ret"], month_ends["dd"], strict=True):
+        lines.append(f"{str(day)[:10]:12s} {nav:>14,.0f} {ret:>+11.2f}% {dd:>11.2f}%")
+    if result.missing:
+        lines.append(f"\n[yellow]※ 過去株価を取得できず取引価格で評価: {', '.join(result.missing)}[/yellow]")
+    return "\n".join(lines)
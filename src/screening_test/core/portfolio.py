@@ -1,17 +1,60 @@
-"""ポートフォリオ管理: 売買記録と損益追跡をCSVで永続化"""
+"""ポートフォリオ管理: 売買記録と損益追跡をSQLiteで永続化
+
+保有銘柄と取引履歴は `portfolio.db` に保存し、売買ごとに1トランザクションで該当行だけを更新する。
+取引履歴はティッカー・日付のインデックスで検索できる。
+売却時に購入取引のIDを指定すると、そのロット（購入単位）から売却したものとして記録する（個別法）。
+以前のバージョンのCSV（portfolio.csv, transactions.csv）はデータベースの初回作成時に取り込む。
+
+MCPサーバーのような常駐プロセスでは読み込んだ保有銘柄をメモリに保持し、データベースファイルの
+変更カウンタ（SQLiteがコミットごとに更新するヘッダの値）・更新時刻・サイズが変わったときだけ読み直す。
+CLIなど別のプロセスからの書き込みもこの確認で検出する。
+"""
 
 import csv
+import sqlite3
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
 
+from screening_test.data.database import store_version, transaction
+
+if TYPE_CHECKING:
+    from screening_test.data.client import YFinanceClient
+
 DATA_DIR = Path("output")
+DB_FILE = DATA_DIR / "portfolio.db"
+# 移行元のCSV（以前のバージョンの保存形式）
 PORTFOLIO_FILE = DATA_DIR / "portfolio.csv"
 TRANSACTIONS_FILE = DATA_DIR / "transactions.csv"
 
-PORTFOLIO_HEADERS = ["ticker", "shares", "avg_price", "last_updated"]
-TRANSACTION_HEADERS = ["date", "action", "ticker", "shares", "price"]
+SCHEMA_VERSION = 2
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS positions (
+        ticker TEXT PRIMARY KEY,
+        shares INTEGER NOT NULL,
+        avg_price REAL NOT NULL,
+        last_updated TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL,
+        action TEXT NOT NULL,
+        ticker TEXT NOT NULL,
+        shares INTEGER NOT NULL,
+        price REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_ticker_date ON transactions (ticker, date)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date)",
+]
+# バージョン → そのバージョンに上げるための変更
+MIGRATIONS = {
+    2: ["ALTER TABLE transactions ADD COLUMN lot_id INTEGER"],  # 売却元のロット（購入取引のID）
+}
 
 
 class PortfolioEntry(BaseModel):
@@ -23,160 +66,354 @@ class PortfolioEntry(BaseModel):
     last_updated: str
 
 
-def _ensure_files() -> None:
-    """CSVファイルが存在しない場合はヘッダー付きで作成"""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not PORTFOLIO_FILE.exists():
-        with PORTFOLIO_FILE.open("w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(PORTFOLIO_HEADERS)
-    if not TRANSACTIONS_FILE.exists():
-        with TRANSACTIONS_FILE.open("w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(TRANSACTION_HEADERS)
+class Transaction(BaseModel):
+    """取引履歴のエントリ"""
 
-
-def _load_portfolio() -> dict[str, PortfolioEntry]:
-    """ポートフォリオCSVを読み込み"""
-    _ensure_files()
-    entries: dict[str, PortfolioEntry] = {}
-    with PORTFOLIO_FILE.open("r") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            entries[row["ticker"]] = PortfolioEntry(
-                ticker=row["ticker"],
-                shares=int(row["shares"]),
-                avg_price=float(row["avg_price"]),
-                last_updated=row["last_updated"],
+    id: int
+    date: str
+    action: str  # "buy" または "sell"
+    ticker: str
+    shares: int
+    price: float
+    lot_id: int | None = None  # 売却元として指定した購入取引のID（個別法）
+
+
+def _migrate_csv(conn: sqlite3.Connection) -> None:
+    """以前のバージョンのCSVがあればデータベースに取り込む"""
+    if PORTFOLIO_FILE.exists():
+        with PORTFOLIO_FILE.open("r") as f:
+            conn.executemany(
+                "INSERT OR REPLACE INTO positions (ticker, shares, avg_price, last_updated) VALUES (?, ?, ?, ?)",
+                [
+                    (row["ticker"], int(row["shares"]), float(row["avg_price"]), row["last_updated"])
+                    for row in csv.DictReader(f)
+                ],
             )
-    return entries
+    if TRANSACTIONS_FILE.exists():
+        with TRANSACTIONS_FILE.open("r") as f:
+            conn.executemany(
+                "INSERT INTO transactions (date, action, ticker, shares, price) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (row["date"], row["action"], row["ticker"], int(row["shares"]), float(row["price"]))
+                    for row in csv.DictReader(f)
+                ],
+            )
+
+
+def _initialize(conn: sqlite3.Connection) -> None:
+    """スキーマがなければ作成して以前のバージョンのCSVを取り込み、古ければ最新のバージョンに上げる"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # ロック待ちの間に他のプロセスが更新済みのバージョンは飛ばす
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            _migrate_csv(conn)
+        for target in range(max(version, 1) + 1, SCHEMA_VERSION + 1):
+            for statement in MIGRATIONS[target]:
+                conn.execute(statement)
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+@contextmanager
+def _transaction(write: bool = False) -> Iterator[sqlite3.Connection]:
+    """トランザクションを開始（write=Trueなら開始時に書き込みロックを取得、例外時はロールバック）"""
+    with transaction(DB_FILE, _initialize, write) as conn:
+        yield conn
 
 
-def _save_portfolio(entries: dict[str, PortfolioEntry]) -> None:
-    """ポートフォリオCSVを保存"""
-    _ensure_files()
-    with PORTFOLIO_FILE.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=PORTFOLIO_HEADERS)
-        writer.writeheader()
-        for entry in entries.values():
-            writer.writerow(entry.model_dump())
+# (DBファイル, 読み込み時のバージョン, 保有銘柄)
+_positions_cache: tuple[str, tuple[int, int, int], dict[str, PortfolioEntry]] | None = None
+_positions_lock = threading.Lock()
 
 
-def _record_transaction(action: str, ticker: str, shares: int, price: float) -> None:
+def get_store_version() -> tuple[int, int, int] | None:
+    """データベースファイルの (変更カウンタ, 更新時刻, サイズ)。ファイルがなければNone"""
+    return store_version(DB_FILE)
+
+
+def _load_portfolio() -> dict[str, PortfolioEntry]:
+    """保有銘柄を読み込み（データベースが変わっていなければメモリ上の値を返す）"""
+    global _positions_cache
+    key = str(DB_FILE)
+    # 読み込み前にバージョンを取ることで、読み込み中の書き込みは次回の確認で検出される
+    version = get_store_version()
+    with _positions_lock:
+        cached = _positions_cache
+    if cached is not None and version is not None and cached[:2] == (key, version):
+        return dict(cached[2])
+
+    with _transaction() as conn:
+        rows = conn.execute("SELECT ticker, shares, avg_price, last_updated FROM positions ORDER BY rowid").fetchall()
+    entries = {row["ticker"]: PortfolioEntry(**dict(row)) for row in rows}
+    if version is not None:
+        with _positions_lock:
+            _positions_cache = (key, version, entries)
+    return dict(entries)
+
+
+def _record_transaction(
+    conn: sqlite3.Connection,
+    action: str,
+    ticker: str,
+    shares: int,
+    price: float,
+    lot_id: int | None = None,
+) -> Transaction:
     """取引履歴を記録"""
-    _ensure_files()
-    with TRANSACTIONS_FILE.open("a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([datetime.now().isoformat(), action, ticker, shares, price])
+    date = datetime.now().isoformat()
+    cursor = conn.execute(
+        "INSERT INTO transactions (date, action, ticker, shares, price, lot_id) VALUES (?, ?, ?, ?, ?, ?)",
+        (date, action, ticker, shares, price, lot_id),
+    )
+    # INSERT直後のlastrowidは常に設定される
+    return Transaction(
+        id=cursor.lastrowid or 0, date=date, action=action, ticker=ticker, shares=shares, price=price, lot_id=lot_id
+    )
+
+
+def _select_transactions(conn: sqlite3.Connection, where: str = "", params: Sequence[object] = ()) -> list[Transaction]:
+    """条件に合う取引履歴を日付順に取得"""
+    rows = conn.execute(
+        f"SELECT id, date, action, ticker, shares, price, lot_id FROM transactions {where} ORDER BY date, id",
+        params,
+    ).fetchall()
+    return [Transaction(**dict(row)) for row in rows]
+
+
+def get_transactions(
+    ticker: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    after_id: int | None = None,
+) -> list[Transaction]:
+    """取引履歴を日付順に取得（ティッカー・期間で絞り込み、日付はISO形式の前方一致で比較）
+
+    after_idを指定すると、そのIDより後に記録された取引だけを返す。
+    """
+    conditions: list[str] = []
+    params: list[object] = []
+    if after_id is not None:
+        conditions.append("id > ?")
+        params.append(after_id)
+    if ticker is not None:
+        conditions.append("ticker = ?")
+        params.append(ticker)
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        # 日付は時刻付きのISO形式のため、終了日の後ろに最大の文字を付けて終了日当日の取引も含める
+        conditions.append("date < ?")
+        params.append(end + "\uffff")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with _transaction() as conn:
+        return _select_transactions(conn, where, params)
 
 
 def buy_stock(ticker: str, shares: int, price: float) -> str:
     """株式を購入"""
-    entries = _load_portfolio()
-    now = datetime.now().isoformat()
-
-    if ticker in entries:
-        existing = entries[ticker]
-        total_cost = existing.avg_price * existing.shares + price * shares
-        total_shares = existing.shares + shares
-        entries[ticker] = PortfolioEntry(
-            ticker=ticker,
-            shares=total_shares,
-            avg_price=total_cost / total_shares,
-            last_updated=now,
-        )
-    else:
-        entries[ticker] = PortfolioEntry(
-            ticker=ticker,
-            shares=shares,
-            avg_price=price,
-            last_updated=now,
+    with _transaction(write=True) as conn:
+        # 既存の保有があれば平均取得単価を加重平均で更新（SET内の列は更新前の値を参照する）
+        conn.execute(
+            """INSERT INTO positions (ticker, shares, avg_price, last_updated) VALUES (?, ?, ?, ?)
+            ON CONFLICT (ticker) DO UPDATE SET
+                avg_price = (avg_price * shares + excluded.avg_price * excluded.shares) / (shares + excluded.shares),
+                shares = shares + excluded.shares,
+                last_updated = excluded.last_updated""",
+            (ticker, shares, price, datetime.now().isoformat()),
         )
-
-    _save_portfolio(entries)
-    _record_transaction("buy", ticker, shares, price)
+        _record_transaction(conn, "buy", ticker, shares, price)
     return f"購入完了: {ticker} x {shares}株 @ {price:.2f}"
 
 
-def sell_stock(ticker: str, shares: int, price: float) -> str:
-    """株式を売却"""
-    entries = _load_portfolio()
-    if ticker not in entries:
-        return f"エラー: {ticker}はポートフォリオに存在しません"
-
-    existing = entries[ticker]
-    if existing.shares < shares:
-        return f"エラー: 保有株数({existing.shares})が売却株数({shares})より少ないです"
-
-    remaining = existing.shares - shares
-    pnl = (price - existing.avg_price) * shares
-    now = datetime.now().isoformat()
-
-    if remaining == 0:
-        del entries[ticker]
-    else:
-        entries[ticker] = PortfolioEntry(
-            ticker=ticker,
-            shares=remaining,
-            avg_price=existing.avg_price,
-            last_updated=now,
-        )
-
-    _save_portfolio(entries)
-    _record_transaction("sell", ticker, shares, price)
+def sell_stock(ticker: str, shares: int, price: float, lot_id: int | None = None) -> str:
+    """株式を売却（lot_idを指定するとそのロットから売却、省略時は先入先出）
+
+    損益は消化したロットの取得単価から計算し、平均取得単価は残ったロットの加重平均に更新する
+    （ロット台帳と同じ計算）。取引履歴より前からの保有分は従来の平均取得単価で扱う。
+    """
+    from screening_test.core.lots import LotLedger
+
+    with _transaction(write=True) as conn:
+        existing = conn.execute("SELECT shares, avg_price FROM positions WHERE ticker = ?", (ticker,)).fetchone()
+        if existing is None:
+            return f"エラー: {ticker}はポートフォリオに存在しません"
+        if existing["shares"] < shares:
+            return f"エラー: 保有株数({existing['shares']})が売却株数({shares})より少ないです"
+        ledger = LotLedger(_select_transactions(conn, "WHERE ticker = ?", (ticker,)))
+        if lot_id is not None:
+            lot = ledger.find_lot(ticker, lot_id)
+            if lot is None:
+                return f"エラー: {ticker}の保有ロットにID {lot_id} はありません"
+            if lot.shares < shares:
+                return f"エラー: ロット {lot_id} の残り株数({lot.shares})が売却株数({shares})より少ないです"
+
+        sale = _record_transaction(conn, "sell", ticker, shares, price, lot_id)
+        unmatched_before = ledger.unmatched.get(ticker, 0)
+        ledger.apply([sale])
+        unmatched = ledger.unmatched.get(ticker, 0) - unmatched_before
+        pnl = sum(gain.pnl for gain in ledger.realized if gain.sell_id == sale.id)
+        pnl += (price - existing["avg_price"]) * unmatched
+
+        remaining = existing["shares"] - shares
+        if remaining == 0:
+            conn.execute("DELETE FROM positions WHERE ticker = ?", (ticker,))
+        else:
+            lots = ledger.lots[ticker]
+            untracked = max(remaining - sum(lot.shares for lot in lots), 0)
+            cost = sum(lot.price * lot.shares for lot in lots) + existing["avg_price"] * untracked
+            conn.execute(
+                "UPDATE positions SET shares = ?, avg_price = ?, last_updated = ? WHERE ticker = ?",
+                (remaining, cost / remaining, datetime.now().isoformat(), ticker),
+            )
     return f"売却完了: {ticker} x {shares}株 @ {price:.2f} | 損益: {pnl:+.2f}"
 
 
+class PortfolioView(BaseModel):
+    """ポートフォリオ一覧の結果モデル"""
+
+    positions: list[PortfolioEntry]
+
+
+class HoldingHealth(BaseModel):
+    """ヘルスチェックの銘柄ごとの結果（現在値を取得できなかった場合は評価関連がNone）"""
+
+    ticker: str
+    shares: int
+    avg_price: float
+    cost_basis: float
+    current_price: float | None = None
+    current_value: float | None = None
+    pnl: float | None = None
+    pnl_pct: float | None = None
+
+
+class HealthCheckResult(BaseModel):
+    """ポートフォリオ ヘルスチェックの結果モデル（合計は現在値を取得できた銘柄のみ）"""
+
+    holdings: list[HoldingHealth]
+    total_value: float
+    total_cost: float
+    total_pnl: float
+    total_pnl_pct: float
+
+
+def get_portfolio_view() -> PortfolioView:
+    """ポートフォリオの一覧を結果モデルとして返す"""
+    return PortfolioView(positions=list(_load_portfolio().values()))
+
+
 def show_portfolio() -> str:
     """ポートフォリオの一覧を表示"""
-    entries = _load_portfolio()
-    if not entries:
+    return render_portfolio(get_portfolio_view())
+
+
+def render_portfolio(view: PortfolioView) -> str:
+    """ポートフォリオ一覧の結果モデルをテキストに整形"""
+    if not view.positions:
         return "ポートフォリオは空です"
 
     lines = ["[bold]現在のポートフォリオ[/bold]\n"]
     lines.append(f"{'ティッカー':12s} {'株数':>8s} {'平均単価':>12s}")
     lines.append("-" * 36)
-    for entry in entries.values():
+    for entry in view.positions:
         lines.append(f"{entry.ticker:12s} {entry.shares:>8d} {entry.avg_price:>12.2f}")
     return "\n".join(lines)
 
 
-def health_check() -> str:
-    """ポートフォリオのヘルスチェック"""
-    from screening_test.data.client import YFinanceClient
+def build_health_check(client: "YFinanceClient | None" = None) -> HealthCheckResult:
+    """ポートフォリオのヘルスチェックを実行し、結果モデルを返す
+
+    現在値は全保有銘柄分を1回の一括取得でまとめて取得する（ファンダメンタルズは取得しない）。
+    """
+    from screening_test.data.client import get_default_client
 
     entries = _load_portfolio()
     if not entries:
-        return "ポートフォリオは空です"
+        return HealthCheckResult(holdings=[], total_value=0.0, total_cost=0.0, total_pnl=0.0, total_pnl_pct=0.0)
 
-    client = YFinanceClient()
-    lines = ["[bold]ポートフォリオ ヘルスチェック[/bold]\n"]
+    if client is None:
+        client = get_default_client()
+    quotes = client.get_quotes(list(entries))
+    holdings: list[HoldingHealth] = []
     total_value = 0.0
     total_cost = 0.0
 
     for entry in entries.values():
-        info = client.get_stock_info(entry.ticker)
-        if info is None or info.current_price is None:
-            lines.append(f"{entry.ticker}: データ取得失敗")
+        cost_basis = entry.avg_price * entry.shares
+        current_price = quotes.get(entry.ticker)
+        if current_price is None:
+            holdings.append(
+                HoldingHealth(
+                    ticker=entry.ticker, shares=entry.shares, avg_price=entry.avg_price, cost_basis=cost_basis
+                )
+            )
             continue
 
-        current_value = info.current_price * entry.shares
-        cost_basis = entry.avg_price * entry.shares
+        current_value = current_price * entry.shares
         pnl = current_value - cost_basis
         pnl_pct = (pnl / cost_basis) * 100 if cost_basis > 0 else 0
 
         total_value += current_value
         total_cost += cost_basis
-
-        color = "green" if pnl >= 0 else "red"
-        lines.append(
-            f"{entry.ticker:10s} | 現在値: {info.current_price:>10.2f} | "
-            f"評価額: {current_value:>12.0f} | [{color}]損益: {pnl:>+10.0f} ({pnl_pct:>+.1f}%)[/{color}]"
+        holdings.append(
+            HoldingHealth(
+                ticker=entry.ticker,
+                shares=entry.shares,
+                avg_price=entry.avg_price,
+                cost_basis=cost_basis,
+                current_price=current_price,
+                current_value=current_value,
+                pnl=pnl,
+                pnl_pct=pnl_pct,
+            )
         )
 
     total_pnl = total_value - total_cost
     total_pnl_pct = (total_pnl / total_cost) * 100 if total_cost > 0 else 0
-    lines.append(f"\n合計評価額: {total_value:,.0f} | 合計損益: {total_pnl:+,.0f} ({total_pnl_pct:+.1f}%)")
+    return HealthCheckResult(
+        holdings=holdings,
+        total_value=total_value,
+        total_cost=total_cost,
+        total_pnl=total_pnl,
+        total_pnl_pct=total_pnl_pct,
+    )
+
+
+def health_check() -> str:
+    """ポートフォリオのヘルスチェック"""
+    return render_health_check(build_health_check())
+
+
+def render_health_check(result: HealthCheckResult) -> str:
+    """ヘルスチェックの結果モデルをRichマークアップ付きテキストに整形"""
+    if not result.holdings:
+        return "ポートフォリオは空です"
+
+    lines = ["[bold]ポートフォリオ ヘルスチェック[/bold]\n"]
+    for h in result.holdings:
+        if h.current_price is None or h.current_value is None or h.pnl is None or h.pnl_pct is None:
+            lines.append(f"{h.ticker}: データ取得失敗")
+            continue
+
+        color = "green" if h.pnl >= 0 else "red"
+        lines.append(
+            f"{h.ticker:10s} | 現在値: {h.current_price:>10.2f} | "
+            f"評価額: {h.current_value:>12.0f} | [{color}]損益: {h.pnl:>+10.0f} ({h.pnl_pct:>+.1f}%)[/{color}]"
+        )
+
+    lines.append(
+        f"\n合計評価額: {result.total_value:,.0f} | 合計損益: {result.total_pnl:+,.0f} ({result.total_pnl_pct:+.1f}%)"
+    )
     return "\n".join(lines)
 
 
@@ -185,6 +422,7 @@ def manage_portfolio(
     ticker: str | None = None,
     shares: int | None = None,
     price: float | None = None,
+    lot_id: int | None = None,
 ) -> str:
     """ポートフォリオ操作のディスパッチ"""
     if action == "show":
@@ -198,5 +436,5 @@ def manage_portfolio(
     if action == "sell":
         if not all([ticker, shares, price]):
             return "エラー: sell操作にはticker, shares, priceが必要です"
-        return sell_stock(ticker, shares, price)  # type: ignore[arg-type]
+        return sell_stock(ticker, shares, price, lot_id)  # type: ignore[arg-type]
     return f"エラー: 不明なアクション '{action}'。利用可能: show, buy, sell, health"
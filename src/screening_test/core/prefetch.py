@@ -0,0 +1,145 @@
+"""バックグラウンドの先読み: キャッシュの期限切れ前に銘柄情報を取り直す
+
+MCPサーバーのような常駐プロセスで、指定した市場・ウォッチリスト・保有銘柄の銘柄情報を
+有効期限のREFRESH_AHEAD前から順に取り直し、期限切れ後の最初のツール呼び出しが通信を待たないようにする。
+取得はBACKGROUNDの優先度で行い、対話的な呼び出しや一括処理がない間の空き枠だけを使う（data/scheduler.py）。
+
+対象は環境変数 SCREENING_TEST_PREFETCH にカンマ区切りで指定する（例: "jpx,us,watchlist,portfolio"）。
+未設定なら先読みは行わない。
+"""
+
+import os
+import threading
+from contextlib import suppress
+from datetime import datetime, timedelta
+
+from screening_test.data.client import YFinanceClient, get_default_client
+from screening_test.data.scheduler import Priority, RequestCancelledError
+from screening_test.data.tickers import MARKET_TICKERS, get_tickers
+
+PREFETCH_ENV = "SCREENING_TEST_PREFETCH"
+WATCHLIST_TARGET = "watchlist"
+PORTFOLIO_TARGET = "portfolio"
+# 有効期限のこの時間前から取り直す
+REFRESH_AHEAD = timedelta(hours=1)
+# 取り直しが必要な銘柄を確認する間隔
+CYCLE_SECONDS = 300.0
+
+
+def parse_targets(value: str | None) -> list[str]:
+    """カンマ区切りの先読み対象を検証してリストにする
+
+    Raises:
+        ValueError: 不明な対象を含む場合
+    """
+    targets = [t.strip() for t in (value or "").split(",") if t.strip()]
+    available = [*MARKET_TICKERS, WATCHLIST_TARGET, PORTFOLIO_TARGET]
+    unknown = [t for t in targets if t not in available]
+    if unknown:
+        msg = f"不明な先読み対象: {', '.join(unknown)}。利用可能: {', '.join(available)}"
+        raise ValueError(msg)
+    return list(dict.fromkeys(targets))
+
+
+def prefetch_tickers(targets: list[str]) -> list[str]:
+    """先読みするティッカー（保有銘柄 → ウォッチリスト → 市場の順、重複なし）"""
+    from screening_test.core.portfolio import get_portfolio_view
+    from screening_test.core.watchlist import get_watchlist_tickers
+
+    tickers: list[str] = []
+    if PORTFOLIO_TARGET in targets:
+        tickers += [entry.ticker for entry in get_portfolio_view().positions]
+    if WATCHLIST_TARGET in targets:
+        tickers += get_watchlist_tickers()
+    for target in targets:
+        if target in MARKET_TICKERS:
+            tickers += get_tickers(target)
+    return list(dict.fromkeys(tickers))
+
+
+def due_tickers(client: YFinanceClient, tickers: list[str], now: datetime | None = None) -> list[str]:
+    """取り直しが必要なティッカー（期限の近い順、続いてキャッシュにない銘柄を対象の順に）"""
+    now = now or datetime.now()
+    expiring: list[tuple[datetime, str]] = []
+    missing: list[str] = []
+    for ticker in tickers:
+        expires_at = client.cache_expires_at(ticker)
+        if expires_at is None:
+            missing.append(ticker)
+        elif expires_at <= now + REFRESH_AHEAD:
+            expiring.append((expires_at, ticker))
+    return [ticker for _, ticker in sorted(expiring)] + missing
+
+
+class Prefetcher:
+    """先読み対象の銘柄情報を期限切れ前に取り直すバックグラウンドスレッド"""
+
+    def __init__(
+        self,
+        targets: list[str],
+        client: YFinanceClient | None = None,
+        cycle_seconds: float = CYCLE_SECONDS,
+    ) -> None:
+        self.targets = targets
+        self.client = client or get_default_client()
+        self.cycle_seconds = cycle_seconds
+        # 取得に失敗したティッカー → 次に試す日時（存在しない銘柄で毎回通信しないため）
+        self._retry_after: dict[str, datetime] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> int:
+        """取り直しが必要な銘柄をバックグラウンド枠で取得し、取得できた件数を返す"""
+        now = datetime.now()
+        refreshed = 0
+        for ticker in due_tickers(self.client, prefetch_tickers(self.targets), now):
+            if self._stop.is_set():
+                break
+            if self._retry_after.get(ticker, now) > now:
+                continue
+            try:
+                # 停止時は枠の空きを待たずに中断する
+                with self.client.priority(Priority.BACKGROUND, cancel=self._stop):
+                    info = self.client.get_stock_info(ticker, refresh=True)
+            except RequestCancelledError:
+                break
+            if info is None:
+                self._retry_after[ticker] = datetime.now() + REFRESH_AHEAD
+            else:
+                self._retry_after.pop(ticker, None)
+                refreshed += 1
+        return refreshed
+
+    def _run(self) -> None:
+        """停止されるまでcycle_secondsごとにrun_onceを繰り返す"""
+        while not self._stop.is_set():
+            # 一時的な失敗（データベースのロック等）は次の周期で取り直す
+            with suppress(Exception):
+                self.run_once()
+            self._stop.wait(self.cycle_seconds)
+
+    def start(self) -> None:
+        """先読みを開始"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """先読みを停止（実行中の1件の取得が終わるまで、最大timeout秒待つ）
+
+        枠の空きを待っている取得は中断する。timeout を過ぎても終わらない場合、スレッドはデーモンのため放置してよい。
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def prefetcher_from_env() -> Prefetcher | None:
+    """環境変数SCREENING_TEST_PREFETCHの設定から先読みを作成（未設定ならNone）
+
+    Raises:
+        ValueError: 不明な対象を含む場合
+    """
+    targets = parse_targets(os.environ.get(PREFETCH_ENV))
+    return Prefetcher(targets) if targets else None
@@ -0,0 +1,382 @@
+"""リバランス最適化: 平均分散モデルで保有銘柄の目標ウェイトと売買注文を求める
+
+期待リターンと共分散はキャッシュされた過去株価の日次対数リターンから推定（年率換算）し、
+
+    最大化  μ'w - (λ/2) w'Σw
+    制約    Σw = 1, 0 ≤ w ≤ 銘柄上限, セクターごとの合計 ≤ セクター上限, Σ|w - 現在のw| ≤ 売買回転率
+
+をADMM（交互方向乗数法）で解く。制約は上限付き単体・セクター上限・売買回転率の3つの集合に分け、
+それぞれの集合への射影（ソート・累積和による厳密解）と、共分散の固有値分解を使い回した線形方程式の解を
+交互に繰り返す。いずれもNumPyのベクトル演算のみで、数百銘柄でも1秒未満で収束する。
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+from pydantic import BaseModel
+
+from screening_test.core.covariance import get_covariance
+from screening_test.core.portfolio import get_portfolio_view
+from screening_test.data.client import YFinanceClient, get_default_client
+from screening_test.data.history import get_close_matrix, to_log_returns
+
+TRADING_DAYS = 252
+DEFAULT_MAX_WEIGHT = 0.25
+DEFAULT_RISK_AVERSION = 3.0
+MAX_ITERATIONS = 5000
+TOLERANCE = 1e-6
+# ADMMのペナルティρの初期値（λ×平均分散に対する倍率）・調整間隔・過緩和係数
+RHO_SCALE = 10.0
+RHO_UPDATE_INTERVAL = 50
+OVER_RELAXATION = 1.6
+# 制約の充足を判定する許容誤差
+FEASIBILITY_TOLERANCE = 1e-4
+
+
+class RebalanceWeight(BaseModel):
+    """銘柄ごとの現在・目標ウェイト"""
+
+    ticker: str
+    sector: str | None = None
+    current_weight: float
+    target_weight: float
+    expected_return_pct: float  # 年率
+    volatility_pct: float  # 年率
+
+
+class RebalanceOrder(BaseModel):
+    """目標ウェイトに近づけるための売買注文（株数は整数に切り捨て）"""
+
+    ticker: str
+    action: str  # "buy" または "sell"
+    shares: int
+    price: float
+    amount: float
+
+
+class RebalanceResult(BaseModel):
+    """リバランス最適化の結果モデル"""
+
+    total_value: float
+    weights: list[RebalanceWeight]
+    orders: list[RebalanceOrder]
+    turnover: float  # Σ|目標 - 現在|
+    current_return_pct: float
+    current_volatility_pct: float
+    target_return_pct: float
+    target_volatility_pct: float
+    iterations: int
+    feasible: bool  # 全制約を満たす解が見つかったか
+    violations: list[str] = []  # 満たせなかった制約（feasibleがFalseの場合）
+    fixed: list[str] = []  # 過去株価を取得できず現在のウェイトのまま据え置いた銘柄
+
+
+def project_capped_simplex(v: np.ndarray, upper: float, total: float) -> np.ndarray:
+    """{0 ≤ w ≤ upper, Σw = total} への射影
+
+    w = clip(v - τ, 0, upper) の合計 g(τ) はτについて区分線形・単調減少なので、
+    折れ点（v と v - upper）での値を累積和でまとめて計算し、totalをまたぐ区間で線形補間してτを求める。
+    """
+    n = len(v)
+    ascending = np.sort(v)
+    suffix = np.concatenate([np.cumsum(ascending[::-1])[::-1], [0.0]])
+    breakpoints = np.sort(np.concatenate([ascending, ascending - upper]))
+    # τより大きいvの和・個数から g(τ) = Σ_{v>τ}(v - τ) - Σ_{v>τ+upper}(v - τ - upper)
+    above = np.searchsorted(ascending, breakpoints, side="right")
+    capped = np.searchsorted(ascending, breakpoints + upper, side="right")
+    sums = (suffix[above] - breakpoints * (n - above)) - (suffix[capped] - (breakpoints + upper) * (n - capped))
+    i = int(np.clip(np.searchsorted(-sums, -total, side="right") - 1, 0, len(breakpoints) - 2))
+    lo, hi = breakpoints[i], breakpoints[i + 1]
+    tau = lo if sums[i] == sums[i + 1] else lo + (sums[i] - total) / (sums[i] - sums[i + 1]) * (hi - lo)
+    projected: np.ndarray = np.clip(v - tau, 0.0, upper)
+    return projected
+
+
+def project_sector_caps(v: np.ndarray, sector_ids: np.ndarray, cap: float) -> np.ndarray:
+    """各セクターの合計 ≤ cap への射影（超過したセクターの銘柄から超過分を均等に差し引く）"""
+    sums = np.bincount(sector_ids, weights=v)
+    counts = np.bincount(sector_ids)
+    excess = np.clip(sums - cap, 0.0, None) / np.maximum(counts, 1)
+    projected: np.ndarray = v - excess[sector_ids]
+    return projected
+
+
+def project_l1_ball(v: np.ndarray, center: np.ndarray, radius: float) -> np.ndarray:
+    """{Σ|w - center| ≤ radius} への射影（Duchiらのソートによる方法）"""
+    d = v - center
+    magnitude = np.abs(d)
+    if magnitude.sum() <= radius:
+        return v
+    sorted_desc = np.sort(magnitude)[::-1]
+    cumulative = np.cumsum(sorted_desc)
+    ranks = np.arange(1, len(d) + 1)
+    k = int(np.nonzero(sorted_desc * ranks > cumulative - radius)[0][-1])
+    theta = (cumulative[k] - radius) / (k + 1)
+    projected: np.ndarray = center + np.sign(d) * np.clip(magnitude - theta, 0.0, None)
+    return projected
+
+
+def optimize_weights(
+    expected_returns: np.ndarray,
+    covariance: np.ndarray,
+    current: np.ndarray,
+    max_weight: float = DEFAULT_MAX_WEIGHT,
+    risk_aversion: float = DEFAULT_RISK_AVERSION,
+    sector_ids: np.ndarray | None = None,
+    sector_cap: float | None = None,
+    turnover: float | None = None,
+    budget: float = 1.0,
+) -> tuple[np.ndarray, int]:
+    """平均分散モデルの目標ウェイトを求め、(ウェイト, 反復回数) を返す
+
+    返すウェイトは上限付き単体への射影側の変数のため、合計と銘柄上限は厳密に満たし、
+    セクター上限・売買回転率は収束の許容誤差の範囲で満たす。
+
+    Args:
+        expected_returns: 銘柄ごとの期待リターン（年率）
+        covariance: リターンの共分散行列（年率）
+        current: 現在のウェイト（売買回転率の基準）
+        max_weight: 1銘柄あたりのウェイト上限
+        risk_aversion: リスク回避度λ（大きいほど分散を抑える）
+        sector_ids: 銘柄ごとのセクター番号（0始まり）
+        sector_cap: 1セクターあたりのウェイト上限
+        turnover: Σ|w - current| の上限
+        budget: ウェイトの合計（据え置く銘柄がある場合は1未満）
+    """
+    projections: list[Callable[[np.ndarray], np.ndarray]] = [lambda x: project_capped_simplex(x, max_weight, budget)]
+    if sector_ids is not None and sector_cap is not None:
+        projections.append(lambda x: project_sector_caps(x, sector_ids, sector_cap))
+    if turnover is not None:
+        projections.append(lambda x: project_l1_ball(x, current, turnover))
+
+    n_sets, n_assets = len(projections), len(expected_returns)
+    rho = RHO_SCALE * risk_aversion * float(np.trace(covariance)) / n_assets or 1.0
+    # wの更新 (λΣ + Kρ I) w = μ + ρ Σ(z - u) は固有値分解を使い回して解く
+    eigenvalues, eigenvectors = np.linalg.eigh(risk_aversion * covariance)
+    z = np.tile(projections[0](current), (n_sets, 1))
+    u = np.zeros((n_sets, n_assets))
+    iterations = 0
+    for iterations in range(1, MAX_ITERATIONS + 1):
+        rhs = expected_returns + rho * (z - u).sum(axis=0)
+        w = eigenvectors @ ((eigenvectors.T @ rhs) / (eigenvalues + n_sets * rho))
+        relaxed = OVER_RELAXATION * w + (1 - OVER_RELAXATION) * z
+        previous = z.copy()
+        for k, project in enumerate(projections):
+            z[k] = project(relaxed[k] + u[k])
+        u += relaxed - z
+
+        primal = np.abs(w - z).max()
+        dual = rho * np.abs(z - previous).max()
+        if primal < TOLERANCE and dual < TOLERANCE:
+            break
+        if iterations % RHO_UPDATE_INTERVAL == 0:
+            # 主残差・双対残差の釣り合いを取るようにρを調整（スケーリングした双対変数も合わせて変える）
+            if primal > 10 * dual:
+                rho, u = rho * 2, u / 2
+            elif dual > 10 * primal:
+                rho, u = rho / 2, u * 2
+    return z[0], iterations
+
+
+def _violations(
+    weights: np.ndarray,
+    current: np.ndarray,
+    max_weight: float,
+    sector_ids: np.ndarray | None,
+    sector_cap: float | None,
+    turnover: float | None,
+) -> list[str]:
+    """ウェイトが許容誤差内で満たしていない制約（全て満たせば空）"""
+    violations: list[str] = []
+    if weights.min() < -FEASIBILITY_TOLERANCE or weights.max() > max_weight + FEASIBILITY_TOLERANCE:
+        violations.append("銘柄のウェイト上限")
+    if (
+        sector_ids is not None
+        and sector_cap is not None
+        and np.bincount(sector_ids, weights=weights).max() > sector_cap + FEASIBILITY_TOLERANCE
+    ):
+        violations.append("セクターのウェイト上限")
+    if turnover is not None and float(np.abs(weights - current).sum()) > turnover + FEASIBILITY_TOLERANCE:
+        violations.append("売買回転率の上限")
+    return violations
+
+
+def build_rebalance(
+    candidates: list[str] | None = None,
+    max_weight: float = DEFAULT_MAX_WEIGHT,
+    sector_cap: float | None = None,
+    turnover: float | None = None,
+    risk_aversion: float = DEFAULT_RISK_AVERSION,
+    window: int = TRADING_DAYS,
+    period: str = "2y",
+    client: YFinanceClient | None = None,
+) -> RebalanceResult:
+    """保有銘柄（と追加の候補銘柄）の目標ウェイトと、そこへ近づける売買注文を求める
+
+    評価額・価格は直近終値で計算する。過去株価を取得できない保有銘柄は平均取得単価で評価して
+    現在のウェイトのまま据え置き、残りのウェイトを最適化する。
+
+    Raises:
+        ValueError: ポートフォリオが空・データ不足・制約が満たせない設定の場合
+    """
+    if not 0 < max_weight <= 1 or (sector_cap is not None and not 0 < sector_cap <= 1):
+        msg = "銘柄・セクターのウェイト上限は0〜1の範囲で指定してください"
+        raise ValueError(msg)
+    if turnover is not None and turnover < 0:
+        msg = "売買回転率の上限は0以上を指定してください"
+        raise ValueError(msg)
+
+    positions = get_portfolio_view().positions
+    shares = {p.ticker: p.shares for p in positions}
+    if not shares:
+        msg = "ポートフォリオは空です"
+        raise ValueError(msg)
+    if client is None:
+        client = get_default_client()
+
+    universe = list(dict.fromkeys([*shares, *(candidates or [])]))
+    closes = get_close_matrix(client, universe, period)
+    log_returns = to_log_returns(closes)
+    tickers = [t for t in universe if t in log_returns.columns]
+    fixed = [t for t in shares if t not in tickers]
+    if len(tickers) < 2:
+        msg = "最適化に必要な過去株価が不足しています（2銘柄以上が必要）"
+        raise ValueError(msg)
+
+    prices = closes.ffill().iloc[-1]
+    holding_values = {
+        p.ticker: float(p.shares * (prices[p.ticker] if p.ticker in tickers else p.avg_price)) for p in positions
+    }
+    total_value = float(sum(holding_values.values()))
+    current = np.array([holding_values.get(t, 0.0) / total_value for t in tickers])
+    budget = 1.0 - sum(holding_values[t] for t in fixed) / total_value
+
+    ordered = get_covariance(tickers, window=window, shrinkage="ledoit_wolf", period=period, client=client)
+    order = [ordered.tickers.index(t) for t in tickers]
+    covariance = np.array(ordered.covariance)[np.ix_(order, order)] * TRADING_DAYS
+    expected_returns = log_returns[tickers].iloc[-window:].to_numpy().mean(axis=0) * TRADING_DAYS
+
+    sectors: list[str | None] = [None] * len(tickers)
+    sector_ids = None
+    if sector_cap is not None:
+        infos = client.get_stock_info_batch(tickers)
+        sectors = [(info.sector if info is not None else "") or "不明" for info in (infos.get(t) for t in tickers)]
+        names = list(dict.fromkeys(sectors))
+        sector_ids = np.array([names.index(s) for s in sectors])
+        if sum(min(sector_cap, sectors.count(s) * max_weight) for s in names) < budget - FEASIBILITY_TOLERANCE:
+            msg = "銘柄・セクターのウェイト上限の合計が100%に届きません。上限を緩めるか候補銘柄を追加してください"
+            raise ValueError(msg)
+    elif len(tickers) * max_weight < budget - FEASIBILITY_TOLERANCE:
+        msg = f"銘柄数({len(tickers)})×ウェイト上限({max_weight:.0%})が100%に届きません"
+        raise ValueError(msg)
+
+    weights, iterations = optimize_weights(
+        expected_returns,
+        covariance,
+        current,
+        max_weight=max_weight,
+        risk_aversion=risk_aversion,
+        sector_ids=sector_ids,
+        sector_cap=sector_cap,
+        turnover=turnover,
+        budget=budget,
+    )
+
+    volatilities = np.sqrt(np.diag(covariance))
+    violations = _violations(weights, current, max_weight, sector_ids, sector_cap, turnover)
+    orders: list[RebalanceOrder] = []
+    for ticker, delta in zip(tickers, (weights - current) * total_value, strict=True):
+        price = float(prices[ticker])
+        n_shares = int(abs(delta) // price)
+        if n_shares > 0:
+            action = "buy" if delta > 0 else "sell"
+            orders.append(
+                RebalanceOrder(ticker=ticker, action=action, shares=n_shares, price=price, amount=n_shares * price)
+            )
+
+    return RebalanceResult(
+        total_value=total_value,
+        weights=[
+            RebalanceWeight(
+                ticker=t,
+                sector=sectors[i],
+                current_weight=float(current[i]),
+                target_weight=float(weights[i]),
+                expected_return_pct=float(expected_returns[i]) * 100,
+                volatility_pct=float(volatilities[i]) * 100,
+            )
+            for i, t in enumerate(tickers)
+        ],
+        orders=sorted(orders, key=lambda o: (o.action != "sell", -o.amount)),
+        turnover=float(np.abs(weights - current).sum()),
+        current_return_pct=float(expected_returns @ current) * 100,
+        current_volatility_pct=float(np.sqrt(current @ covariance @ current)) * 100,
+        target_return_pct=float(expected_returns @ weights) * 100,
+        target_volatility_pct=float(np.sqrt(weights @ covariance @ weights)) * 100,
+        iterations=iterations,
+        feasible=not violations,
+        violations=violations,
+        fixed=fixed,
+    )
+
+
+def run_rebalance(
+    candidates: list[str] | None = None,
+    max_weight: float = DEFAULT_MAX_WEIGHT,
+    sector_cap: float | None = None,
+    turnover: float | None = None,
+    risk_aversion: float = DEFAULT_RISK_AVERSION,
+    window: int = TRADING_DAYS,
+    period: str = "2y",
+    client: YFinanceClient | None = None,
+) -> str:
+    """リバランス最適化を実行し、結果を整形して返す"""
+    try:
+        result = build_rebalance(
+            candidates=candidates,
+            max_weight=max_weight,
+            sector_cap=sector_cap,
+            turnover=turnover,
+            risk_aversion=risk_aversion,
+            window=window,
+            period=period,
+            client=client,
+        )
+    except ValueError as e:
+        return f"エラー: {e}"
+    return render_rebalance(result)
+
+
+def render_rebalance(result: RebalanceResult) -> str:
+    """リバランス最適化の結果モデルをRichマークアップ付きテキストに整形"""
+    lines = [
+        f"評価額: {result.total_value:,.0f} | 売買回転率: {result.turnover:.1%} | 反復: {result.iterations}回",
+        f"期待リターン（年率）: {result.current_return_pct:+.2f}% → {result.target_return_pct:+.2f}% | "
+        f"ボラティリティ（年率）: {result.current_volatility_pct:.2f}% → {result.target_volatility_pct:.2f}%\n",
+        f"{'ティッカー':12s} {'現在':>8s} {'目標':>8s} {'期待リターン':>12s} {'ボラティリティ':>14s}",
+        "-" * 60,
+    ]
+    for w in sorted(result.weights, key=lambda w: -w.target_weight):
+        lines.append(
+            f"{w.ticker:12s} {w.current_weight:>8.1%} {w.target_weight:>8.1%} "
+            f"{w.expected_return_pct:>+11.2f}% {w.volatility_pct:>13.2f}%"
+        )
+
+    lines.append("\n[bold]売買注文[/bold]")
+    if not result.orders:
+        lines.append("売買は不要です")
+    for o in result.orders:
+        color = "green" if o.action == "buy" else "red"
+        label = "買い" if o.action == "buy" else "売り"
+        lines.append(
+            f"[{color}]{label}[/{color}] {o.ticker:12s} {o.shares:>8d}株 @ {o.price:>10.2f} = {o.amount:>14,.0f}"
+        )
+
+    if not result.feasible:
+        violated = "・".join(result.violations) or "制約"
+        lines.append(f"\n[yellow]※ {violated}を満たす解が見つからないため、近似解を表示しています[/yellow]")
+    if result.fixed:
+        lines.append(
+            f"\n[yellow]※ 過去株価を取得できず現在のウェイトのまま据え置き: {', '.join(result.fixed)}[/yellow]"
+        )
+    return "\n".join(lines)
@@ -1,5 +1,10 @@
 """個別銘柄の財務分析レポート生成"""
 
+from pathlib import Path
+
+from pydantic import BaseModel
+from rich.text import Text
+
 from screening_test.core.scoring import (
     calculate_value_score,
     score_dividend_yield,
@@ -8,48 +13,181 @@ from screening_test.core.scoring import (
     score_revenue_growth,
     score_roe,
 )
-from screening_test.data.client import YFinanceClient
+from screening_test.core.technical import TechnicalIndicators, get_technicals, get_technicals_batch
+from screening_test.data.client import StockInfo, YFinanceClient, get_default_client
 
 
-def generate_report(
+class ScoreBreakdown(BaseModel):
+    """指標ごとのスコア内訳"""
+
+    per: float
+    pbr: float
+    dividend_yield: float
+    roe: float
+    revenue_growth: float
+
+
+class StockReport(BaseModel):
+    """財務分析レポートの結果モデル"""
+
+    stock: StockInfo
+    scores: ScoreBreakdown
+    value_score: float
+    verdict: str
+    technicals: TechnicalIndicators | None = None
+
+
+def build_report(
     ticker: str,
     client: YFinanceClient | None = None,
-) -> str:
-    """個別銘柄の財務分析レポートを生成"""
+    include_technicals: bool = True,
+) -> StockReport | None:
+    """個別銘柄のレポートを結果モデルとして生成（取得失敗時はNone）"""
     if client is None:
-        client = YFinanceClient()
+        client = get_default_client()
 
     info = client.get_stock_info(ticker)
     if info is None:
-        return f"エラー: {ticker}のデータを取得できませんでした"
+        return None
+    technicals = get_technicals(ticker, client=client) if include_technicals else None
+    return _build_report(info, technicals)
 
+
+def build_reports(
+    tickers: list[str],
+    client: YFinanceClient | None = None,
+    include_technicals: bool = True,
+) -> dict[str, StockReport | None]:
+    """複数銘柄のレポートを結果モデルとして生成（銘柄情報・過去株価はそれぞれ1回の並行取得でまとめて取得）"""
+    if client is None:
+        client = get_default_client()
+
+    infos = client.get_stock_info_batch(tickers)
+    available = [ticker for ticker, info in infos.items() if info is not None]
+    technicals = get_technicals_batch(available, client=client) if include_technicals else {}
+    return {
+        ticker: _build_report(info, technicals.get(ticker)) if info is not None else None
+        for ticker, info in infos.items()
+    }
+
+
+def generate_report(
+    ticker: str,
+    client: YFinanceClient | None = None,
+    include_technicals: bool = True,
+) -> str:
+    """個別銘柄の財務分析レポートを生成"""
+    return _render_or_error(ticker, build_report(ticker, client, include_technicals))
+
+
+def generate_reports(
+    tickers: list[str],
+    client: YFinanceClient | None = None,
+    include_technicals: bool = True,
+) -> dict[str, str]:
+    """複数銘柄の財務分析レポートを生成（銘柄情報は1回の並行取得でまとめて取得）"""
+    reports = build_reports(tickers, client, include_technicals)
+    return {ticker: _render_or_error(ticker, report) for ticker, report in reports.items()}
+
+
+def save_reports(
+    reports: dict[str, str],
+    output_dir: Path | None = None,
+    output_file: Path | None = None,
+) -> list[Path]:
+    """レポートをプレーンテキストで保存
+
+    output_dirを指定すると銘柄ごとに `<ticker>.txt` を、output_fileを指定すると全銘柄を1つのファイルにまとめて書き出す。
+    """
+    written: list[Path] = []
+    plain = {ticker: Text.from_markup(body).plain for ticker, body in reports.items()}
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for ticker, body in plain.items():
+            path = output_dir / f"{ticker}.txt"
+            path.write_text(body + "\n", encoding="utf-8")
+            written.append(path)
+
+    if output_file is not None:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        sections = [f"===== {ticker} =====\n{body}\n" for ticker, body in plain.items()]
+        output_file.write_text("\n".join(sections), encoding="utf-8")
+        written.append(output_file)
+    return written
+
+
+def _build_report(info: StockInfo, technicals: TechnicalIndicators | None = None) -> StockReport:
+    """銘柄情報からスコアを計算して結果モデルを組み立てる"""
     value_score = calculate_value_score(info)
+    return StockReport(
+        stock=info,
+        scores=ScoreBreakdown(
+            per=score_per(info.per),
+            pbr=score_pbr(info.pbr),
+            dividend_yield=score_dividend_yield(info.dividend_yield),
+            roe=score_roe(info.roe),
+            revenue_growth=score_revenue_growth(info.revenue_growth),
+        ),
+        value_score=value_score,
+        verdict=_verdict(value_score),
+        technicals=technicals,
+    )
+
 
+def _render_or_error(ticker: str, report: StockReport | None) -> str:
+    """結果モデルをテキストに整形（取得失敗時はエラーメッセージ）"""
+    if report is None:
+        return f"エラー: {ticker}のデータを取得できませんでした"
+    return render_report(report)
+
+
+def render_report(report: StockReport) -> str:
+    """レポートの結果モデルをRichマークアップ付きテキストに整形"""
+    info = report.stock
+    scores = report.scores
     lines = [
         f"[bold]{info.name}[/bold] ({info.ticker})",
         f"セクター: {info.sector}",
         f"時価総額: {info.market_cap:,.0f}",
         "",
         "[bold]バリュエーション指標[/bold]",
-        f"  PER: {_fmt(info.per, '{:.1f}倍')}  (スコア: {score_per(info.per):.0f}/25)",
-        f"  PBR: {_fmt(info.pbr, '{:.2f}倍')}  (スコア: {score_pbr(info.pbr):.0f}/25)",
+        f"  PER: {_fmt(info.per, '{:.1f}倍')}  (スコア: {scores.per:.0f}/25)",
+        f"  PBR: {_fmt(info.pbr, '{:.2f}倍')}  (スコア: {scores.pbr:.0f}/25)",
         "",
         "[bold]収益性指標[/bold]",
-        f"  配当利回り: {_fmt(info.dividend_yield, '{:.2f}%')}  (スコア: {score_dividend_yield(info.dividend_yield):.0f}/20)",
-        f"  ROE: {_fmt(info.roe, '{:.1f}%')}  (スコア: {score_roe(info.roe):.0f}/15)",
-        f"  売上成長率: {_fmt(info.revenue_growth, '{:.1f}%')}  (スコア: {score_revenue_growth(info.revenue_growth):.0f}/15)",
+        f"  配当利回り: {_fmt(info.dividend_yield, '{:.2f}%')}  (スコア: {scores.dividend_yield:.0f}/20)",
+        f"  ROE: {_fmt(info.roe, '{:.1f}%')}  (スコア: {scores.roe:.0f}/15)",
+        f"  売上成長率: {_fmt(info.revenue_growth, '{:.1f}%')}  (スコア: {scores.revenue_growth:.0f}/15)",
         "",
         "[bold]株価情報[/bold]",
         f"  現在値: {_fmt(info.current_price, '{:,.2f}')}",
         f"  52週高値: {_fmt(info.fifty_two_week_high, '{:,.2f}')}",
         f"  52週安値: {_fmt(info.fifty_two_week_low, '{:,.2f}')}",
         "",
-        f"[bold]バリュースコア: {value_score:.1f} / 100[/bold]",
-        _score_label(value_score),
+        *_technical_lines(report.technicals),
+        f"[bold]バリュースコア: {report.value_score:.1f} / 100[/bold]",
+        _score_label(report.verdict),
     ]
     return "\n".join(lines)
 
 
+def _technical_lines(technicals: TechnicalIndicators | None) -> list[str]:
+    """テクニカル指標セクションの行（指標がなければ空）"""
+    if technicals is None:
+        return []
+    t = technicals
+    return [
+        f"[bold]テクニカル指標[/bold] ({t.as_of}時点)",
+        f"  移動平均 25日/75日/200日: {_fmt(t.sma_25, '{:,.2f}')} / {_fmt(t.sma_75, '{:,.2f}')} / {_fmt(t.sma_200, '{:,.2f}')}",
+        f"  RSI(14): {_fmt(t.rsi_14, '{:.1f}')}",
+        f"  ボラティリティ(年率): {_fmt(t.volatility_pct, '{:.1f}%')}",
+        f"  最大ドローダウン: {t.max_drawdown_pct:.1f}%",
+        f"  52週高値からの乖離: {t.distance_from_high_pct:+.1f}%",
+        "",
+    ]
+
+
 def _fmt(value: float | None, fmt_str: str) -> str:
     """値のフォーマット（Noneの場合は「N/A」）"""
     if value is None:
@@ -57,14 +195,29 @@ def _fmt(value: float | None, fmt_str: str) -> str:
     return fmt_str.format(value)
 
 
-def _score_label(score: float) -> str:
-    """スコアに応じたラベルを返す"""
+def _verdict(score: float) -> str:
+    """スコアに応じた判定を返す"""
     if score >= 80:
-        return "[bold green]判定: 非常に割安[/bold green]"
+        return "非常に割安"
     if score >= 60:
-        return "[green]判定: 割安[/green]"
+        return "割安"
     if score >= 40:
-        return "[yellow]判定: 適正[/yellow]"
+        return "適正"
     if score >= 20:
-        return "[red]判定: 割高[/red]"
-    return "[bold red]判定: 非常に割高[/bold red]"
+        return "割高"
+    return "非常に割高"
+
+
+_VERDICT_STYLES = {
+    "非常に割安": "bold green",
+    "割安": "green",
+    "適正": "yellow",
+    "割高": "red",
+    "非常に割高": "bold red",
+}
+
+
+def _score_label(verdict: str) -> str:
+    """判定に応じた色付きラベルを返す"""
+    style = _VERDICT_STYLES[verdict]
+    return f"[{style}]判定: {verdict}[/{style}]"
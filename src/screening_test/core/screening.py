@@ -1,27 +1,75 @@
-"""スクリーニングエンジン: 複数のスクリーニング戦略を提供"""
+"""スクリーニングエンジン: 複数のスクリーニング戦略を提供
 
+MCPからのページ単位の取得（screen_page）では、スコア順の全結果をプロセス内に保持して
+不透明なカーソル（結果セットのIDと位置）で続きを返すため、ページ送りで再計算や全件の転送は発生しない。
+"""
+
+import base64
+import binascii
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from typing import Any
 
+from pydantic import BaseModel
 from rich.console import Console
 
 from screening_test.core.scoring import calculate_preset_score
-from screening_test.data.client import YFinanceClient
+from screening_test.data.client import StockInfo, YFinanceClient, get_default_client
+from screening_test.data.scheduler import Priority
+from screening_test.data.snapshots import save_snapshot
 from screening_test.data.tickers import get_tickers
 
-console = Console()
+# 進捗は標準エラーに出す（標準出力はJSON出力やMCPのstdioトランスポートが使うため）
+console = Console(stderr=True)
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# 保持する結果セットの数と有効期間
+RESULT_SET_LIMIT = 8
+RESULT_SET_TTL_SECONDS = 15 * 60
 
-def _fetch_and_score(
-    client: YFinanceClient,
-    tickers: list[str],
-    preset: str,
-) -> list[dict[str, Any]]:
-    """ティッカーリストからデータ取得・スコア計算"""
+
+class ScreenPage(BaseModel):
+    """スクリーニング結果の1ページ（next_cursorがNoneなら最終ページ）"""
+
+    market: str
+    preset: str
+    total: int
+    offset: int
+    results: list[dict[str, Any]]
+    next_cursor: str | None = None
+
+
+class _ResultSet(BaseModel):
+    """保持中のスコア順の全結果"""
+
+    market: str
+    preset: str
+    created_at: float  # time.monotonic()
+    results: list[dict[str, Any]]
+
+
+# 結果セットのID → 結果セット（古い順、RESULT_SET_LIMITを超えたら古いものから破棄）
+_result_sets: OrderedDict[str, _ResultSet] = OrderedDict()
+_result_sets_lock = threading.Lock()
+
+
+def fetch_stocks(client: YFinanceClient, tickers: list[str]) -> list[StockInfo]:
+    """ティッカーリストから銘柄情報を並行取得（取得失敗の銘柄は除外）
+
+    市場全体の一括取得のため、対話的な呼び出しに枠を譲るBATCHの優先度で取得する。
+    """
+    with client.priority(Priority.BATCH):
+        infos = client.get_stock_info_batch(tickers)
+    return [info for info in infos.values() if info is not None]
+
+
+def _score_stocks(stocks: list[StockInfo], preset: str) -> list[dict[str, Any]]:
+    """銘柄情報リストのスコア計算"""
     results: list[dict[str, Any]] = []
-    for ticker in tickers:
-        info = client.get_stock_info(ticker)
-        if info is None:
-            continue
+    for info in stocks:
         score = calculate_preset_score(info, preset)
         results.append(
             {
@@ -38,11 +86,21 @@ def _fetch_and_score(
     return results
 
 
+def _fetch_and_score(
+    client: YFinanceClient,
+    tickers: list[str],
+    preset: str,
+) -> list[dict[str, Any]]:
+    """ティッカーリストからデータ取得・スコア計算"""
+    return _score_stocks(fetch_stocks(client, tickers), preset)
+
+
 def run_screening(
     market: str = "jpx",
     preset: str = "value",
     top_n: int = 20,
     client: YFinanceClient | None = None,
+    record_snapshot: bool = True,
 ) -> list[dict[str, Any]]:
     """スクリーニングを実行し、上位N銘柄を返す
 
@@ -51,19 +109,143 @@ def run_screening(
         preset: スクリーニングプリセット (value, growth, dividend, balanced)
         top_n: 上位N銘柄を返す
         client: YFinanceClient（テスト用にDI可能）
+        record_snapshot: 取得した銘柄情報をバックテスト用スナップショットとして保存するか
 
     Returns:
         スコア順にソートされた銘柄情報のリスト
     """
+    return rank_market(market=market, preset=preset, client=client, record_snapshot=record_snapshot)[:top_n]
+
+
+def rank_market(
+    market: str = "jpx",
+    preset: str = "value",
+    client: YFinanceClient | None = None,
+    record_snapshot: bool = True,
+) -> list[dict[str, Any]]:
+    """市場の全銘柄をスコア順に並べた結果を返す（引数はrun_screeningと同じ）"""
     if client is None:
-        client = YFinanceClient()
+        client = get_default_client()
 
     tickers = get_tickers(market)
     console.print(f"[dim]市場: {market} | プリセット: {preset} | 銘柄数: {len(tickers)}[/dim]")
 
-    results = _fetch_and_score(client, tickers, preset)
+    stocks = fetch_stocks(client, tickers)
+    if record_snapshot and stocks:
+        save_snapshot(market, stocks)
+
+    results = _score_stocks(stocks, preset)
     results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:top_n]
+    return results
+
+
+def _encode_cursor(set_id: str, offset: int) -> str:
+    """結果セットのIDと位置を不透明なカーソル文字列にする"""
+    return base64.urlsafe_b64encode(f"{set_id}:{offset}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    """カーソル文字列を (結果セットのID, 位置) に戻す
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    msg = "cursorの形式が不正です"
+    try:
+        set_id, offset_str = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        offset = int(offset_str)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(msg) from None
+    if offset < 0:
+        raise ValueError(msg)
+    return set_id, offset
+
+
+def _prune_result_sets(now: float) -> None:
+    """期限切れと上限を超えた結果セットを破棄（呼び出し側で_result_sets_lockを保持すること）"""
+    for set_id in [k for k, v in _result_sets.items() if now - v.created_at > RESULT_SET_TTL_SECONDS]:
+        del _result_sets[set_id]
+    while len(_result_sets) > RESULT_SET_LIMIT:
+        _result_sets.popitem(last=False)
+
+
+def _latest_result_set(market: str, preset: str) -> tuple[str, _ResultSet] | None:
+    """同じ市場・プリセットの結果セットのうち最も新しいものの (ID, 結果セット)
+
+    呼び出し側で_result_sets_lockを保持すること。
+    """
+    for set_id, result_set in reversed(_result_sets.items()):
+        if result_set.market == market and result_set.preset == preset:
+            return set_id, result_set
+    return None
+
+
+def get_result_set(market: str, preset: str) -> tuple[float, list[dict[str, Any]]] | None:
+    """保持中の有効な結果セットの (作成時刻（time.monotonic()）, スコア順の全結果)。なければNone
+
+    スクリーニングは実行しない。
+    """
+    with _result_sets_lock:
+        _prune_result_sets(time.monotonic())
+        found = _latest_result_set(market, preset)
+    if found is None:
+        return None
+    return found[1].created_at, found[1].results
+
+
+def screen_page(
+    market: str = "jpx",
+    preset: str = "value",
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    client: YFinanceClient | None = None,
+) -> ScreenPage:
+    """スクリーニング結果をスコア順にページ単位で返す
+
+    cursorを省略すると先頭ページを返す（同じ市場・プリセットの有効な結果セットがあれば再利用し、
+    なければスクリーニングを実行して保持する）。続きは前のページのnext_cursorを渡して取得する。
+
+    Raises:
+        ValueError: page_sizeが範囲外、またはcursorが不正・期限切れの場合
+    """
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        msg = f"page_sizeは1〜{MAX_PAGE_SIZE}で指定してください"
+        raise ValueError(msg)
+
+    now = time.monotonic()
+    with _result_sets_lock:
+        _prune_result_sets(now)
+        if cursor is not None:
+            set_id, offset = _decode_cursor(cursor)
+            result_set = _result_sets.get(set_id)
+            if result_set is None:
+                msg = "cursorの有効期限が切れています。cursorを省略して最初から取得し直してください"
+                raise ValueError(msg)
+        else:
+            offset = 0
+            found = _latest_result_set(market, preset)
+            result_set = found[1] if found is not None else None
+            set_id = found[0] if found is not None else ""
+
+    if result_set is None:
+        # 実行中はロックを保持しない（取得に時間がかかるため）
+        results = rank_market(market=market, preset=preset, client=client)
+        result_set = _ResultSet(market=market, preset=preset, created_at=time.monotonic(), results=results)
+        set_id = secrets.token_urlsafe(8)
+        with _result_sets_lock:
+            _result_sets[set_id] = result_set
+            _prune_result_sets(result_set.created_at)
+
+    end = offset + page_size
+    total = len(result_set.results)
+    return ScreenPage(
+        market=result_set.market,
+        preset=result_set.preset,
+        total=total,
+        offset=offset,
+        results=result_set.results[offset:end],
+        next_cursor=_encode_cursor(set_id, end) if end < total else None,
+    )
 
 
 def screen_by_criteria(
@@ -74,7 +256,7 @@ def screen_by_criteria(
 ) -> list[dict[str, Any]]:
     """最低スコア基準でのフィルタリング"""
     if client is None:
-        client = YFinanceClient()
+        client = get_default_client()
 
     results = _fetch_and_score(client, tickers, preset)
     filtered = [r for r in results if r["score"] >= min_score]
@@ -1,8 +1,14 @@
 """ストレステスト: 8シナリオでリスクを検証"""
 
+from typing import Any
+
+import numpy as np
 from pydantic import BaseModel
 
-from screening_test.data.client import YFinanceClient
+from screening_test.core.portfolio import get_portfolio_view
+from screening_test.core.screening import fetch_stocks
+from screening_test.data.client import StockInfo, YFinanceClient, get_default_client
+from screening_test.data.tickers import get_tickers
 
 
 class ScenarioResult(BaseModel):
@@ -16,7 +22,7 @@ class ScenarioResult(BaseModel):
 
 
 # 8つのストレステストシナリオ
-SCENARIOS = [
+SCENARIOS: list[dict[str, Any]] = [
     {"name": "金利上昇", "description": "中央銀行が政策金利を1%引き上げ", "shock_pct": -15.0},
     {"name": "景気後退", "description": "GDPが2四半期連続マイナス", "shock_pct": -25.0},
     {"name": "為替急変（円高）", "description": "ドル円が20円下落", "shock_pct": -20.0},
@@ -40,17 +46,28 @@ def _classify_impact(change_pct: float) -> str:
     return "極高"
 
 
-def run_stress_test(
+class StressTestResult(BaseModel):
+    """ストレステストの結果モデル"""
+
+    ticker: str
+    sector: str
+    current_price: float
+    sector_sensitivity: float
+    scenarios: list[ScenarioResult]
+    worst_scenario: str
+
+
+def build_stress_test(
     ticker: str,
     client: YFinanceClient | None = None,
-) -> str:
-    """ティッカーに対して8シナリオのストレステストを実行"""
+) -> StressTestResult | None:
+    """ティッカーに対して8シナリオのストレステストを実行し、結果モデルを返す（取得失敗時はNone）"""
     if client is None:
-        client = YFinanceClient()
+        client = get_default_client()
 
     info = client.get_stock_info(ticker)
     if info is None or info.current_price is None:
-        return f"エラー: {ticker}のデータを取得できませんでした"
+        return None
 
     current_price = info.current_price
     results: list[ScenarioResult] = []
@@ -70,7 +87,26 @@ def run_stress_test(
         )
         results.append(result)
 
-    return _format_results(ticker, current_price, results)
+    worst = min(results, key=lambda x: x.price_change_pct)
+    return StressTestResult(
+        ticker=ticker,
+        sector=info.sector,
+        current_price=current_price,
+        sector_sensitivity=sector_sensitivity,
+        scenarios=results,
+        worst_scenario=worst.name,
+    )
+
+
+def run_stress_test(
+    ticker: str,
+    client: YFinanceClient | None = None,
+) -> str:
+    """ティッカーに対して8シナリオのストレステストを実行"""
+    result = build_stress_test(ticker, client)
+    if result is None:
+        return f"エラー: {ticker}のデータを取得できませんでした"
+    return render_stress_test(result)
 
 
 def _get_sector_sensitivity(sector: str) -> float:
@@ -91,6 +127,11 @@ def _get_sector_sensitivity(sector: str) -> float:
     return sensitivity_map.get(sector, 1.0)
 
 
+def render_stress_test(result: StressTestResult) -> str:
+    """ストレステストの結果モデルをRichマークアップ付きテキストに整形"""
+    return _format_results(result.ticker, result.current_price, result.scenarios)
+
+
 def _format_results(ticker: str, current_price: float, results: list[ScenarioResult]) -> str:
     """ストレステスト結果のフォーマット"""
     lines = [
@@ -108,3 +149,268 @@ def _format_results(ticker: str, current_price: float, results: list[ScenarioRes
     worst = min(results, key=lambda x: x.price_change_pct)
     lines.append(f"\n最悪シナリオ: {worst.name} ({worst.price_change_pct:+.1f}%) → {worst.estimated_price:,.2f}")
     return "\n".join(lines)
+
+
+class PositionStress(BaseModel):
+    """ポートフォリオストレステストの銘柄ごとの結果"""
+
+    ticker: str
+    sector: str
+    shares: int
+    price: float
+    price_is_fallback: bool  # 現在値を取得できず平均取得単価で評価した場合True
+    market_value: float
+    sector_sensitivity: float
+    pnl_by_scenario: list[float]  # SCENARIOSと同じ順序
+
+
+class ScenarioImpact(BaseModel):
+    """ポートフォリオ全体でのシナリオ別影響"""
+
+    name: str
+    description: str
+    pnl: float
+    pnl_pct: float
+    impact: str
+
+
+class PortfolioStressResult(BaseModel):
+    """ポートフォリオストレステストの結果モデル"""
+
+    total_value: float
+    scenarios: list[ScenarioImpact]
+    positions: list[PositionStress]
+    worst_scenario: str
+
+
+def build_portfolio_stress_test(client: YFinanceClient | None = None) -> PortfolioStressResult | None:
+    """保有銘柄全体に8シナリオのストレステストを実行（ポートフォリオが空ならNone）
+
+    保有銘柄×シナリオのショック行列（セクター感応度×シナリオのショック率）を作り、
+    銘柄別・合計の損益を行列演算でまとめて計算する。現在値は1回の並行取得でまとめて取得する。
+    """
+    positions = get_portfolio_view().positions
+    if not positions:
+        return None
+    if client is None:
+        client = get_default_client()
+
+    infos = client.get_stock_info_batch([p.ticker for p in positions])
+    sectors: list[str] = []
+    prices = np.empty(len(positions))
+    fallback = np.zeros(len(positions), dtype=bool)
+    for i, position in enumerate(positions):
+        info = infos.get(position.ticker)
+        sectors.append(info.sector if info is not None else "")
+        if info is not None and info.current_price is not None:
+            prices[i] = info.current_price
+        else:
+            prices[i] = position.avg_price
+            fallback[i] = True
+
+    shares = np.array([p.shares for p in positions], dtype=float)
+    sensitivities = np.array([_get_sector_sensitivity(sector) for sector in sectors])
+    shocks = np.array([scenario["shock_pct"] for scenario in SCENARIOS], dtype=float) / 100
+
+    values = shares * prices
+    shock_matrix = np.outer(sensitivities, shocks)  # 保有銘柄×シナリオ
+    position_pnl = values[:, None] * shock_matrix
+    total_pnl = values @ shock_matrix
+    total_value = float(values.sum())
+    total_pnl_pct = total_pnl / total_value * 100 if total_value > 0 else np.zeros_like(total_pnl)
+
+    scenarios = [
+        ScenarioImpact(
+            name=str(scenario["name"]),
+            description=str(scenario["description"]),
+            pnl=float(pnl),
+            pnl_pct=float(pct),
+            impact=_classify_impact(float(pct)),
+        )
+        for scenario, pnl, pct in zip(SCENARIOS, total_pnl, total_pnl_pct, strict=True)
+    ]
+    return PortfolioStressResult(
+        total_value=total_value,
+        scenarios=scenarios,
+        positions=[
+            PositionStress(
+                ticker=position.ticker,
+                sector=sectors[i],
+                shares=position.shares,
+                price=float(prices[i]),
+                price_is_fallback=bool(fallback[i]),
+                market_value=float(values[i]),
+                sector_sensitivity=float(sensitivities[i]),
+                pnl_by_scenario=position_pnl[i].tolist(),
+            )
+            for i, position in enumerate(positions)
+        ],
+        worst_scenario=scenarios[int(np.argmin(total_pnl))].name,
+    )
+
+
+def run_portfolio_stress_test(client: YFinanceClient | None = None) -> str:
+    """保有銘柄全体に8シナリオのストレステストを実行"""
+    result = build_portfolio_stress_test(client)
+    if result is None:
+        return "ポートフォリオは空です"
+    return render_portfolio_stress_test(result)
+
+
+def render_portfolio_stress_test(result: PortfolioStressResult, top_contributors: int = 5) -> str:
+    """ポートフォリオストレステストの結果モデルをRichマークアップ付きテキストに整形"""
+    lines = [
+        f"保有銘柄数: {len(result.positions)} | 評価額合計: {result.total_value:,.0f}\n",
+        f"{'シナリオ':20s} {'損益':>14s} {'損益率':>8s} {'影響度':>6s}",
+        "-" * 54,
+    ]
+    for s in result.scenarios:
+        impact_color = {"低": "green", "中": "yellow", "高": "red", "極高": "bold red"}.get(s.impact, "white")
+        lines.append(f"{s.name:20s} {s.pnl:>+14,.0f} {s.pnl_pct:>+7.1f}% [{impact_color}]{s.impact}[/{impact_color}]")
+
+    worst_index = next(i for i, s in enumerate(result.scenarios) if s.name == result.worst_scenario)
+    worst = result.scenarios[worst_index]
+    lines.append(f"\n最悪シナリオ: {worst.name} ({worst.pnl_pct:+.1f}%) → 損益 {worst.pnl:+,.0f}")
+
+    contributors = sorted(result.positions, key=lambda p: p.pnl_by_scenario[worst_index])[:top_contributors]
+    lines.append(f"損失寄与の大きい銘柄（上位{len(contributors)}）:")
+    for p in contributors:
+        lines.append(f"  {p.ticker:10s} {p.pnl_by_scenario[worst_index]:>+14,.0f} (評価額: {p.market_value:,.0f})")
+
+    fallback = [p.ticker for p in result.positions if p.price_is_fallback]
+    if fallback:
+        lines.append(f"\n[yellow]※ 現在値を取得できず平均取得単価で評価: {', '.join(fallback)}[/yellow]")
+    return "\n".join(lines)
+
+
+class StressRankingEntry(BaseModel):
+    """ストレス耐性ランキングの銘柄ごとの結果"""
+
+    ticker: str
+    name: str
+    sector: str
+    sector_sensitivity: float
+    changes_pct: list[float]  # 対象シナリオと同じ順序
+    worst_scenario: str
+    worst_change_pct: float
+    average_change_pct: float
+
+
+class StressRankingResult(BaseModel):
+    """市場全体のストレス耐性ランキングの結果モデル"""
+
+    market: str
+    scenarios: list[str]
+    entries: list[StressRankingEntry]
+
+
+def _select_scenarios(names: list[str] | None) -> list[dict[str, Any]]:
+    """シナリオ名からSCENARIOSの部分集合を選択（未指定なら全シナリオ）"""
+    if not names:
+        return SCENARIOS
+    by_name = {str(scenario["name"]): scenario for scenario in SCENARIOS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        msg = f"不明なシナリオ: {', '.join(unknown)}。利用可能: {list(by_name)}"
+        raise ValueError(msg)
+    return [by_name[name] for name in names]
+
+
+def rank_stress_resilience(
+    stocks: list[StockInfo],
+    scenarios: list[str] | None = None,
+) -> list[StressRankingEntry]:
+    """銘柄群に対象シナリオをまとめて適用し、ストレス耐性の高い順に並べる
+
+    銘柄×シナリオの変動率行列（セクター感応度×シナリオのショック率）を1回の行列演算で求める。
+    シナリオのショックはすべて下落のため、最悪・平均の変動率はどちらもセクター感応度だけで決まり、
+    順位はセクター単位になる（感応度の低いセクターから順に並べ、同じセクター内は時価総額の大きい順）。
+
+    Raises:
+        ValueError: 不明なシナリオ名が指定された場合
+    """
+    selected = _select_scenarios(scenarios)
+    if not stocks:
+        return []
+
+    sensitivities = np.array([_get_sector_sensitivity(info.sector) for info in stocks])
+    shocks = np.array([scenario["shock_pct"] for scenario in selected], dtype=float)
+    changes = np.outer(sensitivities, shocks)  # 銘柄×シナリオ
+    worst_index = changes.argmin(axis=1)
+    worst = changes.min(axis=1)
+    average = changes.mean(axis=1)
+    market_caps = np.array([info.market_cap for info in stocks], dtype=float)
+    order = np.lexsort((-market_caps, sensitivities))
+
+    return [
+        StressRankingEntry(
+            ticker=stocks[i].ticker,
+            name=stocks[i].name,
+            sector=stocks[i].sector,
+            sector_sensitivity=float(sensitivities[i]),
+            changes_pct=changes[i].tolist(),
+            worst_scenario=str(selected[worst_index[i]]["name"]),
+            worst_change_pct=float(worst[i]),
+            average_change_pct=float(average[i]),
+        )
+        for i in order
+    ]
+
+
+def build_stress_ranking(
+    market: str = "jpx",
+    scenarios: list[str] | None = None,
+    top_n: int = 20,
+    client: YFinanceClient | None = None,
+) -> StressRankingResult:
+    """市場の全銘柄をストレス耐性でランキング（銘柄情報はスクリーニングと同じ1回の並行取得で取得）
+
+    Raises:
+        ValueError: 不明な市場・シナリオ名が指定された場合
+    """
+    tickers = get_tickers(market)
+    selected = _select_scenarios(scenarios)
+    if client is None:
+        client = get_default_client()
+    entries = rank_stress_resilience(fetch_stocks(client, tickers), scenarios)
+    return StressRankingResult(
+        market=market,
+        scenarios=[str(scenario["name"]) for scenario in selected],
+        entries=entries[:top_n],
+    )
+
+
+def run_stress_ranking(
+    market: str = "jpx",
+    scenarios: list[str] | None = None,
+    top_n: int = 20,
+    client: YFinanceClient | None = None,
+) -> str:
+    """市場の全銘柄をストレス耐性でランキング"""
+    try:
+        result = build_stress_ranking(market, scenarios, top_n, client)
+    except ValueError as e:
+        return f"エラー: {e}"
+    return render_stress_ranking(result)
+
+
+def render_stress_ranking(result: StressRankingResult) -> str:
+    """ストレス耐性ランキングの結果モデルをRichマークアップ付きテキストに整形"""
+    lines = [
+        f"市場: {result.market} | シナリオ: {', '.join(result.scenarios)} | "
+        "並び順: セクター感応度の低い順（同じセクター内は時価総額の大きい順）\n",
+        f"{'順位':>4s} {'ティッカー':10s} {'セクター':24s} {'最悪':>8s} {'平均':>8s}  最悪シナリオ",
+        "-" * 80,
+    ]
+    for rank, e in enumerate(result.entries, start=1):
+        impact_color = {"低": "green", "中": "yellow", "高": "red", "極高": "bold red"}.get(
+            _classify_impact(e.worst_change_pct), "white"
+        )
+        lines.append(
+            f"{rank:>4d} {e.ticker:10s} {e.sector[:24]:24s} "
+            f"[{impact_color}]{e.worst_change_pct:>+7.1f}%[/{impact_color}] {e.average_change_pct:>+7.1f}%  "
+            f"{e.worst_scenario}"
+        )
+    if not result.entries:
+        lines.append("銘柄情報を取得できませんでした")
+    return "\n".join(lines)
@@ -0,0 +1,125 @@
+"""テクニカル指標: 過去株価から移動平均・ボラティリティ・RSI等を算出
+
+指標の計算はpandas/NumPyのベクトル演算で行い、結果はティッカー・期間ごとにメモ化する。
+メモは過去株価の最終日付とともに保持し、新しい日付のデータが届いたときだけ再計算する。
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from screening_test.data.client import YFinanceClient, get_default_client
+
+TRADING_DAYS_PER_YEAR = 252
+SMA_WINDOWS = (25, 75, 200)
+RSI_WINDOW = 14
+
+
+class TechnicalIndicators(BaseModel):
+    """テクニカル指標（データ不足で計算できない指標はNone）"""
+
+    as_of: str
+    last_close: float
+    sma_25: float | None = None
+    sma_75: float | None = None
+    sma_200: float | None = None
+    rsi_14: float | None = None
+    volatility_pct: float | None = None
+    max_drawdown_pct: float
+    distance_from_high_pct: float
+
+
+_memo: dict[tuple[str, str], tuple[str, TechnicalIndicators]] = {}
+_memo_lock = threading.Lock()
+
+
+def _sma(close: pd.Series, window: int) -> float | None:
+    """単純移動平均の最新値"""
+    if len(close) < window:
+        return None
+    return float(close.iloc[-window:].mean())
+
+
+def _rsi(close: pd.Series, window: int = RSI_WINDOW) -> float | None:
+    """RSI（Wilderの平滑化）の最新値"""
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean().iloc[-1]
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean().iloc[-1]
+    if pd.isna(avg_gain) or pd.isna(avg_loss):
+        return None
+    if avg_loss == 0:
+        return 100.0
+    return float(100 - 100 / (1 + avg_gain / avg_loss))
+
+
+def compute_technicals(history: pd.DataFrame) -> TechnicalIndicators | None:
+    """過去株価（get_historical_dataの出力）からテクニカル指標を計算"""
+    if history.empty or "Close" not in history.columns:
+        return None
+    close = history["Close"].astype(float).dropna()
+    if close.empty:
+        return None
+
+    prices = close.to_numpy()
+    log_returns = np.diff(np.log(prices))
+    volatility = float(log_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)) if len(log_returns) > 1 else None
+    drawdown = prices / np.maximum.accumulate(prices) - 1
+
+    # 52週高値は直近1年分の高値（High列がなければ終値）から求める
+    highs = history["High"].astype(float).dropna() if "High" in history.columns else close
+    high_52w = float(highs.iloc[-TRADING_DAYS_PER_YEAR:].max())
+
+    return TechnicalIndicators(
+        as_of=str(pd.Timestamp(close.index[-1]).date()),
+        last_close=float(prices[-1]),
+        sma_25=_sma(close, SMA_WINDOWS[0]),
+        sma_75=_sma(close, SMA_WINDOWS[1]),
+        sma_200=_sma(close, SMA_WINDOWS[2]),
+        rsi_14=_rsi(close),
+        volatility_pct=volatility * 100 if volatility is not None else None,
+        max_drawdown_pct=float(drawdown.min()) * 100,
+        distance_from_high_pct=(float(prices[-1]) / high_52w - 1) * 100,
+    )
+
+
+def _memoized(ticker: str, period: str, history: pd.DataFrame) -> TechnicalIndicators | None:
+    """最終日付が同じならメモ済みの指標を返し、新しいデータなら再計算してメモを更新"""
+    if history.empty:
+        return None
+    last_date = str(history.index[-1])
+    key = (ticker, period)
+    with _memo_lock:
+        cached = _memo.get(key)
+    if cached is not None and cached[0] == last_date:
+        return cached[1]
+
+    indicators = compute_technicals(history)
+    if indicators is not None:
+        with _memo_lock:
+            _memo[key] = (last_date, indicators)
+    return indicators
+
+
+def get_technicals(
+    ticker: str,
+    period: str = "1y",
+    client: YFinanceClient | None = None,
+) -> TechnicalIndicators | None:
+    """銘柄のテクニカル指標を取得（過去株価はクライアントのキャッシュを利用）"""
+    if client is None:
+        client = get_default_client()
+    return _memoized(ticker, period, client.get_historical_data(ticker, period))
+
+
+def get_technicals_batch(
+    tickers: list[str],
+    period: str = "1y",
+    client: YFinanceClient | None = None,
+) -> dict[str, TechnicalIndicators | None]:
+    """複数銘柄のテクニカル指標を取得（過去株価は1回の並行取得でまとめて取得）"""
+    if client is None:
+        client = get_default_client()
+    histories = client.get_historical_data_batch(tickers, period)
+    return {ticker: _memoized(ticker, period, history) for ticker, history in histories.items()}
@@ -1,16 +1,60 @@
-"""ウォッチリスト管理: 注目銘柄の追跡をCSVで永続化"""
+"""ウォッチリスト管理: 注目銘柄の追跡をSQLiteで永続化
+
+ウォッチリストは `watchlist.db` にティッカーを主キーとして保存し、追加・削除は該当行だけを更新する。
+銘柄ごとのアラート条件（core/alerts.py）も同じデータベースに保存し、銘柄の削除時にあわせて削除する。
+CSV・JSONからの一括取り込みは1トランザクションで行い、途中で失敗した場合は何も登録しない。
+以前のバージョンのCSV（watchlist.csv）はデータベースの初回作成時に取り込む。
+"""
 
 import csv
+import json
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from pydantic import BaseModel
 
+from screening_test.data.database import store_version, transaction
+from screening_test.data.files import atomic_write
+
+if TYPE_CHECKING:
+    from screening_test.data.client import YFinanceClient
+
 DATA_DIR = Path("output")
+DB_FILE = DATA_DIR / "watchlist.db"
+# 移行元のCSV（以前のバージョンの保存形式）
 WATCHLIST_FILE = DATA_DIR / "watchlist.csv"
 
 WATCHLIST_HEADERS = ["ticker", "reason", "added_at"]
 
+SCHEMA_VERSION = 2
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS watchlist (
+        ticker TEXT PRIMARY KEY,
+        reason TEXT NOT NULL,
+        added_at TEXT NOT NULL
+    )""",
+]
+# バージョン → そのバージョンに上げるためのステートメント
+MIGRATIONS = {
+    2: [
+        """CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            rule TEXT NOT NULL,
+            threshold REAL NOT NULL,
+            preset TEXT NOT NULL,
+            last_value REAL,
+            triggered_at TEXT,
+            created_at TEXT NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_alerts_ticker ON alerts (ticker)",
+    ],
+}
+
 
 class WatchlistEntry(BaseModel):
     """ウォッチリストエントリ"""
@@ -20,73 +64,178 @@ class WatchlistEntry(BaseModel):
     added_at: str
 
 
-def _ensure_file() -> None:
-    """CSVファイルが存在しない場合はヘッダー付きで作成"""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    if not WATCHLIST_FILE.exists():
-        with WATCHLIST_FILE.open("w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(WATCHLIST_HEADERS)
+class WatchlistMetrics(BaseModel):
+    """ウォッチリスト銘柄の現在の指標（取得できなかった値はNone）"""
 
+    ticker: str
+    reason: str
+    added_at: str
+    name: str | None = None
+    value_score: float | None = None
+    per: float | None = None
+    pbr: float | None = None
+    dividend_yield: float | None = None
+    current_price: float | None = None
+    change_pct: float | None = None  # 前日比（%）
 
-def _load_watchlist() -> list[WatchlistEntry]:
-    """ウォッチリストCSVを読み込み"""
-    _ensure_file()
-    entries: list[WatchlistEntry] = []
-    with WATCHLIST_FILE.open("r") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            entries.append(
-                WatchlistEntry(
-                    ticker=row["ticker"],
-                    reason=row["reason"],
-                    added_at=row["added_at"],
-                )
+
+class WatchlistView(BaseModel):
+    """指標付きウォッチリストの結果モデル"""
+
+    entries: list[WatchlistMetrics]
+
+
+def _migrate_csv(conn: sqlite3.Connection) -> None:
+    """以前のバージョンのCSVがあればデータベースに取り込む"""
+    if WATCHLIST_FILE.exists():
+        with WATCHLIST_FILE.open("r") as f:
+            conn.executemany(
+                "INSERT OR IGNORE INTO watchlist (ticker, reason, added_at) VALUES (?, ?, ?)",
+                [(row["ticker"], row["reason"], row["added_at"]) for row in csv.DictReader(f)],
             )
-    return entries
 
 
-def _save_watchlist(entries: list[WatchlistEntry]) -> None:
-    """ウォッチリストCSVを保存"""
-    _ensure_file()
-    with WATCHLIST_FILE.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=WATCHLIST_HEADERS)
-        writer.writeheader()
-        for entry in entries:
-            writer.writerow(entry.model_dump())
+def _initialize(conn: sqlite3.Connection) -> None:
+    """スキーマがなければ作成して以前のバージョンのCSVを取り込み、古ければ最新のバージョンに上げる"""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # ロック待ちの間に他のプロセスが更新済みのバージョンは飛ばす
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            _migrate_csv(conn)
+        for target in range(max(version, 1) + 1, SCHEMA_VERSION + 1):
+            for statement in MIGRATIONS[target]:
+                conn.execute(statement)
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
 
 
-def add_to_watchlist(ticker: str, reason: str = "") -> str:
-    """ウォッチリストに銘柄を追加"""
-    entries = _load_watchlist()
-    existing_tickers = {e.ticker for e in entries}
+@contextmanager
+def _transaction(write: bool = False) -> Iterator[sqlite3.Connection]:
+    """トランザクションを開始（write=Trueなら開始時に書き込みロックを取得、例外時はロールバック）"""
+    with transaction(DB_FILE, _initialize, write) as conn:
+        yield conn
+
+
+def get_store_version() -> tuple[int, int, int] | None:
+    """ウォッチリストのデータベースのバージョン（ファイルがなければNone、変われば内容が更新されている）"""
+    return store_version(DB_FILE)
+
+
+def _load_watchlist() -> list[WatchlistEntry]:
+    """ウォッチリストを登録順に読み込み"""
+    with _transaction() as conn:
+        rows = conn.execute("SELECT ticker, reason, added_at FROM watchlist ORDER BY rowid").fetchall()
+    return [WatchlistEntry(**dict(row)) for row in rows]
+
+
+def get_watchlist_tickers() -> list[str]:
+    """ウォッチリストのティッカー一覧を登録順に返す"""
+    with _transaction() as conn:
+        return [row["ticker"] for row in conn.execute("SELECT ticker FROM watchlist ORDER BY rowid")]
 
-    if ticker in existing_tickers:
-        return f"{ticker}はすでにウォッチリストに登録されています"
 
-    entries.append(
-        WatchlistEntry(
-            ticker=ticker,
-            reason=reason,
-            added_at=datetime.now().isoformat(),
+def add_to_watchlist(ticker: str, reason: str = "") -> str:
+    """ウォッチリストに銘柄を追加"""
+    with _transaction(write=True) as conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO watchlist (ticker, reason, added_at) VALUES (?, ?, ?)",
+            (ticker, reason, datetime.now().isoformat()),
         )
-    )
-    _save_watchlist(entries)
+    if cursor.rowcount == 0:
+        return f"{ticker}はすでにウォッチリストに登録されています"
     return f"ウォッチリストに追加: {ticker}"
 
 
 def remove_from_watchlist(ticker: str) -> str:
     """ウォッチリストから銘柄を削除"""
-    entries = _load_watchlist()
-    new_entries = [e for e in entries if e.ticker != ticker]
-
-    if len(new_entries) == len(entries):
+    with _transaction(write=True) as conn:
+        cursor = conn.execute("DELETE FROM watchlist WHERE ticker = ?", (ticker,))
+        conn.execute("DELETE FROM alerts WHERE ticker = ?", (ticker,))
+    if cursor.rowcount == 0:
         return f"{ticker}はウォッチリストに登録されていません"
-
-    _save_watchlist(new_entries)
     return f"ウォッチリストから削除: {ticker}"
 
 
+def _read_entries(path: Path) -> list[dict[str, Any]]:
+    """取り込むファイルを読み込み、ticker・reason・added_atのdictのリストにする
+
+    JSONはティッカーの文字列またはエントリのオブジェクトの配列、CSVはticker列を含むヘッダー付き
+    （列名の大文字・小文字は区別しない）、またはヘッダーなしで1列目をティッカーとして読む。
+    ExcelなどがCSVの先頭に付けるBOMは読み飛ばす。
+
+    Raises:
+        ValueError: 形式が不正な場合
+    """
+    if path.suffix.lower() == ".json":
+        data = json.loads(path.read_text(encoding="utf-8-sig"))
+        if not isinstance(data, list) or not all(isinstance(item, str | dict) for item in data):
+            msg = "JSONはティッカーまたはエントリの配列で指定してください"
+            raise ValueError(msg)
+        entries = [{"ticker": item} if isinstance(item, str) else item for item in data]
+        for entry in entries:
+            if not isinstance(entry.get("ticker"), str | int | None):
+                msg = f"tickerは文字列で指定してください: {entry.get('ticker')!r}"
+                raise ValueError(msg)
+            for field in ("reason", "added_at"):
+                if not isinstance(entry.get(field), str | None):
+                    msg = f"{field}は文字列で指定してください: {entry.get(field)!r}"
+                    raise ValueError(msg)
+        return entries
+
+    with path.open("r", newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.reader(f))
+    header = [cell.strip().lower() for cell in rows[0]] if rows else []
+    if "ticker" in header:
+        return [dict(zip(header, row, strict=False)) for row in rows[1:]]
+    return [{"ticker": row[0]} for row in rows if row]
+
+
+def import_watchlist(path: Path, reason: str = "") -> str:
+    """CSV・JSONファイルの銘柄をウォッチリストに一括追加（登録済みの銘柄はそのまま）
+
+    Raises:
+        ValueError: ファイルの形式が不正な場合
+    """
+    now = datetime.now().isoformat()
+    records = [
+        (
+            str(entry["ticker"]).strip(),
+            entry.get("reason") or reason,
+            entry.get("added_at") or now,
+        )
+        for entry in _read_entries(path)
+        if str(entry.get("ticker") or "").strip()
+    ]
+    with _transaction(write=True) as conn:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO watchlist (ticker, reason, added_at) VALUES (?, ?, ?)", records)
+        added = conn.total_changes - before
+    return f"ウォッチリストに{added}件を追加しました（登録済み・重複: {len(records) - added}件）"
+
+
+def export_watchlist(path: Path) -> str:
+    """ウォッチリストをCSV・JSONファイルに書き出し（拡張子 .json ならJSON、それ以外はCSV）"""
+    entries = _load_watchlist()
+    with atomic_write(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".json":
+            json.dump([entry.model_dump() for entry in entries], f, ensure_ascii=False, indent=2)
+        else:
+            writer = csv.DictWriter(f, fieldnames=WATCHLIST_HEADERS)
+            writer.writeheader()
+            for entry in entries:
+                writer.writerow(entry.model_dump())
+    return f"ウォッチリストの{len(entries)}件を書き出しました: {path}"
+
+
 def show_watchlist() -> str:
     """ウォッチリストの一覧を表示"""
     entries = _load_watchlist()
@@ -102,14 +251,87 @@ def show_watchlist() -> str:
     return "\n".join(lines)
 
 
+def build_watchlist_view(client: "YFinanceClient | None" = None, metrics: bool = True) -> WatchlistView:
+    """ウォッチリストの全銘柄の指標をまとめて取得（metrics=Falseなら取得せず登録内容のみ）
+
+    ファンダメンタルズは全銘柄を並行取得（共有クライアントのキャッシュ済みの銘柄は通信しない）し、
+    現在値と前日比は1回の一括ダウンロードで取得する。
+    """
+    from screening_test.core.scoring import calculate_value_score
+    from screening_test.data.client import get_default_client
+
+    entries = _load_watchlist()
+    if not entries or not metrics:
+        return WatchlistView(entries=[WatchlistMetrics(**entry.model_dump()) for entry in entries])
+
+    if client is None:
+        client = get_default_client()
+    tickers = [entry.ticker for entry in entries]
+    infos = client.get_stock_info_batch(tickers)
+    quotes = client.get_quotes_with_changes(tickers)
+
+    rows: list[WatchlistMetrics] = []
+    for entry in entries:
+        quote = quotes.get(entry.ticker)
+        row = WatchlistMetrics(**entry.model_dump(), change_pct=quote.change_pct if quote is not None else None)
+        info = infos.get(entry.ticker)
+        if info is not None:
+            row.name = info.name
+            row.value_score = calculate_value_score(info)
+            row.per = info.per
+            row.pbr = info.pbr
+            row.dividend_yield = info.dividend_yield
+        row.current_price = quote.price if quote is not None else (info.current_price if info is not None else None)
+        rows.append(row)
+    return WatchlistView(entries=rows)
+
+
+def _fmt(value: float | None, fmt_str: str, width: int) -> str:
+    """値を書式化（Noneは「-」）して右寄せ"""
+    text = format(value, fmt_str) if value is not None else "-"
+    return f"{text:>{width}s}"
+
+
+def render_watchlist_view(view: WatchlistView) -> str:
+    """指標付きウォッチリストの結果モデルをRichマークアップ付きテキストに整形"""
+    if not view.entries:
+        return "ウォッチリストは空です"
+
+    lines = ["[bold]ウォッチリスト（指標）[/bold]\n"]
+    lines.append(
+        f"{'ティッカー':12s} {'スコア':>6s} {'PER':>7s} {'PBR':>6s} {'利回り':>7s} {'株価':>12s} {'前日比':>8s} {'理由'}"
+    )
+    lines.append("-" * 90)
+    for row in view.entries:
+        change = _fmt(row.change_pct, "+.2f", 7) + ("%" if row.change_pct is not None else " ")
+        if row.change_pct is not None:
+            color = "green" if row.change_pct >= 0 else "red"
+            change = f"[{color}]{change}[/{color}]"
+        dividend_yield = _fmt(row.dividend_yield, ".2f", 6) + ("%" if row.dividend_yield is not None else " ")
+        lines.append(
+            f"{row.ticker:12s} {_fmt(row.value_score, '.1f', 6)} {_fmt(row.per, '.1f', 7)} {_fmt(row.pbr, '.2f', 6)} "
+            f"{dividend_yield} {_fmt(row.current_price, ',.2f', 12)} {change} {row.reason}"
+        )
+    missing = [row.ticker for row in view.entries if row.value_score is None]
+    if missing:
+        lines.append(f"\n[dim]※ ファンダメンタルズを取得できなかった銘柄: {', '.join(missing)}[/dim]")
+    return "\n".join(lines)
+
+
 def manage_watchlist(
     action: str,
     ticker: str | None = None,
     reason: str | None = None,
+    file: Path | None = None,
+    rule: str | None = None,
+    threshold: float | None = None,
+    preset: str | None = None,
+    alert_id: int | None = None,
+    metrics: bool = False,
 ) -> str:
-    """ウォッチリスト操作のディスパッチ"""
+    """ウォッチリスト操作のディスパッチ（alert-add, alert-remove, alerts, check はcore/alertsに委譲）"""
     if action == "show":
-        return show_watchlist()
+        return render_watchlist_view(build_watchlist_view()) if metrics else show_watchlist()
     if action == "add":
         if ticker is None:
             return "エラー: add操作にはtickerが必要です"
@@ -118,4 +340,30 @@ def manage_watchlist(
         if ticker is None:
             return "エラー: remove操作にはtickerが必要です"
         return remove_from_watchlist(ticker)
-    return f"エラー: 不明なアクション '{action}'。利用可能: show, add, remove"
+    if action in ("import", "export"):
+        if file is None:
+            return f"エラー: {action}操作にはfileが必要です"
+        try:
+            if action == "export":
+                return export_watchlist(file)
+            return import_watchlist(file, reason or "")
+        except (OSError, ValueError) as e:
+            return f"エラー: {e}"
+    if action in ("alert-add", "alert-remove", "alerts", "check"):
+        from screening_test.core import alerts
+
+        if action == "alerts":
+            return alerts.show_alerts()
+        if action == "check":
+            return alerts.render_alert_check(alerts.check_alerts())
+        if action == "alert-remove":
+            if alert_id is None:
+                return "エラー: alert-remove操作にはalert_idが必要です"
+            return alerts.remove_alert(alert_id)
+        if ticker is None or rule is None or threshold is None:
+            return "エラー: alert-add操作にはticker, rule, thresholdが必要です"
+        return alerts.add_alert(ticker, rule, threshold, preset or alerts.DEFAULT_PRESET)
+    return (
+        f"エラー: 不明なアクション '{action}'。"
+        "利用可能: show, add, remove, import, export, alert-add, alert-remove, alerts, check"
+    )
@@ -0,0 +1,228 @@
+"""常駐モード: CLIのコマンドを起動済みのプロセスで実行し、キャッシュと読み込み済みのモジュールを使い回す
+
+`screening-test serve` は Unix ドメインソケット（output/daemon.sock）で待ち受け、受け取ったコマンドを
+同じプロセスのTyperアプリで実行して標準出力・標準エラー・終了コードを返す。
+CLIはソケットがあればコマンドをそのまま転送し、なければ（またはSCREENING_TEST_NO_DAEMONが設定されていれば）
+従来通り自身のプロセスで実行する。転送側は標準ライブラリしか読み込まないため、起動は数十ミリ秒で済む。
+
+ポートフォリオ・ウォッチリストはコマンドごとにSQLiteから読むため、別のプロセスでの変更もそのまま反映される。
+相対パスの引数（--file, --output 等）を同じ意味で扱うため、作業ディレクトリが一致する場合のみ転送する。
+
+常駐プロセスはコマンドを1件ずつ実行し、実行中に来たコマンドには「実行中」と応答するため、CLIは待たずに自身で実行する。
+コマンドを送った後に応答が途切れた場合は、既に実行された可能性がある（購入・売却が二重になりうる）ため
+自身では実行し直さず、エラーとして終了する。
+"""
+
+import importlib
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout, suppress
+from io import StringIO
+from pathlib import Path
+from typing import Any
+
+SOCKET_FILE = Path("output") / "daemon.sock"
+NO_DAEMON_ENV = "SCREENING_TEST_NO_DAEMON"
+# 転送せずに常に自身のプロセスで実行するコマンド
+LOCAL_COMMANDS = {"serve"}
+# 起動時に読み込んでおくモジュール（初回のコマンドが読み込みを待たないため）
+PRELOAD_MODULES = ["screening_test.main", "pandas", "yfinance"]
+# 接続の待ち時間の上限（これを超えたら常駐プロセスなしで実行する）
+CONNECT_TIMEOUT_SECONDS = 1.0
+
+
+def _send(sock: socket.socket, payload: dict[str, Any]) -> None:
+    """1行のJSONとして送信"""
+    sock.sendall(json.dumps(payload, ensure_ascii=False).encode() + b"\n")
+
+
+def _receive(sock: socket.socket) -> dict[str, Any]:
+    """1行のJSONを受信
+
+    Raises:
+        ValueError: 1行を受信する前に接続が閉じられた、またはJSONとして読めない場合
+    """
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            msg = "応答の途中で接続が閉じられました"
+            raise ValueError(msg)
+        data += chunk
+    result = json.loads(data)
+    if not isinstance(result, dict):
+        msg = "応答の形式が不正です"
+        raise ValueError(msg)
+    return result
+
+
+def is_running(socket_path: Path = SOCKET_FILE) -> bool:
+    """ソケットに接続できる（常駐プロセスが起動している）か"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(socket_path))
+    except OSError:
+        return False
+    return True
+
+
+def forward(argv: list[str], socket_path: Path = SOCKET_FILE) -> int | None:
+    """常駐プロセスでコマンドを実行して出力を書き出し、終了コードを返す
+
+    常駐プロセスに接続できない、または実行を断られた（作業ディレクトリが異なる、別のコマンドを実行中）場合は
+    None（呼び出し側で実行する）。送信後に応答を受け取れなかった場合はエラーを表示して1を返す。
+    """
+    if not socket_path.exists():
+        return None
+    request = {
+        "argv": argv,
+        "cwd": str(Path.cwd()),
+        "terminal": sys.stdout.isatty(),
+        "width": shutil.get_terminal_size().columns,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return None
+        # コマンドの実行時間には上限を設けない
+        sock.settimeout(None)
+        try:
+            _send(sock, request)
+            response = _receive(sock)
+            if response.get("forwarded") is False:
+                return None
+            stdout, stderr, exit_code = response["stdout"], response["stderr"], int(response["exit_code"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            sys.stderr.write(
+                f"エラー: 常駐プロセスからの応答を受け取れませんでした（{e}）。"
+                "コマンドは実行された可能性があるため、結果を確認してください\n"
+            )
+            return 1
+    sys.stdout.write(stdout)
+    sys.stdout.flush()
+    sys.stderr.write(stderr)
+    sys.stderr.flush()
+    return exit_code
+
+
+def run_command(argv: list[str], terminal: bool = False, width: int = 80) -> tuple[int, str, str]:
+    """このプロセスのTyperアプリでコマンドを実行し、(終了コード, 標準出力, 標準エラー) を返す
+
+    出力先を差し替えるため、同時に1件ずつ呼び出すこと。
+    """
+    from rich.console import Console
+
+    from screening_test import main
+
+    stdout, stderr = StringIO(), StringIO()
+    console = main.console
+    # 呼び出し元の端末に合わせて装飾・幅を決める
+    main.console = Console(file=stdout, force_terminal=terminal, width=width)
+    exit_code = 0
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            main.app(argv, prog_name="screening-test")
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except Exception:
+        stderr.write(traceback.format_exc())
+        exit_code = 1
+    finally:
+        main.console = console
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """1接続につき1コマンドを実行して結果を返す（実行中なら断る）"""
+
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line.endswith(b"\n"):
+            return  # 起動確認（is_running）の接続、または途中で切れた要求
+        request = json.loads(line)
+        if Path(request["cwd"]).resolve() != Path.cwd().resolve():
+            response: dict[str, Any] = {"forwarded": False, "reason": "cwd"}
+        elif not self.server.busy.acquire(blocking=False):
+            response = {"forwarded": False, "reason": "busy"}
+        else:
+            try:
+                exit_code, stdout, stderr = run_command(request["argv"], request["terminal"], request["width"])
+            finally:
+                self.server.busy.release()
+            response = {"forwarded": True, "exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """コマンドを1件ずつ実行するUnixドメインソケットのサーバー（実行中の接続には断りを返す）"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path = SOCKET_FILE) -> None:
+        """ソケットを作成して待ち受ける
+
+        Raises:
+            ValueError: 既に常駐プロセスが起動している場合
+        """
+        if is_running(socket_path):
+            msg = f"既に起動しています: {socket_path}"
+            raise ValueError(msg)
+        # 前回異常終了した際のソケットを削除
+        socket_path.unlink(missing_ok=True)
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path = socket_path
+        self.busy = threading.Lock()
+        # 作成した時点から所有者以外は接続できないようにする（作成後のchmodでは間に接続される余地がある）
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _Handler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+
+def serve(socket_path: Path = SOCKET_FILE) -> None:
+    """常駐プロセスとして待ち受ける（停止されるまで戻らない）
+
+    Raises:
+        ValueError: 既に常駐プロセスが起動している場合
+    """
+    from screening_test.data.client import get_default_client
+
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    get_default_client()
+
+    def stop(*_: object) -> None:
+        raise KeyboardInterrupt
+
+    # SIGTERMでもソケットを削除して終了する
+    signal.signal(signal.SIGTERM, stop)
+    with DaemonServer(socket_path) as server, suppress(KeyboardInterrupt):
+        server.serve_forever()
+
+
+def entrypoint() -> None:
+    """CLIのエントリポイント: 常駐プロセスがあれば転送し、なければ自身で実行する"""
+    argv = sys.argv[1:]
+    if not os.environ.get(NO_DAEMON_ENV) and not LOCAL_COMMANDS.intersection(argv[:1]):
+        exit_code = forward(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+    from screening_test.main import app
+
+    app(prog_name="screening-test")
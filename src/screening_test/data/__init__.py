@@ -1,5 +1,18 @@
 """Data層: yfinance APIラッパーとデータ取得"""
 
-from screening_test.data.client import YFinanceClient
+from typing import TYPE_CHECKING, Any
 
-__all__ = ["YFinanceClient"]
+if TYPE_CHECKING:
+    from screening_test.data.client import YFinanceClient, get_default_client
+
+__all__ = ["YFinanceClient", "get_default_client"]
+
+
+def __getattr__(name: str) -> Any:
+    """clientの再エクスポートは参照時に読み込む（サブモジュールの読み込みでyfinanceを読まないため）"""
+    if name in __all__:
+        from screening_test.data import client
+
+        return getattr(client, name)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
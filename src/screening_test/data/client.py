@@ -1,13 +1,23 @@
-"""yfinance APIラッパー: キャッシュ、レートリミット、異常値除外を提供"""
+"""yfinance APIラッパー: キャッシュ、レートリミット、異常値除外を提供
 
-import time
+yfinance・pandasは読み込みに時間がかかるため、実際に通信・DataFrameを扱うメソッドの中で読み込む
+（StockInfoの参照やキャッシュからの取得だけならCLIの起動時に読み込まない）。
+"""
+
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
-import yfinance as yf
 from pydantic import BaseModel
 
+from screening_test.data.scheduler import Priority, RequestScheduler
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class StockInfo(BaseModel):
     """銘柄情報のデータモデル"""
@@ -26,6 +36,13 @@ class StockInfo(BaseModel):
     fifty_two_week_low: float | None = None
 
 
+class Quote(BaseModel):
+    """現在値と前日比"""
+
+    price: float
+    change_pct: float | None = None  # 前日終値がなければNone
+
+
 class CacheEntry(BaseModel):
     """キャッシュエントリ"""
 
@@ -36,13 +53,17 @@ class CacheEntry(BaseModel):
 class YFinanceClient:
     """yfinance APIクライアント（キャッシュ・レートリミット付き）
 
-    - 24時間TTLのキャッシュ
-    - API呼び出し間に1秒のレートリミット
+    - 24時間TTLのキャッシュ（現在値のみの取得は短いTTLで別に保持）
+    - API呼び出し間に1秒のレートリミット（優先度クラスごとに割り当て、data/scheduler.py）
     - 異常値のサニタイズ（配当利回り>15%、PBR<0.1等を除外）
+    - 複数銘柄の並行取得（レートリミットは全スレッドで共有、優先度は呼び出し元のスレッドのものを引き継ぐ）
     """
 
     CACHE_TTL_HOURS = 24
+    QUOTE_CACHE_TTL_SECONDS = 60
+    QUOTE_BATCH_SIZE = 100
     RATE_LIMIT_SECONDS = 1.0
+    MAX_WORKERS = 4
 
     # 異常値フィルタ閾値
     MAX_DIVIDEND_YIELD = 15.0
@@ -52,14 +73,39 @@ class YFinanceClient:
 
     def __init__(self) -> None:
         self._cache: dict[str, CacheEntry] = {}
-        self._last_call_time: float = 0.0
+        self.scheduler = RequestScheduler(self.RATE_LIMIT_SECONDS)
+        self._local = threading.local()
+
+    @contextmanager
+    def priority(self, priority: Priority, cancel: threading.Event | None = None) -> Iterator[None]:
+        """このスレッドからのAPI呼び出しの優先度クラスを指定（既定はINTERACTIVE）
+
+        cancel が設定されると、枠を待っている呼び出しは RequestCancelledError で中断する。
+        """
+        previous = self._current_priority(), self._current_cancel()
+        self._local.priority, self._local.cancel = priority, cancel
+        try:
+            yield
+        finally:
+            self._local.priority, self._local.cancel = previous
+
+    def _current_priority(self) -> Priority:
+        """このスレッドの優先度クラス"""
+        priority: Priority = getattr(self._local, "priority", Priority.INTERACTIVE)
+        return priority
+
+    def _current_cancel(self) -> threading.Event | None:
+        """このスレッドの呼び出しを取り消すイベント"""
+        cancel: threading.Event | None = getattr(self._local, "cancel", None)
+        return cancel
 
     def _rate_limit(self) -> None:
-        """API呼び出しのレートリミット（1秒間隔）"""
-        elapsed = time.monotonic() - self._last_call_time
-        if elapsed < self.RATE_LIMIT_SECONDS:
-            time.sleep(self.RATE_LIMIT_SECONDS - elapsed)
-        self._last_call_time = time.monotonic()
+        """API呼び出しのレートリミット（RATE_LIMIT_SECONDS間隔、スレッドセーフ）
+
+        スケジューラが優先度の高い呼び出しから順に枠を割り当てるため、一括処理や先読みの途中でも
+        対話的な呼び出しの待ち時間は実行中の1枠分までになる。
+        """
+        self.scheduler.acquire(self._current_priority(), self._current_cancel())
 
     def _get_cached(self, key: str) -> dict[str, Any] | None:
         """キャッシュからデータを取得（TTL切れならNone）"""
@@ -67,15 +113,20 @@ class YFinanceClient:
         if entry is None:
             return None
         if datetime.now() > entry.expires_at:
-            del self._cache[key]
+            self._cache.pop(key, None)
             return None
         return entry.data
 
-    def _set_cache(self, key: str, data: dict[str, Any]) -> None:
-        """キャッシュにデータを保存"""
+    def cache_expires_at(self, key: str) -> datetime | None:
+        """キャッシュの有効期限（キャッシュがなければNone、キーは銘柄情報ならティッカー）"""
+        entry = self._cache.get(key)
+        return entry.expires_at if entry is not None else None
+
+    def _set_cache(self, key: str, data: dict[str, Any], ttl: timedelta | None = None) -> None:
+        """キャッシュにデータを保存（TTL未指定ならCACHE_TTL_HOURS）"""
         self._cache[key] = CacheEntry(
             data=data,
-            expires_at=datetime.now() + timedelta(hours=self.CACHE_TTL_HOURS),
+            expires_at=datetime.now() + (ttl or timedelta(hours=self.CACHE_TTL_HOURS)),
         )
 
     def _sanitize_value(self, value: Any, min_val: float | None = None, max_val: float | None = None) -> float | None:
@@ -89,13 +140,14 @@ class YFinanceClient:
             return None
         return val
 
-    def get_stock_info(self, ticker: str) -> StockInfo | None:
-        """銘柄情報を取得（キャッシュ・レートリミット・サニタイズ付き）"""
-        cached = self._get_cached(ticker)
+    def get_stock_info(self, ticker: str, refresh: bool = False) -> StockInfo | None:
+        """銘柄情報を取得（キャッシュ・レートリミット・サニタイズ付き、refresh=Trueならキャッシュを使わず取り直す）"""
+        cached = None if refresh else self._get_cached(ticker)
         if cached is not None:
             return StockInfo(**cached)
 
         self._rate_limit()
+        import yfinance as yf
 
         try:
             stock = yf.Ticker(ticker)
@@ -134,14 +186,17 @@ class YFinanceClient:
         self._set_cache(ticker, stock_info_dict)
         return StockInfo(**stock_info_dict)
 
-    def get_historical_data(self, ticker: str, period: str = "1y") -> pd.DataFrame:
+    def get_historical_data(self, ticker: str, period: str = "1y") -> "pd.DataFrame":
         """過去の株価データを取得"""
+        import pandas as pd
+
         cache_key = f"{ticker}_hist_{period}"
         cached = self._get_cached(cache_key)
         if cached is not None:
             return pd.DataFrame(cached)
 
         self._rate_limit()
+        import yfinance as yf
 
         try:
             stock = yf.Ticker(ticker)
@@ -150,3 +205,113 @@ class YFinanceClient:
             return df
         except Exception:
             return pd.DataFrame()
+
+    def get_quotes(self, tickers: list[str]) -> dict[str, float | None]:
+        """複数銘柄の現在値のみをまとめて取得（ファンダメンタルズは取得しない）
+
+        キャッシュにない銘柄はQUOTE_BATCH_SIZE件ずつ1回の一括ダウンロードで取得するため、
+        レートリミットの待ちは銘柄数ではなく一括取得の回数分だけになる。
+        現在値はQUOTE_CACHE_TTL_SECONDSの短いTTLでキャッシュする。
+        """
+        return {ticker: quote["price"] if quote else None for ticker, quote in self._fetch_quotes(tickers).items()}
+
+    def get_quotes_with_changes(self, tickers: list[str]) -> dict[str, Quote | None]:
+        """複数銘柄の現在値と前日比（%）をまとめて取得（get_quotesと同じ一括ダウンロード・キャッシュを使う）"""
+        quotes: dict[str, Quote | None] = {}
+        for ticker, quote in self._fetch_quotes(tickers).items():
+            if quote is None:
+                quotes[ticker] = None
+                continue
+            previous = quote.get("previous")
+            change_pct = (quote["price"] / previous - 1) * 100 if previous else None
+            quotes[ticker] = Quote(price=quote["price"], change_pct=change_pct)
+        return quotes
+
+    def _fetch_quotes(self, tickers: list[str]) -> dict[str, dict[str, Any] | None]:
+        """複数銘柄の現在値と前日終値（{"price", "previous"}、取得できなければNone）"""
+        import pandas as pd
+
+        unique = list(dict.fromkeys(tickers))
+        quotes: dict[str, dict[str, Any] | None] = {}
+        missing: list[str] = []
+        for ticker in unique:
+            cached = self._get_cached(f"{ticker}_quote")
+            if cached is not None:
+                quotes[ticker] = cached
+            else:
+                missing.append(ticker)
+
+        ttl = timedelta(seconds=self.QUOTE_CACHE_TTL_SECONDS)
+        for start in range(0, len(missing), self.QUOTE_BATCH_SIZE):
+            chunk = missing[start : start + self.QUOTE_BATCH_SIZE]
+            closes = self._download_closes(chunk)
+            for ticker in chunk:
+                series = closes[ticker].dropna() if ticker in closes.columns else pd.Series(dtype=float)
+                price = self._sanitize_value(series.iloc[-1], min_val=0.0) if not series.empty else None
+                if price is None:
+                    quotes[ticker] = None
+                    continue
+                previous = self._sanitize_value(series.iloc[-2], min_val=0.0) if len(series) > 1 else None
+                quote = {"price": price, "previous": previous}
+                self._set_cache(f"{ticker}_quote", quote, ttl)
+                quotes[ticker] = quote
+        return {ticker: quotes[ticker] for ticker in unique}
+
+    def _download_closes(self, tickers: list[str]) -> "pd.DataFrame":
+        """直近数日分の終値を一括ダウンロード（日付×銘柄、失敗時は空のDataFrame）"""
+        self._rate_limit()
+        import pandas as pd
+        import yfinance as yf
+
+        try:
+            data = yf.download(tickers, period="5d", progress=False, auto_adjust=False, threads=True)
+        except Exception:
+            return pd.DataFrame()
+        if data is None or data.empty or "Close" not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(tickers[0])
+        return pd.DataFrame(closes, dtype=float)
+
+    def get_stock_info_batch(self, tickers: list[str]) -> dict[str, StockInfo | None]:
+        """複数銘柄の情報を並行取得（キャッシュ済みの銘柄は通信しない）"""
+        unique = list(dict.fromkeys(tickers))
+        priority, cancel = self._current_priority(), self._current_cancel()
+
+        def fetch(ticker: str) -> StockInfo | None:
+            with self.priority(priority, cancel):
+                return self.get_stock_info(ticker)
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            infos = list(executor.map(fetch, unique))
+        return dict(zip(unique, infos, strict=True))
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> "dict[str, pd.DataFrame]":
+        """複数銘柄の過去株価データを並行取得"""
+        unique = list(dict.fromkeys(tickers))
+        priority, cancel = self._current_priority(), self._current_cancel()
+
+        def fetch(ticker: str) -> "pd.DataFrame":
+            with self.priority(priority, cancel):
+                return self.get_historical_data(ticker, period)
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            frames = list(executor.map(fetch, unique))
+        return dict(zip(unique, frames, strict=True))
+
+
+_default_client: YFinanceClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> YFinanceClient:
+    """プロセス内で共有するクライアントを返す
+
+    MCPサーバーのような常駐プロセスでは、ツール呼び出しをまたいでキャッシュとレートリミットを共有する。
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = YFinanceClient()
+        return _default_client
@@ -0,0 +1,55 @@
+"""SQLiteデータベースの補助: トランザクションと変更の検出
+
+CLIとMCPサーバーが同じデータベースを同時に更新しても更新が失われないよう、
+書き込みはトランザクションの開始時に書き込みロックを取得する（BEGIN IMMEDIATE）。
+"""
+
+import sqlite3
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# SQLiteのデータベースヘッダ内の変更カウンタの位置（4バイト、ビッグエンディアン）
+_CHANGE_COUNTER_OFFSET = 24
+
+
+@contextmanager
+def transaction(
+    path: Path,
+    initialize: Callable[[sqlite3.Connection], None],
+    write: bool = False,
+) -> Iterator[sqlite3.Connection]:
+    """トランザクションを開始（write=Trueなら開始時に書き込みロックを取得、例外時はロールバック）
+
+    initializeは接続ごとにトランザクションの外で呼ばれ、スキーマの作成・更新を行う。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        initialize(conn)
+        conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def store_version(path: Path) -> tuple[int, int, int] | None:
+    """データベースファイルの (変更カウンタ, 更新時刻, サイズ)。ファイルがなければNone
+
+    変更カウンタはSQLiteがコミットごとに更新するヘッダの値で、いずれかの値が変われば
+    このプロセスまたは別のプロセスから書き込みがあったことを示す。
+    """
+    try:
+        with path.open("rb") as f:
+            header = f.read(_CHANGE_COUNTER_OFFSET + 4)
+            stat = path.stat()
+    except FileNotFoundError:
+        return None
+    counter = int.from_bytes(header[_CHANGE_COUNTER_OFFSET:], "big")
+    return counter, stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,31 @@
+"""ファイル書き込みの補助: アトミックな書き込み
+
+スナップショットやエクスポートしたファイルを、書き込み途中の状態で読まれたり壊したりしないよう、
+一時ファイルに書き込んでから置き換える。
+"""
+
+import os
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+
+@contextmanager
+def atomic_write(path: Path, newline: str | None = None, encoding: str | None = None) -> Iterator[TextIO]:
+    """同じディレクトリの一時ファイルに書き込み、完了後にpathへ置き換える
+
+    書き込み途中で失敗しても元のファイルは変更されず、読み込み側が途中までのファイルを見ることもない。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline=newline, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        Path(tmp_name).replace(path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,62 @@
+"""過去株価データの整形: 複数銘柄の終値を日付×銘柄の行列にそろえる"""
+
+import numpy as np
+import pandas as pd
+
+from screening_test.data.client import YFinanceClient
+
+
+def normalize_daily_index(index: pd.Index) -> pd.DatetimeIndex:
+    """タイムゾーン付きの日時インデックスを、取引所ローカルの日付（tzなし）に正規化"""
+    dt_index = pd.DatetimeIndex(index)
+    if dt_index.tz is not None:
+        dt_index = dt_index.tz_localize(None)
+    return dt_index.normalize()
+
+
+def get_close_matrix(
+    client: YFinanceClient,
+    tickers: list[str],
+    period: str = "1y",
+) -> pd.DataFrame:
+    """複数銘柄の終値を日付×銘柄のDataFrameで返す（1回の並行取得でまとめて取得）"""
+    return to_close_matrix(client.get_historical_data_batch(tickers, period))
+
+
+def to_close_matrix(histories: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """銘柄ごとの過去株価を日付×銘柄の終値DataFrameにそろえる
+
+    取引所ごとの休日の違いは前方補完でそろえる。上場前など値が存在しない期間はNaNのまま残す。
+    データを取得できなかった銘柄は列に含めない。
+    """
+    closes: dict[str, pd.Series] = {}
+    for ticker, df in histories.items():
+        if df.empty or "Close" not in df.columns:
+            continue
+        series = df["Close"].astype(float)
+        series.index = normalize_daily_index(series.index)
+        closes[ticker] = series[~series.index.duplicated(keep="last")]
+
+    if not closes:
+        return pd.DataFrame()
+    return pd.DataFrame(closes).sort_index().ffill()
+
+
+def get_log_return_matrix(
+    client: YFinanceClient,
+    tickers: list[str],
+    period: str = "1y",
+) -> pd.DataFrame:
+    """複数銘柄の日次対数リターンを日付×銘柄のDataFrameで返す
+
+    全銘柄の値がそろっている日付だけを残すため、各行は同じ日の銘柄間の同時リターンになる。
+    """
+    return to_log_returns(get_close_matrix(client, tickers, period))
+
+
+def to_log_returns(closes: pd.DataFrame) -> pd.DataFrame:
+    """終値行列を日次対数リターンに変換（欠損を含む日付は除外）"""
+    if closes.empty:
+        return closes
+    log_closes = pd.DataFrame(np.log(closes.to_numpy()), index=closes.index, columns=closes.columns)
+    return log_closes.diff().iloc[1:].dropna(how="any")
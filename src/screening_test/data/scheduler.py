@@ -0,0 +1,115 @@
+"""API呼び出しのスケジューラ: 優先度クラスごとの順序・上限でレートリミットの枠を割り当てる
+
+yfinanceへの呼び出しは全スレッドで共有する最小間隔（interval）ごとに1件ずつ枠を割り当てる。
+待っている呼び出しのうち、枠を使える時刻が最も早いもの（同時刻なら優先度の高いもの、同じ優先度なら到着順）に
+割り当てるため、市場全体のスクリーニングや先読みの途中に来た対話的な呼び出しは、待っている低い優先度の
+呼び出しを追い越して次の枠で実行される（待ち時間は実行中の1枠分まで）。
+
+- budgets: クラスごとの window 秒あたりの呼び出し上限（Noneなら上限なし）
+- idle_seconds: より高い優先度の呼び出しからこの秒数が経つまで枠を使わない（空き枠だけを使うクラス向け）
+
+上限に達したクラスの呼び出しは window 秒近く待つことがあるため、停止する側は cancel のイベントで待ちを打ち切る。
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """呼び出しの優先度クラス（値が小さいほど優先）"""
+
+    INTERACTIVE = 0  # ユーザーが結果を待っている呼び出し
+    BATCH = 1  # 市場全体のスクリーニング・ランキング等の一括処理
+    BACKGROUND = 2  # 先読み等、結果を誰も待っていない呼び出し
+
+
+DEFAULT_BUDGETS: dict[Priority, int | None] = {
+    Priority.INTERACTIVE: None,
+    Priority.BATCH: None,
+    Priority.BACKGROUND: 30,
+}
+DEFAULT_IDLE_SECONDS: dict[Priority, float] = {Priority.BACKGROUND: 2.0}
+BUDGET_WINDOW_SECONDS = 60.0
+# cancel を指定した呼び出しが取り消しを確認する間隔
+CANCEL_POLL_SECONDS = 0.1
+
+
+class RequestCancelledError(Exception):
+    """枠の割り当てを待っている間に取り消された"""
+
+
+class RequestScheduler:
+    """優先度付きのレートリミット（スレッドセーフ）"""
+
+    def __init__(
+        self,
+        interval: float,
+        budgets: Mapping[Priority, int | None] | None = None,
+        idle_seconds: Mapping[Priority, float] | None = None,
+        window: float = BUDGET_WINDOW_SECONDS,
+    ) -> None:
+        self.interval = interval
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.idle_seconds = dict(DEFAULT_IDLE_SECONDS if idle_seconds is None else idle_seconds)
+        self.window = window
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting: list[tuple[Priority, int]] = []
+        self._next_slot = 0.0
+        self._last_granted: dict[Priority, float] = {}
+        # クラス → window内に割り当てた時刻
+        self._granted: dict[Priority, deque[float]] = {p: deque() for p in Priority}
+
+    def _ready_at(self, priority: Priority, now: float) -> float:
+        """そのクラスの呼び出しが枠を使える最も早い時刻"""
+        ready = self._next_slot
+        granted = self._granted[priority]
+        while granted and granted[0] <= now - self.window:
+            granted.popleft()
+        budget = self.budgets.get(priority)
+        if budget is not None and len(granted) >= budget:
+            ready = max(ready, granted[len(granted) - budget] + self.window)
+        idle = self.idle_seconds.get(priority)
+        if idle is not None:
+            higher = [t for p, t in self._last_granted.items() if p < priority]
+            if higher:
+                ready = max(ready, max(higher) + idle)
+        return ready
+
+    def acquire(self, priority: Priority = Priority.INTERACTIVE, cancel: threading.Event | None = None) -> None:
+        """枠が割り当てられるまで待つ
+
+        Raises:
+            RequestCancelledError: 割り当て前に cancel が設定された場合
+        """
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            self._waiting.append(ticket)
+            # 待っている呼び出しに割り当て順を計算し直させる
+            self._cond.notify_all()
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        # 後ろで待っている呼び出しに割り当て順を計算し直させる
+                        self._cond.notify_all()
+                        msg = "枠の割り当てを待っている間に取り消されました"
+                        raise RequestCancelledError(msg)
+                    now = time.monotonic()
+                    ready, chosen = min((self._ready_at(t[0], now), t) for t in self._waiting)
+                    if chosen == ticket and ready <= now:
+                        break
+                    timeout = max(ready - now, 0.001)
+                    if cancel is not None:
+                        timeout = min(timeout, CANCEL_POLL_SECONDS)
+                    self._cond.wait(timeout)
+            finally:
+                self._waiting.remove(ticket)
+            now = time.monotonic()
+            self._next_slot = now + self.interval
+            self._last_granted[priority] = now
+            self._granted[priority].append(now)
+            self._cond.notify_all()
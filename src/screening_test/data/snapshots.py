@@ -0,0 +1,66 @@
+"""ファンダメンタルズのスナップショット: 時点ごとの銘柄情報をJSONで永続化
+
+バックテストでルックアヘッドバイアスを避けるため、スクリーニング実行時点の
+銘柄情報を市場・日付ごとに保存しておく。
+"""
+
+import json
+from datetime import date
+from pathlib import Path
+
+from screening_test.data.client import StockInfo
+from screening_test.data.files import atomic_write
+
+SNAPSHOT_DIR = Path("output") / "snapshots"
+
+
+def save_snapshot(market: str, stocks: list[StockInfo], as_of: date | None = None) -> Path:
+    """銘柄情報のスナップショットを保存（同じ日付のものは上書き）"""
+    as_of = as_of or date.today()
+    market_dir = SNAPSHOT_DIR / market
+    market_dir.mkdir(parents=True, exist_ok=True)
+    path = market_dir / f"{as_of.isoformat()}.json"
+    payload = [stock.model_dump() for stock in stocks]
+    with atomic_write(path, encoding="utf-8") as f:
+        f.write(json.dumps(payload, ensure_ascii=False))
+    return path
+
+
+def latest_snapshot_path(market: str) -> Path | None:
+    """市場の最新のスナップショットのパス（なければNone）"""
+    market_dir = SNAPSHOT_DIR / market
+    if not market_dir.exists():
+        return None
+    dated: list[tuple[date, Path]] = []
+    for path in market_dir.glob("*.json"):
+        try:
+            dated.append((date.fromisoformat(path.stem), path))
+        except ValueError:
+            continue
+    return max(dated)[1] if dated else None
+
+
+def load_latest_snapshot(market: str) -> tuple[date, list[StockInfo]] | None:
+    """市場の最新のスナップショットだけを読み込み（過去分は読まない）"""
+    path = latest_snapshot_path(market)
+    if path is None:
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return date.fromisoformat(path.stem), [StockInfo(**item) for item in payload]
+
+
+def load_snapshots(market: str) -> dict[date, list[StockInfo]]:
+    """市場のスナップショットを日付順に読み込み"""
+    market_dir = SNAPSHOT_DIR / market
+    if not market_dir.exists():
+        return {}
+
+    snapshots: dict[date, list[StockInfo]] = {}
+    for path in sorted(market_dir.glob("*.json")):
+        try:
+            as_of = date.fromisoformat(path.stem)
+        except ValueError:
+            continue
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        snapshots[as_of] = [StockInfo(**item) for item in payload]
+    return snapshots
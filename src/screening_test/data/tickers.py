@@ -104,3 +104,23 @@ def get_tickers(market: str) -> list[str]:
         msg = f"不明な市場: {market}。利用可能: {list(MARKET_TICKERS.keys())}"
         raise ValueError(msg)
     return getter()
+
+
+# 取引所サフィックスごとのベンチマーク指数（サフィックスなしは米国株とみなす）
+BENCHMARK_INDICES = {
+    ".T": "^N225",  # 日経平均
+    ".HK": "^HSI",  # ハンセン指数
+    ".SI": "^STI",  # ストレーツ・タイムズ指数
+    ".JK": "^JKSE",  # ジャカルタ総合指数
+    ".BK": "^SET.BK",  # SET指数
+    ".PS": "PSEI.PS",  # フィリピン総合指数
+}
+DEFAULT_BENCHMARK = "^GSPC"  # S&P500
+
+
+def get_benchmark(ticker: str) -> str:
+    """ティッカーの上場市場に対応するベンチマーク指数のシンボル"""
+    for suffix, index in BENCHMARK_INDICES.items():
+        if ticker.upper().endswith(suffix):
+            return index
+    return DEFAULT_BENCHMARK
@@ -1,5 +1,8 @@
 """CLIエントリポイント: Typerベースのコマンドラインインターフェース"""
 
+import json
+from pathlib import Path
+
 import typer
 from rich.console import Console
 from rich.panel import Panel
@@ -26,35 +29,189 @@ def screen(
 
 @app.command()
 def report(
-    ticker: str = typer.Argument(help="分析対象のティッカーシンボル"),
+    tickers: list[str] = typer.Argument(None, help="分析対象のティッカーシンボル（複数指定可）"),
+    from_screen: bool = typer.Option(False, "--from-screen", help="スクリーニング上位銘柄を対象に加える"),
+    from_watchlist: bool = typer.Option(False, "--from-watchlist", help="ウォッチリストの銘柄を対象に加える"),
+    market: str = typer.Option("jpx", help="--from-screen の対象市場 (jpx, us, asean, hk)"),
+    preset: str = typer.Option("value", help="--from-screen のプリセット (value, growth, dividend, balanced)"),
+    top_n: int = typer.Option(20, help="--from-screen で対象にする上位N銘柄"),
+    output_dir: Path | None = typer.Option(None, help="銘柄ごとのレポートを保存するディレクトリ"),
+    output: Path | None = typer.Option(None, help="全銘柄のレポートをまとめて保存するファイル"),
+    technicals: bool = typer.Option(True, "--technicals/--no-technicals", help="テクニカル指標を含める"),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力"),
 ) -> None:
-    """個別銘柄の財務分析レポートを生成"""
-    from screening_test.core.report import generate_report
+    """財務分析レポートを生成（複数銘柄は1回の並行取得でまとめて処理）"""
+    from screening_test.core.report import build_reports, generate_reports, save_reports
+
+    targets = list(tickers or [])
+    if from_screen:
+        from screening_test.core.screening import run_screening
+
+        targets += [stock["ticker"] for stock in run_screening(market=market, preset=preset, top_n=top_n)]
+    if from_watchlist:
+        from screening_test.core.watchlist import get_watchlist_tickers
+
+        targets += get_watchlist_tickers()
+    if not targets:
+        console.print("[red]エラー: ティッカー、--from-screen、--from-watchlist のいずれかを指定してください[/red]")
+        raise typer.Exit(code=1)
 
-    result = generate_report(ticker)
-    console.print(Panel(result, title=f"[bold blue]{ticker} 分析レポート[/bold blue]", border_style="blue"))
+    if json_output:
+        results = build_reports(targets, include_technicals=technicals)
+        payload = {t: r.model_dump(mode="json") if r is not None else None for t, r in results.items()}
+        typer.echo(json.dumps(payload, ensure_ascii=False))
+        return
+
+    reports = generate_reports(targets, include_technicals=technicals)
+    if output_dir is None and output is None:
+        for ticker, result in reports.items():
+            console.print(Panel(result, title=f"[bold blue]{ticker} 分析レポート[/bold blue]", border_style="blue"))
+        return
+
+    save_reports(reports, output_dir=output_dir, output_file=output)
+    destinations = ", ".join(str(path) for path in (output_dir, output) if path is not None)
+    console.print(f"{len(reports)}銘柄のレポートを保存しました: {destinations}")
 
 
 @app.command()
 def portfolio(
-    action: str = typer.Argument(help="操作 (show, buy, sell, health)"),
+    action: str = typer.Argument(help="操作 (show, buy, sell, health, performance, lots)"),
     ticker: str = typer.Option(None, help="ティッカーシンボル"),
     shares: int = typer.Option(None, help="株数"),
     price: float = typer.Option(None, help="価格"),
+    lot_id: int = typer.Option(None, "--lot-id", help="売却するロット（購入取引のID、sell のみ、省略時は先入先出）"),
+    year: int = typer.Option(None, help="実現損益を集計する年（lots のみ、省略時は今年）"),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力（show, health, performance, lots のみ）"),
 ) -> None:
     """ポートフォリオ管理"""
-    from screening_test.core.portfolio import manage_portfolio
+    from screening_test.core.portfolio import build_health_check, get_portfolio_view, manage_portfolio
+
+    if action == "lots":
+        from screening_test.core.lots import build_lot_summary, render_lots
 
-    result = manage_portfolio(action=action, ticker=ticker, shares=shares, price=price)
+        summary = build_lot_summary(year)
+        if json_output:
+            typer.echo(summary.model_dump_json())
+            return
+        console.print(render_lots(summary))
+        return
+
+    if action == "performance":
+        from screening_test.core.performance import build_performance, show_performance
+
+        if json_output:
+            performance = build_performance()
+            typer.echo(performance.model_dump_json() if performance is not None else json.dumps(None))
+            return
+        console.print(show_performance())
+        return
+
+    if json_output:
+        if action == "show":
+            typer.echo(get_portfolio_view().model_dump_json())
+        elif action == "health":
+            typer.echo(build_health_check().model_dump_json())
+        else:
+            console.print(
+                f"[red]エラー: --json は show, health, performance, lots のみ対応しています（指定: {action}）[/red]"
+            )
+            raise typer.Exit(code=1)
+        return
+
+    result = manage_portfolio(action=action, ticker=ticker, shares=shares, price=price, lot_id=lot_id)
     console.print(result)
 
 
 @app.command()
 def stress(
-    ticker: str = typer.Argument(help="ストレステスト対象のティッカーシンボル"),
+    ticker: str | None = typer.Argument(None, help="ストレステスト対象のティッカーシンボル"),
+    portfolio_mode: bool = typer.Option(False, "--portfolio", help="保有銘柄全体をストレステスト"),
+    historical: bool = typer.Option(False, "--historical", help="ベータ推定と過去の危機期間の再現で検証"),
+    market: str | None = typer.Option(None, help="市場全体をストレス耐性でランキング (jpx, us, asean, hk)"),
+    scenario: list[str] | None = typer.Option(
+        None, help="ランキングに使うシナリオ名（複数指定可、省略時は全シナリオ）"
+    ),
+    top_n: int = typer.Option(20, help="ランキングの上位N件を表示"),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力"),
 ) -> None:
     """ストレステスト（8シナリオでリスク検証）"""
-    from screening_test.core.stress_test import run_stress_test
+    from screening_test.core.stress_test import (
+        build_portfolio_stress_test,
+        build_stress_ranking,
+        build_stress_test,
+        render_stress_ranking,
+        run_portfolio_stress_test,
+        run_stress_test,
+    )
+
+    if market is not None:
+        try:
+            ranking = build_stress_ranking(market, scenario, top_n)
+        except ValueError as e:
+            if json_output:
+                typer.echo(json.dumps({"error": str(e)}, ensure_ascii=False))
+            else:
+                console.print(f"[red]エラー: {e}[/red]")
+            raise typer.Exit(code=1)
+        if json_output:
+            typer.echo(ranking.model_dump_json())
+            return
+        console.print(
+            Panel(
+                render_stress_ranking(ranking),
+                title=f"[bold red]{market.upper()} ストレス耐性ランキング[/bold red]",
+                border_style="red",
+            )
+        )
+        return
+
+    if portfolio_mode:
+        if json_output:
+            portfolio_result = build_portfolio_stress_test()
+            typer.echo(portfolio_result.model_dump_json() if portfolio_result is not None else json.dumps(None))
+            return
+        console.print(
+            Panel(
+                run_portfolio_stress_test(),
+                title="[bold red]ポートフォリオ ストレステスト[/bold red]",
+                border_style="red",
+            )
+        )
+        return
+
+    if ticker is None:
+        console.print("[red]エラー: ティッカーか --portfolio を指定してください[/red]")
+        raise typer.Exit(code=1)
+
+    if historical:
+        from screening_test.core.historical_stress import (
+            build_historical_stress_test,
+            run_historical_stress_test,
+        )
+
+        if json_output:
+            historical_result = build_historical_stress_test(ticker)
+            if historical_result is None:
+                typer.echo(json.dumps({"error": f"{ticker}の過去株価を取得できませんでした"}, ensure_ascii=False))
+                raise typer.Exit(code=1)
+            typer.echo(historical_result.model_dump_json())
+            return
+        console.print(
+            Panel(
+                run_historical_stress_test(ticker),
+                title=f"[bold red]{ticker} ヒストリカル・ストレステスト[/bold red]",
+                border_style="red",
+            )
+        )
+        return
+
+    if json_output:
+        result = build_stress_test(ticker)
+        if result is None:
+            typer.echo(json.dumps({"error": f"{ticker}のデータを取得できませんでした"}, ensure_ascii=False))
+            raise typer.Exit(code=1)
+        typer.echo(result.model_dump_json())
+        return
 
     results = run_stress_test(ticker)
     console.print(Panel(results, title=f"[bold red]{ticker} ストレステスト[/bold red]", border_style="red"))
@@ -62,17 +219,208 @@ def stress(
 
 @app.command()
 def watchlist(
-    action: str = typer.Argument(help="操作 (show, add, remove)"),
+    action: str = typer.Argument(
+        help="操作 (show, add, remove, import, export, alert-add, alert-remove, alerts, check)"
+    ),
     ticker: str = typer.Option(None, help="ティッカーシンボル"),
     reason: str = typer.Option(None, help="ウォッチリストに追加する理由"),
+    file: Path = typer.Option(None, help="一括取り込み・書き出しのファイル（.json ならJSON、それ以外はCSV）"),
+    rule: str = typer.Option(
+        None,
+        help="アラート条件 (price_above, price_below, per_above, per_below, pbr_above, pbr_below, "
+        "score_change, near_52w_low)",
+    ),
+    threshold: float = typer.Option(None, help="アラートの閾値（価格・倍率、スコアの変化幅、52週安値からの%）"),
+    preset: str = typer.Option(None, help="score_change で使うプリセット（省略時は balanced）"),
+    alert_id: int = typer.Option(None, "--alert-id", help="削除するアラートのID"),
+    metrics: bool = typer.Option(
+        False, "--metrics", help="スコア・PER・PBR・利回り・前日比を取得して表示（show のみ）"
+    ),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力（show --metrics, check のみ）"),
 ) -> None:
     """ウォッチリスト管理"""
+    if action == "check" and json_output:
+        from screening_test.core.alerts import check_alerts
+
+        typer.echo(check_alerts().model_dump_json())
+        return
+    if action == "show" and metrics and json_output:
+        from screening_test.core.watchlist import build_watchlist_view
+
+        typer.echo(build_watchlist_view().model_dump_json())
+        return
+    if json_output:
+        console.print(f"[red]エラー: --json は show --metrics, check のみ対応しています（指定: {action}）[/red]")
+        raise typer.Exit(code=1)
+
     from screening_test.core.watchlist import manage_watchlist
 
-    result = manage_watchlist(action=action, ticker=ticker, reason=reason)
+    result = manage_watchlist(
+        action=action,
+        ticker=ticker,
+        reason=reason,
+        file=file,
+        rule=rule,
+        threshold=threshold,
+        preset=preset,
+        alert_id=alert_id,
+        metrics=metrics,
+    )
     console.print(result)
 
 
+@app.command()
+def var(
+    ticker: str | None = typer.Argument(None, help="対象のティッカーシンボル"),
+    portfolio_mode: bool = typer.Option(False, "--portfolio", help="保有銘柄全体を対象にする"),
+    paths: int = typer.Option(100_000, help="シミュレーションのパス数"),
+    horizon: list[int] = typer.Option([1, 10], help="保有期間（営業日、複数指定可）"),
+    confidence: list[float] = typer.Option([0.95, 0.99], help="信頼水準（複数指定可）"),
+    method: str = typer.Option("normal", help="シミュレーション手法 (normal, bootstrap)"),
+    seed: int = typer.Option(42, help="乱数シード（再現性のため固定）"),
+    period: str = typer.Option("2y", help="リターン分布の推定に使う期間"),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力"),
+) -> None:
+    """モンテカルロ法によるVaR / CVaRの推定"""
+    from screening_test.core.monte_carlo import build_monte_carlo, render_monte_carlo
+
+    try:
+        result = build_monte_carlo(
+            ticker=ticker,
+            use_portfolio=portfolio_mode,
+            n_paths=paths,
+            horizons=horizon,
+            confidences=confidence,
+            method=method,
+            seed=seed,
+            period=period,
+        )
+    except ValueError as e:
+        if json_output:
+            typer.echo(json.dumps({"error": str(e)}, ensure_ascii=False))
+        else:
+            console.print(f"[red]エラー: {e}[/red]")
+        raise typer.Exit(code=1)
+
+    if json_output:
+        typer.echo(result.model_dump_json())
+        return
+    title = "ポートフォリオ" if portfolio_mode else ticker
+    console.print(
+        Panel(render_monte_carlo(result), title=f"[bold red]{title} VaR / CVaR[/bold red]", border_style="red")
+    )
+
+
+@app.command()
+def corr(
+    tickers: list[str] | None = typer.Argument(None, help="対象のティッカーシンボル（複数指定可）"),
+    portfolio_mode: bool = typer.Option(False, "--portfolio", help="保有銘柄を対象にする"),
+    from_watchlist: bool = typer.Option(False, "--from-watchlist", help="ウォッチリストの銘柄を対象にする"),
+    window: int = typer.Option(252, help="計算に使う直近の営業日数"),
+    shrinkage: str = typer.Option("none", help="縮小推定 (none, ledoit_wolf)"),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力"),
+) -> None:
+    """銘柄間の相関行列（日次リターン）"""
+    from screening_test.core.covariance import get_covariance, render_correlation
+
+    targets = list(tickers or [])
+    if portfolio_mode:
+        from screening_test.core.portfolio import get_portfolio_view
+
+        targets.extend(p.ticker for p in get_portfolio_view().positions)
+    if from_watchlist:
+        from screening_test.core.watchlist import get_watchlist_tickers
+
+        targets.extend(get_watchlist_tickers())
+
+    try:
+        if len(set(targets)) < 2:
+            msg = "2銘柄以上を指定してください（ティッカー、--portfolio、--from-watchlist）"
+            raise ValueError(msg)
+        result = get_covariance(targets, window=window, shrinkage=shrinkage)
+    except ValueError as e:
+        if json_output:
+            typer.echo(json.dumps({"error": str(e)}, ensure_ascii=False))
+        else:
+            console.print(f"[red]エラー: {e}[/red]")
+        raise typer.Exit(code=1)
+
+    if json_output:
+        typer.echo(result.model_dump_json())
+        return
+    console.print(Panel(render_correlation(result), title="[bold cyan]相関行列[/bold cyan]", border_style="cyan"))
+
+
+@app.command()
+def rebalance(
+    candidates: list[str] | None = typer.Argument(None, help="保有銘柄に加えて組み入れを検討する銘柄（複数指定可）"),
+    from_watchlist: bool = typer.Option(False, "--from-watchlist", help="ウォッチリストの銘柄を候補に加える"),
+    max_weight: float = typer.Option(0.25, help="1銘柄あたりのウェイト上限（0〜1）"),
+    sector_cap: float = typer.Option(None, help="1セクターあたりのウェイト上限（0〜1、省略時は制限なし）"),
+    turnover: float = typer.Option(None, help="売買回転率の上限 Σ|目標-現在|（0〜2、省略時は制限なし）"),
+    risk_aversion: float = typer.Option(3.0, help="リスク回避度（大きいほど分散を抑える）"),
+    window: int = typer.Option(252, help="期待リターン・共分散の推定に使う直近の営業日数"),
+    json_output: bool = typer.Option(False, "--json", help="結果をJSONで出力"),
+) -> None:
+    """平均分散モデルによるポートフォリオのリバランス案"""
+    from screening_test.core.rebalance import build_rebalance, render_rebalance
+
+    targets = list(candidates or [])
+    if from_watchlist:
+        from screening_test.core.watchlist import get_watchlist_tickers
+
+        targets.extend(get_watchlist_tickers())
+
+    try:
+        result = build_rebalance(
+            candidates=targets,
+            max_weight=max_weight,
+            sector_cap=sector_cap,
+            turnover=turnover,
+            risk_aversion=risk_aversion,
+            window=window,
+        )
+    except ValueError as e:
+        if json_output:
+            typer.echo(json.dumps({"error": str(e)}, ensure_ascii=False))
+        else:
+            console.print(f"[red]エラー: {e}[/red]")
+        raise typer.Exit(code=1)
+
+    if json_output:
+        typer.echo(result.model_dump_json())
+        return
+    console.print(Panel(render_rebalance(result), title="[bold cyan]リバランス案[/bold cyan]", border_style="cyan"))
+
+
+@app.command()
+def backtest(
+    market: str = typer.Option("jpx", help="対象市場 (jpx, us, asean, hk)"),
+    preset: list[str] = typer.Option(None, help="対象プリセット（複数指定可、省略時は全プリセット）"),
+    top_n: int = typer.Option(5, help="各リバランスで保有する銘柄数"),
+    period: str = typer.Option("3y", help="バックテスト期間 (1y, 2y, 5y, max など)"),
+    rebalance: str = typer.Option("monthly", help="リバランス頻度 (weekly, monthly, quarterly)"),
+) -> None:
+    """スクリーニングプリセットのヒストリカルバックテスト"""
+    from screening_test.core.backtest import run_backtest
+
+    result = run_backtest(market=market, presets=preset or None, top_n=top_n, period=period, rebalance=rebalance)
+    console.print(Panel(result, title=f"[bold cyan]{market} バックテスト[/bold cyan]", border_style="cyan"))
+
+
+@app.command()
+def serve() -> None:
+    """常駐プロセスを起動（起動中は他のコマンドをこのプロセスに転送し、キャッシュを使い回す）"""
+    from screening_test.daemon import SOCKET_FILE, is_running
+    from screening_test.daemon import serve as run_daemon
+
+    if is_running():
+        console.print(f"[red]エラー: 既に起動しています: {SOCKET_FILE}[/red]")
+        raise typer.Exit(code=1)
+    console.print(f"常駐プロセスを起動します: {SOCKET_FILE}（Ctrl+Cで停止）")
+    run_daemon()
+
+
 @app.command()
 def version() -> None:
     """バージョン情報を表示"""
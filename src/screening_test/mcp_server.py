@@ -1,10 +1,72 @@
-"""MCPサーバー: CLIコマンドをMCPツールとして公開"""
-
+"""MCPサーバー: CLIコマンドをMCPツールとして公開
+
+環境変数 SCREENING_TEST_PREFETCH に市場・watchlist・portfolio を指定すると、実行中は
+それらの銘柄情報をキャッシュの期限切れ前にバックグラウンドで取り直す（core/prefetch.py）。
+
+保存済みのデータ（ファンダメンタルズのスナップショット、保有銘柄、ウォッチリスト、保持中のスクリーニング結果）は
+`snapshot://` のリソースとして公開し、ツールを呼ばずに読めるようにする。購読中のリソースは
+RESOURCE_POLL_SECONDS ごとにバージョン（ファイルの変更カウンタ・更新時刻）だけを確認し、
+変わっていれば更新を通知する（別プロセスのCLIによる更新も検出する）。
+"""
+
+import json
+import weakref
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
 from typing import Any
 
+import anyio
 from mcp.server.fastmcp import FastMCP
+from mcp.server.session import ServerSession
+from mcp.types import ServerCapabilities
+from pydantic import AnyUrl, BaseModel
+
+RESOURCE_POLL_SECONDS = 5.0
+# 終了時に先読みの停止を待つ上限（通信中の1件が終わらなければ待たずに終了する）
+PREFETCH_STOP_TIMEOUT_SECONDS = 5.0
+
+
+@asynccontextmanager
+async def _lifespan(_server: FastMCP) -> AsyncIterator[None]:
+    """サーバーの実行中、購読中のリソースの変更を定期的に確認し、設定があれば先読みを行う"""
+    from screening_test.core.prefetch import prefetcher_from_env
+
+    prefetcher = prefetcher_from_env()
+    if prefetcher is not None:
+        prefetcher.start()
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_poll_resource_changes)
+            yield
+            tg.cancel_scope.cancel()
+    finally:
+        if prefetcher is not None:
+            await anyio.to_thread.run_sync(prefetcher.stop, PREFETCH_STOP_TIMEOUT_SECONDS)
+
+
+mcp = FastMCP(
+    "screening-test",
+    instructions="株式スクリーニングシステム - yfinanceベースの投資分析自動化",
+    lifespan=_lifespan,
+)
+
+OUTPUT_FORMATS = ("text", "json")
+
+
+def _invalid_format(output_format: str) -> str | None:
+    """出力形式が不正な場合のエラーメッセージ"""
+    if output_format in OUTPUT_FORMATS:
+        return None
+    return f"エラー: 不明な出力形式 '{output_format}'。利用可能: {', '.join(OUTPUT_FORMATS)}"
+
 
-mcp = FastMCP("screening-test", instructions="株式スクリーニングシステム - yfinanceベースの投資分析自動化")
+def _structured(result: BaseModel | None, error: str) -> dict[str, Any]:
+    """結果モデルをJSON互換のdictに変換（取得失敗時はエラーメッセージ）"""
+    if result is None:
+        return {"error": error}
+    return result.model_dump(mode="json")
 
 
 @mcp.tool()
@@ -28,30 +90,166 @@ def screen(
 
 
 @mcp.tool()
-def report(ticker: str) -> str:
+def screen_page(
+    market: str = "jpx",
+    preset: str = "value",
+    page_size: int = 50,
+    cursor: str | None = None,
+) -> dict[str, Any]:
+    """スクリーニング結果をスコア順にページ単位で取得
+
+    市場全体のランキングをサーバー側に保持し、cursorで続きのページを返します。
+    ページ送りではスクリーニングを再実行しないため、数千銘柄の順位を少しずつ取得できます。
+    結果は next_cursor が null になるまで、前のページの next_cursor を cursor に渡して取得します。
+
+    Args:
+        market: 対象市場 (jpx: 日本, us: 米国, asean: ASEAN, hk: 香港)
+        preset: スクリーニングプリセット (value: 割安, growth: 成長, dividend: 配当, balanced: バランス)
+        page_size: 1ページの件数（1〜200、デフォルト: 50）
+        cursor: 前のページの next_cursor（省略時は先頭ページ。market・presetは最初のページの指定が使われる）
+    """
+    from screening_test.core.screening import screen_page as build_screen_page
+
+    try:
+        page = build_screen_page(market=market, preset=preset, page_size=page_size, cursor=cursor)
+    except ValueError as e:
+        return {"error": str(e)}
+    return page.model_dump(mode="json")
+
+
+@mcp.tool()
+def report(ticker: str, output_format: str = "text") -> str | dict[str, Any]:
     """個別銘柄の財務分析レポートを生成
 
     バリュエーション指標、収益性指標、株価情報、バリュースコアを含む詳細レポートを返します。
 
     Args:
         ticker: 分析対象のティッカーシンボル（例: 7203.T, AAPL）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
     """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.report import build_report
+
+        return _structured(build_report(ticker), f"{ticker}のデータを取得できませんでした")
+
     from screening_test.core.report import generate_report
 
     return generate_report(ticker)
 
 
 @mcp.tool()
-def portfolio_show() -> str:
+def report_batch(tickers: list[str], output_format: str = "text") -> str | dict[str, Any]:
+    """複数銘柄の財務分析レポートをまとめて生成
+
+    銘柄情報を1回の並行取得でまとめて取得し、ティッカーごとのレポートを返します。
+    screenツールの結果やウォッチリストの銘柄を一括で分析する場合に使います。
+
+    Args:
+        tickers: 分析対象のティッカーシンボルのリスト（例: ["7203.T", "AAPL"]）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.report import build_reports
+
+        return {
+            ticker: _structured(result, f"{ticker}のデータを取得できませんでした")
+            for ticker, result in build_reports(tickers).items()
+        }
+
+    from screening_test.core.report import generate_reports
+
+    return generate_reports(tickers)
+
+
+@mcp.tool()
+def portfolio_show(output_format: str = "text") -> str | dict[str, Any]:
     """ポートフォリオの一覧を表示
 
     現在保有している銘柄、株数、平均取得単価の一覧を返します。
+
+    Args:
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
     """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.portfolio import get_portfolio_view
+
+        return get_portfolio_view().model_dump(mode="json")
+
     from screening_test.core.portfolio import show_portfolio
 
     return show_portfolio()
 
 
+@mcp.tool()
+def portfolio_health(output_format: str = "text") -> str | dict[str, Any]:
+    """ポートフォリオのヘルスチェック
+
+    保有銘柄の現在値を取得し、銘柄ごとの評価額・損益と合計を返します。
+
+    Args:
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.portfolio import build_health_check
+
+        return build_health_check().model_dump(mode="json")
+
+    from screening_test.core.portfolio import health_check
+
+    return health_check()
+
+
+@mcp.tool()
+def portfolio_performance(output_format: str = "text") -> str | dict[str, Any]:
+    """ポートフォリオの日次パフォーマンス
+
+    取引履歴と過去株価から日々の評価額を再構成し、入出金を除いた時間加重の累積リターンと
+    ドローダウンの推移を返します。
+
+    Args:
+        output_format: 出力形式 (text: 直近の月末の推移, json: 日次の全系列を含む構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.performance import build_performance
+
+        return _structured(build_performance(), "取引履歴がありません")
+
+    from screening_test.core.performance import show_performance
+
+    return show_performance()
+
+
+@mcp.tool()
+def portfolio_lots(year: int | None = None, output_format: str = "text") -> str | dict[str, Any]:
+    """ポートフォリオの保有ロットと年間の損益
+
+    取引履歴から購入単位（ロット）ごとの保有を先入先出（売却時にロット指定があればそのロット）で再構成し、
+    指定した年の実現損益と現在の含み損益を銘柄ごとに返します。
+
+    Args:
+        year: 実現損益を集計する年（省略時は今年）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    from screening_test.core.lots import build_lot_summary, render_lots
+
+    summary = build_lot_summary(year)
+    if output_format == "json":
+        return summary.model_dump(mode="json")
+    return render_lots(summary)
+
+
 @mcp.tool()
 def portfolio_buy(ticker: str, shares: int, price: float) -> str:
     """株式の購入を記録
@@ -69,7 +267,7 @@ def portfolio_buy(ticker: str, shares: int, price: float) -> str:
 
 
 @mcp.tool()
-def portfolio_sell(ticker: str, shares: int, price: float) -> str:
+def portfolio_sell(ticker: str, shares: int, price: float, lot_id: int | None = None) -> str:
     """株式の売却を記録
 
     ポートフォリオから売却記録を追加し、損益を計算します。
@@ -78,14 +276,15 @@ def portfolio_sell(ticker: str, shares: int, price: float) -> str:
         ticker: 売却するティッカーシンボル（例: 7203.T, AAPL）
         shares: 売却株数
         price: 売却単価
+        lot_id: 売却するロット（購入取引のID、portfolio_lotsで確認）。省略時は先入先出
     """
     from screening_test.core.portfolio import sell_stock
 
-    return sell_stock(ticker=ticker, shares=shares, price=price)
+    return sell_stock(ticker=ticker, shares=shares, price=price, lot_id=lot_id)
 
 
 @mcp.tool()
-def stress_test(ticker: str) -> str:
+def stress_test(ticker: str, output_format: str = "text", historical: bool = False) -> str | dict[str, Any]:
     """ストレステスト（8シナリオでリスク検証）
 
     金利上昇、景気後退、パンデミックなど8つのシナリオで、
@@ -93,20 +292,258 @@ def stress_test(ticker: str) -> str:
 
     Args:
         ticker: テスト対象のティッカーシンボル（例: 7203.T, AAPL）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+        historical: Trueの場合、指数に対するベータを推定し、リーマンショック等の
+            過去の危機期間の再現とベータで調整したシナリオで検証する
     """
+    if error := _invalid_format(output_format):
+        return error
+    if historical:
+        from screening_test.core.historical_stress import build_historical_stress_test, run_historical_stress_test
+
+        if output_format == "json":
+            return _structured(build_historical_stress_test(ticker), f"{ticker}の過去株価を取得できませんでした")
+        return run_historical_stress_test(ticker)
+    if output_format == "json":
+        from screening_test.core.stress_test import build_stress_test
+
+        return _structured(build_stress_test(ticker), f"{ticker}のデータを取得できませんでした")
+
     from screening_test.core.stress_test import run_stress_test
 
     return run_stress_test(ticker)
 
 
 @mcp.tool()
-def watchlist_show() -> str:
+def stress_ranking(
+    market: str = "jpx",
+    scenarios: list[str] | None = None,
+    top_n: int = 20,
+    output_format: str = "text",
+) -> str | dict[str, Any]:
+    """市場全体のストレス耐性ランキング
+
+    市場の全銘柄に指定シナリオをまとめて適用し、下落が小さい（耐性が高い）順に並べます。
+    下落率はセクター感応度で決まるため、順位はセクター単位です（同じセクター内は時価総額の大きい順）。
+
+    Args:
+        market: 対象市場 (jpx: 日本, us: 米国, asean: ASEAN, hk: 香港)
+        scenarios: 対象シナリオ名のリスト（例: ["パンデミック", "流動性危機"]、省略時は全シナリオ）
+        top_n: 上位N件を返す（デフォルト: 20）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.stress_test import build_stress_ranking
+
+        try:
+            return build_stress_ranking(market, scenarios, top_n).model_dump(mode="json")
+        except ValueError as e:
+            return {"error": str(e)}
+
+    from screening_test.core.stress_test import run_stress_ranking
+
+    return run_stress_ranking(market, scenarios, top_n)
+
+
+@mcp.tool()
+def portfolio_stress_test(output_format: str = "text") -> str | dict[str, Any]:
+    """ポートフォリオ全体のストレステスト（8シナリオ）
+
+    保有銘柄すべてに8つのシナリオを適用し、シナリオ別の合計損益と
+    損失寄与の大きい銘柄を返します。
+
+    Args:
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    if output_format == "json":
+        from screening_test.core.stress_test import build_portfolio_stress_test
+
+        return _structured(build_portfolio_stress_test(), "ポートフォリオは空です")
+
+    from screening_test.core.stress_test import run_portfolio_stress_test
+
+    return run_portfolio_stress_test()
+
+
+@mcp.tool()
+def monte_carlo_var(
+    ticker: str | None = None,
+    portfolio: bool = False,
+    n_paths: int = 100_000,
+    horizons: list[int] | None = None,
+    confidences: list[float] | None = None,
+    method: str = "normal",
+    seed: int | None = 42,
+    output_format: str = "text",
+) -> str | dict[str, Any]:
+    """モンテカルロ法によるVaR / CVaRの推定
+
+    過去2年の日次リターンから分布を推定し、銘柄間の相関を保ったシミュレーションで
+    指定ホライズン後の損失分布を求め、信頼水準ごとのVaR / CVaRを返します。
+
+    Args:
+        ticker: 対象のティッカーシンボル（portfolio=Trueの場合は不要）
+        portfolio: Trueの場合は保有銘柄全体を対象にする
+        n_paths: シミュレーションのパス数（デフォルト: 100,000）
+        horizons: 保有期間（営業日）のリスト（デフォルト: [1, 10]）
+        confidences: 信頼水準のリスト（デフォルト: [0.95, 0.99]）
+        method: シミュレーション手法 (normal: 多変量正規, bootstrap: 過去日付の復元抽出)
+        seed: 乱数シード（同じシードなら同じ結果）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    from screening_test.core.monte_carlo import build_monte_carlo, render_monte_carlo
+
+    try:
+        result = build_monte_carlo(
+            ticker=ticker,
+            use_portfolio=portfolio,
+            n_paths=n_paths,
+            horizons=horizons,
+            confidences=confidences,
+            method=method,
+            seed=seed,
+        )
+    except ValueError as e:
+        return {"error": str(e)} if output_format == "json" else f"エラー: {e}"
+    return result.model_dump(mode="json") if output_format == "json" else render_monte_carlo(result)
+
+
+@mcp.tool()
+def correlation_matrix(
+    tickers: list[str] | None = None,
+    source: str | None = None,
+    window: int = 252,
+    shrinkage: str = "none",
+    output_format: str = "text",
+) -> str | dict[str, Any]:
+    """銘柄間の相関行列・共分散行列
+
+    直近window営業日の日次対数リターンから共分散・相関を計算します。
+    同じ銘柄の組み合わせの結果はキャッシュされ、新しい日付の分だけ差分で更新されます。
+
+    Args:
+        tickers: 対象のティッカーシンボルのリスト
+        source: 対象銘柄の取得元 (portfolio: 保有銘柄, watchlist: ウォッチリスト)。tickersに追加される
+        window: 計算に使う直近の営業日数（デフォルト: 252）
+        shrinkage: 縮小推定 (none: なし, ledoit_wolf: Ledoit-Wolf法)
+        output_format: 出力形式 (text: 相関行列のテキスト, json: 共分散・相関を含む構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    targets = list(tickers or [])
+    if source == "portfolio":
+        from screening_test.core.portfolio import get_portfolio_view
+
+        targets.extend(p.ticker for p in get_portfolio_view().positions)
+    elif source == "watchlist":
+        from screening_test.core.watchlist import get_watchlist_tickers
+
+        targets.extend(get_watchlist_tickers())
+    elif source is not None:
+        message = f"不明な取得元: {source}。利用可能: portfolio, watchlist"
+        return {"error": message} if output_format == "json" else f"エラー: {message}"
+
+    from screening_test.core.covariance import get_covariance, render_correlation
+
+    try:
+        if len(set(targets)) < 2:
+            msg = "2銘柄以上を指定してください"
+            raise ValueError(msg)
+        result = get_covariance(targets, window=window, shrinkage=shrinkage)
+    except ValueError as e:
+        return {"error": str(e)} if output_format == "json" else f"エラー: {e}"
+    return result.model_dump(mode="json") if output_format == "json" else render_correlation(result)
+
+
+@mcp.tool()
+def portfolio_rebalance(
+    candidates: list[str] | None = None,
+    max_weight: float = 0.25,
+    sector_cap: float | None = None,
+    turnover: float | None = None,
+    risk_aversion: float = 3.0,
+    output_format: str = "text",
+) -> str | dict[str, Any]:
+    """平均分散モデルによるポートフォリオのリバランス案
+
+    保有銘柄（と候補銘柄）の過去株価から期待リターン・共分散を推定し、ウェイト上限・セクター上限・
+    売買回転率の制約のもとで目標ウェイトと、そこへ近づけるための売買注文を返します。
+
+    Args:
+        candidates: 保有銘柄に加えて組み入れを検討するティッカーのリスト
+        max_weight: 1銘柄あたりのウェイト上限（0〜1、デフォルト: 0.25）
+        sector_cap: 1セクターあたりのウェイト上限（0〜1、省略時は制限なし）
+        turnover: 売買回転率の上限 Σ|目標-現在|（省略時は制限なし）
+        risk_aversion: リスク回避度（大きいほど分散を抑える、デフォルト: 3.0）
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    from screening_test.core.rebalance import build_rebalance, render_rebalance
+
+    try:
+        result = build_rebalance(
+            candidates=candidates,
+            max_weight=max_weight,
+            sector_cap=sector_cap,
+            turnover=turnover,
+            risk_aversion=risk_aversion,
+        )
+    except ValueError as e:
+        return {"error": str(e)} if output_format == "json" else f"エラー: {e}"
+    return result.model_dump(mode="json") if output_format == "json" else render_rebalance(result)
+
+
+@mcp.tool()
+def backtest(
+    market: str = "jpx",
+    presets: list[str] | None = None,
+    top_n: int = 5,
+    period: str = "3y",
+    rebalance: str = "monthly",
+) -> str:
+    """スクリーニングプリセットのヒストリカルバックテスト
+
+    保存済みのファンダメンタルズスナップショットと過去株価から、各リバランス日に
+    スコア上位N銘柄を保有した場合の累積リターン・最大ドローダウン・回転率を返します。
+
+    Args:
+        market: 対象市場 (jpx: 日本, us: 米国, asean: ASEAN, hk: 香港)
+        presets: 対象プリセット（省略時は value, growth, dividend, balanced の全て）
+        top_n: 各リバランスで保有する銘柄数（デフォルト: 5）
+        period: バックテスト期間（例: 1y, 3y, 5y, max）
+        rebalance: リバランス頻度 (weekly, monthly, quarterly)
+    """
+    from screening_test.core.backtest import run_backtest
+
+    return run_backtest(market=market, presets=presets, top_n=top_n, period=period, rebalance=rebalance)
+
+
+@mcp.tool()
+def watchlist_show(metrics: bool = False, output_format: str = "text") -> str | dict[str, Any]:
     """ウォッチリストの一覧を表示
 
     登録されている注目銘柄の一覧（ティッカー、登録理由、追加日）を返します。
-    """
-    from screening_test.core.watchlist import show_watchlist
+    metrics=True の場合は全銘柄のバリュースコア・PER・PBR・配当利回り・株価・前日比をまとめて取得して付けます。
 
+    Args:
+        metrics: 指標を取得して付けるか
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    from screening_test.core.watchlist import build_watchlist_view, render_watchlist_view, show_watchlist
+
+    if output_format == "json":
+        return build_watchlist_view(metrics=metrics).model_dump(mode="json")
+    if metrics:
+        return render_watchlist_view(build_watchlist_view())
     return show_watchlist()
 
 
@@ -139,5 +576,240 @@ def watchlist_remove(ticker: str) -> str:
     return remove_from_watchlist(ticker=ticker)
 
 
+@mcp.tool()
+def watchlist_alert_add(ticker: str, rule: str, threshold: float, preset: str = "balanced") -> str:
+    """ウォッチリストの銘柄にアラート条件を追加
+
+    Args:
+        ticker: ウォッチリストに登録済みのティッカーシンボル
+        rule: 条件 (price_above, price_below: 株価, per_above, per_below: PER, pbr_above, pbr_below: PBR,
+            score_change: プリセットスコアの変化幅, near_52w_low: 52週安値からの上昇率%)
+        threshold: 閾値
+        preset: score_change で使うプリセット (value, growth, dividend, balanced)
+    """
+    from screening_test.core.alerts import add_alert
+
+    return add_alert(ticker=ticker, rule=rule, threshold=threshold, preset=preset)
+
+
+@mcp.tool()
+def watchlist_alert_remove(alert_id: int) -> str:
+    """アラート条件を削除
+
+    Args:
+        alert_id: 削除するアラートのID（watchlist_alerts で確認）
+    """
+    from screening_test.core.alerts import remove_alert
+
+    return remove_alert(alert_id)
+
+
+@mcp.tool()
+def watchlist_alerts() -> str:
+    """登録済みのアラート条件の一覧"""
+    from screening_test.core.alerts import show_alerts
+
+    return show_alerts()
+
+
+@mcp.tool()
+def watchlist_check(output_format: str = "text") -> str | dict[str, Any]:
+    """ウォッチリストの全アラート条件を判定
+
+    条件を持つ全銘柄の現在値・ファンダメンタルズを一括取得して判定し、新たに成立した条件を返します。
+    通知は条件が成立した時点の1回だけで、スコア変化は前回通知時のスコアを基準とします。
+
+    Args:
+        output_format: 出力形式 (text: 整形済みテキスト, json: 構造化データ)
+    """
+    if error := _invalid_format(output_format):
+        return error
+    from screening_test.core.alerts import check_alerts, render_alert_check
+
+    result = check_alerts()
+    if output_format == "json":
+        return result.model_dump(mode="json")
+    return render_alert_check(result)
+
+
+@mcp.tool()
+def watchlist_import(path: str, reason: str = "") -> str:
+    """ファイルからウォッチリストに銘柄を一括追加
+
+    CSV（ticker列を含むヘッダー付き、またはヘッダーなしで1列目がティッカー）や
+    JSON（ティッカーまたはエントリの配列）の銘柄を1トランザクションでまとめて登録します。
+    登録済みの銘柄はそのまま残ります。
+
+    Args:
+        path: 取り込むファイルのパス（.json ならJSON、それ以外はCSV）
+        reason: ファイルに理由がない銘柄に設定する追加理由
+    """
+    from screening_test.core.watchlist import import_watchlist
+
+    try:
+        return import_watchlist(Path(path), reason=reason)
+    except (OSError, ValueError) as e:
+        return f"エラー: {e}"
+
+
+@mcp.tool()
+def watchlist_export(path: str) -> str:
+    """ウォッチリストをファイルに書き出し
+
+    Args:
+        path: 書き出し先のパス（.json ならJSON、それ以外はCSV）
+    """
+    from screening_test.core.watchlist import export_watchlist
+
+    try:
+        return export_watchlist(Path(path))
+    except OSError as e:
+        return f"エラー: {e}"
+
+
+# ---- リソース ----
+
+
+@mcp.resource(
+    "snapshot://{market}/fundamentals",
+    mime_type="application/json",
+    description="市場の最新のファンダメンタルズのスナップショット（screen実行時に保存）",
+)
+def fundamentals_resource(market: str) -> str:
+    """市場の最新のファンダメンタルズのスナップショット"""
+    from screening_test.data.snapshots import load_latest_snapshot
+
+    latest = load_latest_snapshot(market)
+    if latest is None:
+        msg = f"{market}のスナップショットがありません。screenツールで作成してください"
+        raise ValueError(msg)
+    as_of, stocks = latest
+    payload = {"market": market, "as_of": as_of.isoformat(), "stocks": [s.model_dump(mode="json") for s in stocks]}
+    return json.dumps(payload, ensure_ascii=False)
+
+
+@mcp.resource(
+    "snapshot://{market}/ranking/{preset}",
+    mime_type="application/json",
+    description="保持中のスクリーニング結果の全順位（screen_pageで作成、スクリーニングは実行しない）",
+)
+def ranking_resource(market: str, preset: str) -> str:
+    """保持中のスクリーニング結果の全順位"""
+    from screening_test.core.screening import get_result_set
+
+    result_set = get_result_set(market, preset)
+    if result_set is None:
+        msg = f"{market}・{preset}の保持中の結果はありません。screen_pageツールで作成してください"
+        raise ValueError(msg)
+    return json.dumps({"market": market, "preset": preset, "results": result_set[1]}, ensure_ascii=False)
+
+
+@mcp.resource(
+    "snapshot://portfolio/positions",
+    mime_type="application/json",
+    description="ポートフォリオの保有銘柄（株数・平均取得単価）",
+)
+def positions_resource() -> str:
+    """ポートフォリオの保有銘柄"""
+    from screening_test.core.portfolio import get_portfolio_view
+
+    return get_portfolio_view().model_dump_json()
+
+
+@mcp.resource(
+    "snapshot://watchlist/entries",
+    mime_type="application/json",
+    description="ウォッチリストの銘柄（登録理由・追加日）",
+)
+def watchlist_resource() -> str:
+    """ウォッチリストの銘柄"""
+    from screening_test.core.watchlist import build_watchlist_view
+
+    return build_watchlist_view(metrics=False).model_dump_json()
+
+
+def _resource_version(uri: str) -> Any:
+    """リソースの内容を読まずに求めるバージョン（変われば内容が更新されている）"""
+    from screening_test.core import portfolio, screening, watchlist
+    from screening_test.data.snapshots import latest_snapshot_path
+
+    if uri == "snapshot://portfolio/positions":
+        return portfolio.get_store_version()
+    if uri == "snapshot://watchlist/entries":
+        return watchlist.get_store_version()
+    parts = uri.removeprefix("snapshot://").split("/")
+    if len(parts) == 2 and parts[1] == "fundamentals":
+        path = latest_snapshot_path(parts[0])
+        return (path.name, path.stat().st_mtime_ns) if path is not None else None
+    if len(parts) == 3 and parts[1] == "ranking":
+        result_set = screening.get_result_set(parts[0], parts[2])
+        return result_set[0] if result_set is not None else None
+    return None
+
+
+# 購読中のリソースURI → 購読しているセッション
+_subscriptions: defaultdict[str, weakref.WeakSet[ServerSession]] = defaultdict(weakref.WeakSet)
+# 購読中のリソースURI → 最後に確認したバージョン
+_resource_versions: dict[str, Any] = {}
+
+
+@mcp._mcp_server.subscribe_resource()  # type: ignore[no-untyped-call]
+async def _subscribe(uri: AnyUrl) -> None:
+    """リソースの更新通知を購読"""
+    key = str(uri)
+    _resource_versions.setdefault(key, _resource_version(key))
+    _subscriptions[key].add(mcp.get_context().session)
+
+
+@mcp._mcp_server.unsubscribe_resource()  # type: ignore[no-untyped-call]
+async def _unsubscribe(uri: AnyUrl) -> None:
+    """リソースの更新通知の購読を解除"""
+    _subscriptions[str(uri)].discard(mcp.get_context().session)
+
+
+_base_capabilities = mcp._mcp_server.get_capabilities
+
+
+def _capabilities(*args: Any, **kwargs: Any) -> ServerCapabilities:
+    """リソースの購読に対応していることを通知（FastMCPは購読の可否を常にFalseで返すため）"""
+    capabilities = _base_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+
+mcp._mcp_server.get_capabilities = _capabilities  # type: ignore[method-assign]
+
+
+async def notify_resource_changes() -> list[str]:
+    """購読中のリソースのうちバージョンが変わったものを購読者に通知し、そのURIを返す"""
+    changed: list[str] = []
+    for uri, sessions in list(_subscriptions.items()):
+        if not sessions:
+            del _subscriptions[uri]
+            _resource_versions.pop(uri, None)
+            continue
+        version = _resource_version(uri)
+        if _resource_versions.get(uri) == version:
+            continue
+        _resource_versions[uri] = version
+        changed.append(uri)
+        for session in list(sessions):
+            try:
+                await session.send_resource_updated(AnyUrl(uri))
+            except Exception:
+                # 切断済みのセッションは購読を外す
+                sessions.discard(session)
+    return changed
+
+
+async def _poll_resource_changes() -> None:
+    """購読中のリソースの変更をRESOURCE_POLL_SECONDSごとに確認"""
+    while True:
+        await anyio.sleep(RESOURCE_POLL_SECONDS)
+        with suppress(Exception):
+            await notify_resource_changes()
+
+
 if __name__ == "__main__":
     mcp.run()
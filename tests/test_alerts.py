@@ -0,0 +1,137 @@
+"""ウォッチリストのアラートのユニットテスト"""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from screening_test.core import alerts, watchlist
+from screening_test.data.client import StockInfo
+
+
+class FakeClient:
+    """現在値とファンダメンタルズを差し替えられるテスト用クライアント（呼び出しを記録）"""
+
+    def __init__(self) -> None:
+        self.prices: dict[str, float | None] = {"7203.T": 2500.0, "AAPL": 180.0}
+        self.infos: dict[str, StockInfo | None] = {
+            "7203.T": StockInfo(
+                ticker="7203.T",
+                name="Toyota",
+                sector="Consumer Cyclical",
+                market_cap=4e13,
+                per=9.0,
+                pbr=1.0,
+                dividend_yield=2.5,
+                roe=12.0,
+                revenue_growth=5.0,
+                current_price=2500.0,
+                fifty_two_week_low=2400.0,
+            ),
+            "AAPL": None,
+        }
+        self.calls: list[tuple[str, list[str]]] = []
+
+    def get_quotes(self, tickers: list[str]) -> dict[str, float | None]:
+        self.calls.append(("quotes", tickers))
+        return {t: self.prices.get(t) for t in tickers}
+
+    def get_stock_info_batch(self, tickers: list[str]) -> dict[str, StockInfo | None]:
+        self.calls.append(("info", tickers))
+        return {t: self.infos.get(t) for t in tickers}
+
+
+class TestAlerts:
+    """アラート条件の登録と一括判定のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(watchlist, "DATA_DIR", self.temp_path),
+            patch.object(watchlist, "WATCHLIST_FILE", self.temp_path / "watchlist.csv"),
+            patch.object(watchlist, "DB_FILE", self.temp_path / "watchlist.db"),
+        ]
+        for p in self._patches:
+            p.start()
+        watchlist.add_to_watchlist("7203.T", "割安")
+        watchlist.add_to_watchlist("AAPL", "AI期待")
+        self.client = FakeClient()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def _check(self) -> alerts.AlertCheckResult:
+        return alerts.check_alerts(client=self.client)  # type: ignore[arg-type]
+
+    def test_add_validates(self) -> None:
+        assert "#1" in alerts.add_alert("7203.T", "price_above", 2600)
+        assert "エラー" in alerts.add_alert("9999.T", "price_above", 100)
+        assert "エラー" in alerts.add_alert("7203.T", "unknown", 100)
+        assert "エラー" in alerts.add_alert("7203.T", "score_change", 5, preset="unknown")
+        assert "エラー" in alerts.add_alert("7203.T", "near_52w_low", 0)
+        assert [a.rule for a in alerts.get_alerts()] == ["price_above"]
+
+    def test_price_cross_fires_once(self) -> None:
+        alerts.add_alert("7203.T", "price_above", 2600)
+        assert self._check().triggered == []
+        self.client.prices["7203.T"] = 2650.0
+        triggered = self._check().triggered
+        assert [(a.ticker, a.value, a.previous) for a in triggered] == [("7203.T", 2650.0, 2500.0)]
+        # 成立したままなら再通知しない
+        self.client.prices["7203.T"] = 2700.0
+        assert self._check().triggered == []
+        # いったん下回ってから再び上抜けたら通知する
+        self.client.prices["7203.T"] = 2550.0
+        self._check()
+        self.client.prices["7203.T"] = 2610.0
+        assert len(self._check().triggered) == 1
+        assert alerts.get_alerts()[0].triggered_at is not None
+
+    def test_fundamental_rules(self) -> None:
+        alerts.add_alert("7203.T", "per_below", 10)
+        alerts.add_alert("7203.T", "pbr_above", 1.5)
+        alerts.add_alert("7203.T", "near_52w_low", 5)
+        messages = {a.rule: a.message for a in self._check().triggered}
+        assert set(messages) == {"per_below", "near_52w_low"}
+        assert "+4.2%" in messages["near_52w_low"]
+
+    def test_score_change_uses_baseline(self) -> None:
+        alerts.add_alert("7203.T", "score_change", 5, preset="value")
+        assert self._check().triggered == []  # 初回は基準の記録のみ
+        baseline = alerts.get_alerts()[0].last_value
+        info = self.client.infos["7203.T"]
+        assert info is not None
+        info.pbr = 3.0
+        info.per = 30.0
+        triggered = self._check().triggered
+        assert len(triggered) == 1
+        assert triggered[0].previous == baseline
+        assert "value" in triggered[0].message
+
+    def test_batched_fetch_and_missing(self) -> None:
+        for threshold in range(100, 400):
+            alerts.add_alert("AAPL", "price_below", threshold)
+        alerts.add_alert("7203.T", "per_below", 10)
+        alerts.add_alert("AAPL", "pbr_below", 1.0)
+        result = self._check()
+        assert result.rules == 302
+        assert len(result.triggered) == (400 - 180) + 1  # 閾値180〜399の株価とPER
+        assert result.missing == ["AAPL"]
+        assert self.client.calls == [("quotes", ["AAPL"]), ("info", ["7203.T", "AAPL"])]
+        assert "AAPL" in alerts.render_alert_check(result)
+
+    def test_removing_ticker_removes_alerts(self) -> None:
+        alerts.add_alert("AAPL", "price_below", 150)
+        alerts.add_alert("7203.T", "price_below", 2000)
+        assert "削除" in alerts.remove_alert(2)
+        assert "登録されていません" in alerts.remove_alert(2)
+        watchlist.remove_from_watchlist("AAPL")
+        assert alerts.get_alerts() == []
+        assert "登録されていません" in alerts.render_alert_check(self._check())
+
+    def test_manage_watchlist_dispatch(self) -> None:
+        assert "追加" in watchlist.manage_watchlist("alert-add", ticker="AAPL", rule="price_below", threshold=150)
+        assert "エラー" in watchlist.manage_watchlist("alert-add", ticker="AAPL")
+        assert "price_below" in watchlist.manage_watchlist("alerts")
+        assert "エラー" in watchlist.manage_watchlist("alert-remove")
+        assert "削除" in watchlist.manage_watchlist("alert-remove", alert_id=1)
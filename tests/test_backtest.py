@@ -0,0 +1,140 @@
+"""バックテストのユニットテスト"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core.backtest import (
+    BENCHMARK_NAME,
+    _rebalance_indices,
+    _simulate,
+    _top_n_weights,
+    backtest_presets,
+)
+from screening_test.data.client import StockInfo
+from screening_test.data.history import get_close_matrix
+
+
+def _stock(ticker: str, per: float, pbr: float) -> StockInfo:
+    return StockInfo(ticker=ticker, name=ticker, sector="", market_cap=0, per=per, pbr=pbr)
+
+
+class FakeHistoryClient:
+    """過去株価の取得のみを持つテスト用クライアント"""
+
+    def __init__(self, frames: dict[str, pd.DataFrame]) -> None:
+        self.frames = frames
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        return {ticker: self.frames.get(ticker, pd.DataFrame()) for ticker in tickers}
+
+
+class TestCloseMatrix:
+    """終値行列の整形テスト"""
+
+    def test_aligns_and_forward_fills(self) -> None:
+        tokyo = pd.DatetimeIndex(["2024-01-04", "2024-01-05", "2024-01-09"]).tz_localize("Asia/Tokyo")
+        new_york = pd.DatetimeIndex(["2024-01-04", "2024-01-08", "2024-01-09"]).tz_localize("America/New_York")
+        client = FakeHistoryClient(
+            {
+                "7203.T": pd.DataFrame({"Close": [100.0, 101.0, 102.0]}, index=tokyo),
+                "AAPL": pd.DataFrame({"Close": [10.0, 11.0, 12.0]}, index=new_york),
+            }
+        )
+        matrix = get_close_matrix(client, ["7203.T", "AAPL", "MISSING"])  # type: ignore[arg-type]
+        assert list(matrix.columns) == ["7203.T", "AAPL"]
+        assert len(matrix) == 4
+        assert matrix.loc["2024-01-08", "7203.T"] == 101.0
+        assert matrix.loc["2024-01-05", "AAPL"] == 10.0
+
+    def test_empty_when_no_data(self) -> None:
+        client = FakeHistoryClient({})
+        assert get_close_matrix(client, ["A"]).empty  # type: ignore[arg-type]
+
+
+class TestMatrixHelpers:
+    """行列演算ヘルパーのテスト"""
+
+    def test_rebalance_indices_monthly(self) -> None:
+        dates = pd.bdate_range("2024-01-01", "2024-03-31")
+        idx = _rebalance_indices(dates, "monthly")
+        assert [dates[i].month for i in idx] == [1, 2, 3]
+        assert idx[0] == 0
+
+    def test_top_n_weights_skips_missing(self) -> None:
+        scores = np.array([[90.0, 80.0, np.nan, 70.0]])
+        prices = np.array([[1.0, np.nan, 1.0, 1.0]])
+        weights = _top_n_weights(scores, prices, top_n=2)
+        np.testing.assert_allclose(weights, [[0.5, 0.0, 0.0, 0.5]])
+
+    def test_top_n_weights_all_missing_is_cash(self) -> None:
+        weights = _top_n_weights(np.array([[np.nan, np.nan]]), np.array([[1.0, 1.0]]), top_n=1)
+        assert weights.sum() == 0.0
+
+    def test_simulate_buy_and_hold(self) -> None:
+        prices = np.array([[100.0, 100.0], [110.0, 90.0], [120.0, 100.0], [120.0, 110.0]])
+        weights = np.array([[0.5, 0.5], [1.0, 0.0]])
+        nav, turnover = _simulate(prices, np.array([0, 2]), weights)
+        # 期間1: (1.2 + 1.0) / 2 = 1.1、期間2: 1銘柄目のみ保有で変化なし
+        np.testing.assert_allclose(nav, [1.0, 1.0, 1.1, 1.1])
+        # 値動きで変化したリバランス直前のウェイトから (1, 0) への変更量
+        drifted = np.array([0.6, 0.5]) / 1.1
+        assert turnover[0] == pytest.approx(0.5 * (abs(1 - drifted[0]) + drifted[1]))
+
+    def test_simulate_cash_is_flat(self) -> None:
+        prices = np.array([[100.0], [50.0], [200.0]])
+        nav, _ = _simulate(prices, np.array([0]), np.zeros((1, 1)))
+        np.testing.assert_allclose(nav, [1.0, 1.0, 1.0])
+
+
+class TestBacktestPresets:
+    """プリセットバックテストのテスト"""
+
+    def setup_method(self) -> None:
+        dates = pd.bdate_range("2023-01-02", periods=260)
+        growth = np.linspace(1.0, 2.0, len(dates))
+        self.prices = pd.DataFrame(
+            {"CHEAP": 100 * growth, "PRICEY": np.full(len(dates), 100.0)},
+            index=dates,
+        )
+        self.snapshots = {
+            date(2023, 1, 1): [_stock("CHEAP", per=5.0, pbr=0.4), _stock("PRICEY", per=50.0, pbr=5.0)],
+        }
+
+    def test_value_picks_cheap_stock(self) -> None:
+        results = backtest_presets(self.prices, self.snapshots, presets=["value"], top_n=1)
+        value = results[0]
+        assert value.preset == "value"
+        assert value.total_return_pct == pytest.approx(100.0)
+        assert value.max_drawdown_pct == pytest.approx(0.0)
+        assert value.avg_turnover_pct == pytest.approx(0.0)
+        assert not value.lookahead_bias
+        assert len(value.nav) == len(self.prices)
+
+    def test_benchmark_included(self) -> None:
+        results = backtest_presets(self.prices, self.snapshots, presets=["value"], top_n=1)
+        assert results[-1].preset == BENCHMARK_NAME
+        assert 0 < results[-1].total_return_pct < 100.0
+
+    def test_all_presets_by_default(self) -> None:
+        results = backtest_presets(self.prices, self.snapshots, include_benchmark=False)
+        assert [r.preset for r in results] == ["value", "growth", "dividend", "balanced"]
+
+    def test_lookahead_flagged(self) -> None:
+        snapshots = {date(2023, 6, 1): self.snapshots[date(2023, 1, 1)]}
+        results = backtest_presets(self.prices, snapshots, presets=["value"], include_benchmark=False)
+        assert results[0].lookahead_bias
+
+    def test_unknown_preset(self) -> None:
+        with pytest.raises(ValueError, match="不明なプリセット"):
+            backtest_presets(self.prices, self.snapshots, presets=["unknown"])
+
+    def test_unknown_rebalance(self) -> None:
+        with pytest.raises(ValueError, match="リバランス頻度"):
+            backtest_presets(self.prices, self.snapshots, rebalance="daily")
+
+    def test_no_snapshots(self) -> None:
+        with pytest.raises(ValueError, match="スナップショット"):
+            backtest_presets(self.prices, {})
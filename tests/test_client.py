@@ -1,9 +1,17 @@
 """yfinanceクライアントのユニットテスト"""
 
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any
+from unittest.mock import patch
 
-from screening_test.data.client import CacheEntry, StockInfo, YFinanceClient
+import pandas as pd
+import pytest
+
+from screening_test.data.client import CacheEntry, Quote, StockInfo, YFinanceClient, get_default_client
+from screening_test.data.scheduler import Priority
 
 
 class TestStockInfo:
@@ -76,3 +84,109 @@ class TestYFinanceClient:
         )
         assert self.client._get_cached("expired_key") is None
         assert "expired_key" not in self.client._cache
+
+
+class TestBatchFetch:
+    """複数銘柄の並行取得のテスト"""
+
+    def setup_method(self) -> None:
+        self.client = YFinanceClient()
+
+    def test_stock_info_batch_dedupes_and_keeps_order(self) -> None:
+        calls: list[str] = []
+
+        def fake_get(ticker: str) -> StockInfo | None:
+            calls.append(ticker)
+            if ticker == "FAIL":
+                return None
+            return StockInfo(ticker=ticker, name=ticker, sector="", market_cap=0)
+
+        with patch.object(self.client, "get_stock_info", side_effect=fake_get):
+            result = self.client.get_stock_info_batch(["B", "A", "FAIL", "B"])
+
+        assert list(result) == ["B", "A", "FAIL"]
+        assert result["FAIL"] is None
+        assert sorted(calls) == ["A", "B", "FAIL"]
+
+    def test_historical_batch_uses_period(self) -> None:
+        with patch.object(self.client, "get_historical_data", return_value=pd.DataFrame()) as mock_hist:
+            result = self.client.get_historical_data_batch(["A"], period="5y")
+        mock_hist.assert_called_once_with("A", "5y")
+        assert result["A"].empty
+
+    def test_rate_limit_spaces_concurrent_calls(self) -> None:
+        self.client.scheduler.interval = 0.05
+        starts: list[float] = []
+
+        def limited(_: int) -> None:
+            self.client._rate_limit()
+            starts.append(time.monotonic())
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(limited, range(4)))
+
+        starts.sort()
+        gaps = [b - a for a, b in itertools.pairwise(starts)]
+        assert all(gap >= 0.04 for gap in gaps)
+
+    def test_priority_propagates_to_batch_workers(self) -> None:
+        seen: list[Priority] = []
+
+        def fake_get(ticker: str) -> None:  # noqa: ARG001
+            seen.append(self.client._current_priority())
+
+        with patch.object(self.client, "get_stock_info", side_effect=fake_get):
+            self.client.get_stock_info_batch(["A", "B"])
+            with self.client.priority(Priority.BATCH):
+                self.client.get_stock_info_batch(["C", "D"])
+        assert seen == [Priority.INTERACTIVE] * 2 + [Priority.BATCH] * 2
+        assert self.client._current_priority() == Priority.INTERACTIVE
+
+    def test_refresh_bypasses_cache(self) -> None:
+        self.client._set_cache("A", StockInfo(ticker="A", name="old", sector="", market_cap=0).model_dump())
+        assert self.client.cache_expires_at("A") is not None
+        assert self.client.cache_expires_at("B") is None
+        with patch("yfinance.Ticker") as mock_ticker:
+            mock_ticker.return_value.info = {"shortName": "new"}
+            self.client.scheduler.interval = 0.0
+            assert self.client.get_stock_info("A").name == "old"  # type: ignore[union-attr]
+            assert self.client.get_stock_info("A", refresh=True).name == "new"  # type: ignore[union-attr]
+        assert self.client.get_stock_info("A").name == "new"  # type: ignore[union-attr]
+
+    def test_quotes_one_download_and_short_ttl_cache(self) -> None:
+        index = pd.bdate_range("2024-01-01", periods=3)
+        columns = pd.MultiIndex.from_product([["Close", "Open"], ["A", "B", "FAIL"]])
+        data = pd.DataFrame(
+            [[10.0, 20.0, None, 0, 0, 0], [11.0, None, None, 0, 0, 0], [12.0, None, None, 0, 0, 0]],
+            index=index,
+            columns=columns,
+        )
+        with patch("yfinance.download", return_value=data) as mock_download:
+            first = self.client.get_quotes(["A", "B", "FAIL", "A"])
+            second = self.client.get_quotes(["A", "B"])
+
+        assert first == {"A": 12.0, "B": 20.0, "FAIL": None}
+        assert second == {"A": 12.0, "B": 20.0}
+        mock_download.assert_called_once()
+        ttl = self.client._cache["A_quote"].expires_at - datetime.now()
+        assert ttl <= timedelta(seconds=self.client.QUOTE_CACHE_TTL_SECONDS)
+
+    def test_quote_changes_share_download(self) -> None:
+        index = pd.bdate_range("2024-01-01", periods=3)
+        data = pd.DataFrame({("Close", "A"): [10.0, 8.0, 10.0], ("Close", "B"): [None, None, 5.0]}, index=index)
+        with patch("yfinance.download", return_value=data) as mock_download:
+            changes = self.client.get_quotes_with_changes(["A", "B"])
+            quotes = self.client.get_quotes(["A", "B"])
+
+        assert changes["A"] is not None
+        assert changes["A"].change_pct == pytest.approx(25.0)
+        assert changes["B"] == Quote(price=5.0)
+        assert quotes == {"A": 10.0, "B": 5.0}
+        mock_download.assert_called_once()
+
+    def test_quotes_download_failure(self) -> None:
+        with patch("yfinance.download", side_effect=RuntimeError):
+            assert self.client.get_quotes(["A"]) == {"A": None}
+
+    def test_default_client_is_shared(self) -> None:
+        assert get_default_client() is get_default_client()
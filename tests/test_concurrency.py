@@ -0,0 +1,65 @@
+"""ポートフォリオ・ウォッチリストの同時更新のストレステスト"""
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from screening_test.core import portfolio, watchlist
+from screening_test.data.files import atomic_write
+
+N_PROCESSES = 4
+N_OPERATIONS = 20
+
+
+def _hammer(data_dir: str, worker: int) -> None:
+    """別プロセスで売買とウォッチリストの追加・削除を繰り返す"""
+    path = Path(data_dir)
+    portfolio.DATA_DIR = path
+    portfolio.DB_FILE = path / "portfolio.db"
+    portfolio.PORTFOLIO_FILE = path / "portfolio.csv"
+    portfolio.TRANSACTIONS_FILE = path / "transactions.csv"
+    watchlist.DATA_DIR = path
+    watchlist.WATCHLIST_FILE = path / "watchlist.csv"
+    watchlist.DB_FILE = path / "watchlist.db"
+
+    for i in range(N_OPERATIONS):
+        portfolio.buy_stock("AAPL", 2, 100.0)
+        portfolio.sell_stock("AAPL", 1, 110.0)
+        watchlist.add_to_watchlist(f"W{worker}-{i}", "stress")
+        if i % 2 == 1:
+            watchlist.remove_from_watchlist(f"W{worker}-{i}")
+
+
+@pytest.mark.slow
+def test_concurrent_writes_from_multiple_processes(tmp_path: Path) -> None:
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_hammer, args=(str(tmp_path), w)) for w in range(N_PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(portfolio, "DATA_DIR", tmp_path)
+        mp.setattr(portfolio, "DB_FILE", tmp_path / "portfolio.db")
+        mp.setattr(watchlist, "DATA_DIR", tmp_path)
+        mp.setattr(watchlist, "WATCHLIST_FILE", tmp_path / "watchlist.csv")
+        mp.setattr(watchlist, "DB_FILE", tmp_path / "watchlist.db")
+
+        total_operations = N_PROCESSES * N_OPERATIONS
+        assert portfolio._load_portfolio()["AAPL"].shares == total_operations
+        assert len(portfolio.get_transactions("AAPL")) == total_operations * 2
+        tickers = watchlist.get_watchlist_tickers()
+        assert sorted(tickers) == sorted(f"W{w}-{i}" for w in range(N_PROCESSES) for i in range(0, N_OPERATIONS, 2))
+
+
+def test_atomic_write_keeps_original_on_failure(tmp_path: Path) -> None:
+    path = tmp_path / "data.csv"
+    path.write_text("original")
+    with pytest.raises(RuntimeError), atomic_write(path) as f:
+        f.write("partial")
+        raise RuntimeError
+    assert path.read_text() == "original"
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,111 @@
+"""共分散・相関行列サービスのユニットテスト"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core import covariance
+from screening_test.core.covariance import (
+    correlation_from_covariance,
+    get_covariance,
+    ledoit_wolf_intensity,
+    render_correlation,
+    shrink_covariance,
+)
+
+
+class GrowingHistoryClient:
+    """表示する日数を後から増やせる（新しい日付の追加を再現する）テスト用クライアント"""
+
+    def __init__(self, n_days: int = 400) -> None:
+        rng = np.random.default_rng(0)
+        self.index = pd.bdate_range("2023-01-02", periods=n_days)
+        base = rng.normal(0, 0.01, n_days)
+        self.closes = {
+            "A": 100 * np.exp(np.cumsum(base + rng.normal(0, 0.002, n_days))),
+            "B": 100 * np.exp(np.cumsum(base + rng.normal(0, 0.002, n_days))),
+            "C": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_days))),
+        }
+        self.visible = n_days - 5
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        return {
+            t: pd.DataFrame({"Close": self.closes[t][: self.visible]}, index=self.index[: self.visible])
+            if t in self.closes
+            else pd.DataFrame()
+            for t in tickers
+        }
+
+
+class TestMatrixMath:
+    """共分散・相関・縮小推定の計算のテスト"""
+
+    def setup_method(self) -> None:
+        rng = np.random.default_rng(1)
+        self.returns = rng.normal(0, 0.01, size=(200, 4))
+        self.cov = np.cov(self.returns, rowvar=False)
+
+    def test_correlation_matches_numpy(self) -> None:
+        np.testing.assert_allclose(correlation_from_covariance(self.cov), np.corrcoef(self.returns, rowvar=False))
+
+    def test_zero_variance_correlation(self) -> None:
+        corr = correlation_from_covariance(np.array([[1.0, 0.0], [0.0, 0.0]]))
+        np.testing.assert_allclose(corr, np.eye(2))
+
+    def test_ledoit_wolf_shrinks_towards_diagonal(self) -> None:
+        intensity = ledoit_wolf_intensity(self.returns, self.cov)
+        assert 0 < intensity <= 1
+        shrunk, reported = shrink_covariance(self.returns, self.cov, "ledoit_wolf")
+        assert reported == intensity
+        off_diagonal = ~np.eye(4, dtype=bool)
+        assert np.abs(shrunk[off_diagonal]).sum() < np.abs(self.cov[off_diagonal]).sum()
+        assert np.trace(shrunk) == pytest.approx(np.trace(self.cov))
+
+    def test_unknown_shrinkage(self) -> None:
+        with pytest.raises(ValueError, match="縮小推定"):
+            shrink_covariance(self.returns, self.cov, "oas")
+
+
+class TestGetCovariance:
+    """キャッシュ付き共分散取得のテスト"""
+
+    def setup_method(self) -> None:
+        covariance._cache.clear()
+        self.client = GrowingHistoryClient()
+
+    def test_matches_numpy_and_sorted(self) -> None:
+        result = get_covariance(["C", "A", "B", "GONE"], window=100, client=self.client)  # type: ignore[arg-type]
+        assert result.tickers == ["A", "B", "C"]
+        assert result.missing == ["GONE"]
+        assert result.observations == 100
+        closes = np.column_stack([self.client.closes[t][: self.client.visible] for t in "ABC"])
+        expected = np.cov(np.diff(np.log(closes), axis=0)[-100:], rowvar=False)
+        np.testing.assert_allclose(result.covariance, expected)
+        assert result.correlation[0][1] > 0.9
+
+    def test_incremental_update_on_new_day(self) -> None:
+        get_covariance(["A", "B", "C"], window=100, client=self.client)  # type: ignore[arg-type]
+        self.client.visible += 3
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(covariance, "_window_stats", lambda *_: pytest.fail("差分で更新されなかった"))
+            updated = get_covariance(["B", "C", "A"], window=100, client=self.client)  # type: ignore[arg-type]
+
+        covariance._cache.clear()
+        fresh = get_covariance(["A", "B", "C"], window=100, client=self.client)  # type: ignore[arg-type]
+        assert updated.as_of == fresh.as_of == str(self.client.index[self.client.visible - 1].date())
+        np.testing.assert_allclose(updated.covariance, fresh.covariance, rtol=1e-10)
+
+    def test_cache_reused_without_recompute(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        get_covariance(["A", "B"], window=50, client=self.client)  # type: ignore[arg-type]
+        monkeypatch.setattr(covariance, "_window_stats", lambda *_: pytest.fail("全体を再計算した"))
+        get_covariance(["A", "B"], window=50, client=self.client)  # type: ignore[arg-type]
+
+    def test_insufficient_data(self) -> None:
+        with pytest.raises(ValueError, match="不足"):
+            get_covariance(["GONE"], client=self.client)  # type: ignore[arg-type]
+
+    def test_render(self) -> None:
+        result = get_covariance(["A", "B", "C"], shrinkage="ledoit_wolf", client=self.client)  # type: ignore[arg-type]
+        text = render_correlation(result)
+        assert "ledoit_wolf" in text
+        assert "[red]" in text  # AとBは高相関
@@ -0,0 +1,113 @@
+"""常駐モードのユニットテスト"""
+
+import os
+import socket
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from screening_test import daemon
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[daemon.DaemonServer]:
+    """一時ディレクトリのソケットで待ち受ける常駐プロセス（スレッドで実行）"""
+    with daemon.DaemonServer(tmp_path / "daemon.sock") as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join(5)
+
+
+class TestDaemon:
+    """コマンドの転送と常駐プロセスの起動のテスト"""
+
+    def test_forwards_command(self, server: daemon.DaemonServer, capsys: pytest.CaptureFixture[str]) -> None:
+        assert daemon.forward(["version"], server.socket_path) == 0
+        assert "screening-test v0.1.0" in capsys.readouterr().out
+
+    def test_forwards_exit_code_and_stderr(
+        self, server: daemon.DaemonServer, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        assert daemon.forward(["no-such-command"], server.socket_path) == 2
+        assert "no-such-command" in capsys.readouterr().err
+        assert daemon.forward(["watchlist", "show", "--json"], server.socket_path) == 1
+        assert "--json" in capsys.readouterr().out
+
+    def test_falls_back_without_daemon(self, tmp_path: Path) -> None:
+        assert daemon.forward(["version"], tmp_path / "daemon.sock") is None
+        # 異常終了で残ったソケット
+        stale = tmp_path / "stale.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(stale))
+        assert daemon.forward(["version"], stale) is None
+        with daemon.DaemonServer(stale) as server:
+            assert daemon.is_running(stale)
+        assert not stale.exists()
+        assert server.socket_path == stale
+
+    def test_rejects_other_working_directory(self, server: daemon.DaemonServer) -> None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(server.socket_path))
+            daemon._send(sock, {"argv": ["version"], "cwd": os.sep, "terminal": False, "width": 80})
+            assert daemon._receive(sock) == {"forwarded": False, "reason": "cwd"}
+
+    def test_busy_daemon_declines(self, server: daemon.DaemonServer) -> None:
+        # 実行中のコマンドがあれば待たずに断られ、呼び出し側で実行する
+        with server.busy:
+            assert daemon.forward(["version"], server.socket_path) is None
+
+    @pytest.mark.parametrize("reply", [b"", b'{"forwarded": true, "std'], ids=["closed", "partial"])
+    def test_lost_response_is_error_not_rerun(
+        self, reply: bytes, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        path = tmp_path / "daemon.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(str(path))
+            listener.listen()
+
+            def accept_and_drop() -> None:
+                conn, _ = listener.accept()
+                with conn:
+                    conn.makefile("rb").readline()
+                    conn.sendall(reply)
+
+            thread = threading.Thread(target=accept_and_drop)
+            thread.start()
+            # 送信後に応答が途切れたら、実行済みかもしれないため自身では実行し直さない
+            assert daemon.forward(["portfolio", "buy", "AAPL"], path) == 1
+            thread.join(5)
+        assert "エラー" in capsys.readouterr().err
+
+    def test_refuses_second_daemon(self, server: daemon.DaemonServer) -> None:
+        with pytest.raises(ValueError, match="既に起動"):
+            daemon.DaemonServer(server.socket_path)
+        assert oct(server.socket_path.stat().st_mode & 0o777) == oct(0o600)
+
+    def test_socket_created_private(self, tmp_path: Path) -> None:
+        modes: list[int] = []
+        bind = socket.socket.bind
+
+        def record_mode(sock: socket.socket, address: str) -> None:
+            bind(sock, address)
+            modes.append(Path(address).stat().st_mode & 0o777)
+
+        umask = os.umask(0o022)
+        try:
+            with patch.object(socket.socket, "bind", record_mode), daemon.DaemonServer(tmp_path / "daemon.sock"):
+                assert os.umask(0o022) == 0o022  # 作成後は元のumaskに戻る
+        finally:
+            os.umask(umask)
+        # bindで作成された時点から所有者のみ
+        assert modes == [0o600]
+
+    def test_entrypoint_runs_locally(self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("sys.argv", ["screening-test", "version"])
+        with pytest.raises(SystemExit) as exc_info:
+            daemon.entrypoint()
+        assert exc_info.value.code == 0
@@ -0,0 +1,128 @@
+"""ヒストリカル・ストレステストのユニットテスト"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core import historical_stress
+from screening_test.core.historical_stress import (
+    HISTORICAL_SCENARIOS,
+    build_historical_stress_test,
+    build_historical_stress_tests,
+    estimate_betas,
+    render_historical_stress_test,
+    run_historical_stress_test,
+    window_changes,
+)
+from screening_test.core.stress_test import SCENARIOS
+from screening_test.data.tickers import get_benchmark
+
+
+def _frame(index: pd.DatetimeIndex, closes: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+class CountingHistoryClient:
+    """過去株価を返し、呼び出し回数を数えるテスト用クライアント"""
+
+    def __init__(self, frames: dict[str, pd.DataFrame]) -> None:
+        self.frames = frames
+        self.calls = 0
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        self.calls += 1
+        return {t: self.frames.get(t, pd.DataFrame()) for t in tickers}
+
+
+class TestBenchmark:
+    """ベンチマーク指数の対応のテスト"""
+
+    @pytest.mark.parametrize(
+        ("ticker", "expected"),
+        [("7203.T", "^N225"), ("0700.HK", "^HSI"), ("D05.SI", "^STI"), ("AAPL", "^GSPC")],
+    )
+    def test_get_benchmark(self, ticker: str, expected: str) -> None:
+        assert get_benchmark(ticker) == expected
+
+
+class TestMatrixHelpers:
+    """ベータ・期間騰落率の行列計算のテスト"""
+
+    def test_estimate_betas_vectorized(self) -> None:
+        rng = np.random.default_rng(0)
+        market = rng.normal(0, 0.01, 300)
+        returns = np.column_stack([market * 2.0, market * 0.5, np.full(300, np.nan)])
+        returns[:100, 1] = np.nan  # 上場前
+        betas, counts = estimate_betas(returns, market)
+        assert betas[0] == pytest.approx(2.0)
+        assert betas[1] == pytest.approx(0.5)
+        assert np.isnan(betas[2])
+        assert counts.tolist() == [300, 200, 0]
+
+    def test_window_changes(self) -> None:
+        index = pd.DatetimeIndex(["2020-02-18", "2020-02-19", "2020-03-20", "2020-03-23", "2020-04-01"])
+        closes = pd.DataFrame({"A": [100.0, 100.0, 70.0, 60.0, 80.0], "B": [np.nan] * 5}, index=index)
+        windows = [{"start": "2020-02-19", "end": "2020-03-23"}, {"start": "2008-09-12", "end": "2009-03-09"}]
+        changes = window_changes(closes, windows)
+        assert changes[0, 0] == pytest.approx(-0.4)
+        assert np.isnan(changes[0, 1])
+        assert np.isnan(changes[1]).all()
+
+
+class TestBuildHistoricalStress:
+    """ヒストリカル・ストレステストのテスト"""
+
+    def setup_method(self) -> None:
+        historical_stress._memo.clear()
+        index = pd.bdate_range("2007-01-01", "2023-12-29")
+        rng = np.random.default_rng(1)
+        market_returns = rng.normal(0.0002, 0.01, len(index))
+        market = 100 * np.exp(np.cumsum(market_returns))
+        stock = 100 * np.exp(np.cumsum(market_returns * 1.5))
+        # 2021年上場の銘柄（過去の危機期間はベータで推定）
+        new_listing = np.where(index >= "2021-01-04", stock, np.nan)
+        self.client = CountingHistoryClient(
+            {
+                "^GSPC": _frame(index, market),
+                "OLD": _frame(index, stock),
+                "NEW": _frame(index[index >= "2021-01-04"], new_listing[index >= "2021-01-04"]),
+            }
+        )
+
+    def test_beta_and_replay(self) -> None:
+        result = build_historical_stress_test("OLD", self.client)  # type: ignore[arg-type]
+        assert result is not None
+        assert result.benchmark == "^GSPC"
+        assert result.beta == pytest.approx(1.5)
+        assert [r.name for r in result.replays] == [s["name"] for s in HISTORICAL_SCENARIOS]
+        assert all(r.replayed for r in result.replays)
+        assert [s.name for s in result.scenarios] == [s["name"] for s in SCENARIOS]
+        assert result.scenarios[0].price_change_pct == pytest.approx(SCENARIOS[0]["shock_pct"] * 1.5)
+
+    def test_pre_listing_windows_estimated_from_beta(self) -> None:
+        result = build_historical_stress_test("NEW", self.client)  # type: ignore[arg-type]
+        assert result is not None
+        lehman = result.replays[0]
+        assert not lehman.replayed
+        assert lehman.benchmark_change_pct is not None
+        assert lehman.price_change_pct == pytest.approx(result.beta * lehman.benchmark_change_pct)
+        assert result.replays[-1].replayed
+
+    def test_memoized_per_ticker(self) -> None:
+        first = build_historical_stress_tests(["OLD", "NEW"], self.client)  # type: ignore[arg-type]
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(historical_stress, "_compute_group", lambda *_: pytest.fail("再計算された"))
+            second = build_historical_stress_tests(["OLD", "NEW"], self.client)  # type: ignore[arg-type]
+        assert first == second
+
+    def test_missing_data(self) -> None:
+        assert build_historical_stress_test("NONE", self.client) is None  # type: ignore[arg-type]
+        assert "エラー" in run_historical_stress_test("NONE", self.client)  # type: ignore[arg-type]
+
+    def test_render(self) -> None:
+        result = build_historical_stress_test("NEW", self.client)  # type: ignore[arg-type]
+        assert result is not None
+        text = render_historical_stress_test(result)
+        assert "ベータ: 1.50" in text
+        assert "ベータから推定" in text
+        assert "最悪シナリオ" in text
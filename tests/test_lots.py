@@ -0,0 +1,110 @@
+"""税務ロット台帳のユニットテスト"""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from screening_test.core import lots, portfolio
+from screening_test.core.lots import LotLedger, build_lot_summary, render_lots
+from screening_test.core.portfolio import Transaction
+
+
+def _tx(tx_id: int, day: str, action: str, shares: int, price: float, lot_id: int | None = None) -> Transaction:
+    return Transaction(
+        id=tx_id, date=f"{day}T10:00:00", action=action, ticker="A", shares=shares, price=price, lot_id=lot_id
+    )
+
+
+class TestLotLedger:
+    """ロットの消化と実現損益の索引のテスト"""
+
+    def test_fifo(self) -> None:
+        ledger = LotLedger(
+            [
+                _tx(1, "2023-01-10", "buy", 10, 100.0),
+                _tx(2, "2023-06-10", "buy", 10, 200.0),
+                _tx(3, "2024-02-01", "sell", 15, 300.0),
+            ]
+        )
+        assert [(g.lot_id, g.shares, g.pnl) for g in ledger.realized] == [(1, 10, 2000.0), (2, 5, 500.0)]
+        assert [(lot.lot_id, lot.shares) for lot in ledger.open_lots()] == [(2, 5)]
+
+    def test_specific_lot_then_fifo(self) -> None:
+        ledger = LotLedger(
+            [
+                _tx(1, "2023-01-10", "buy", 10, 100.0),
+                _tx(2, "2023-06-10", "buy", 10, 200.0),
+                _tx(3, "2024-02-01", "sell", 12, 300.0, lot_id=2),
+            ]
+        )
+        assert [(g.lot_id, g.shares) for g in ledger.realized] == [(2, 10), (1, 2)]
+        assert [(lot.lot_id, lot.shares) for lot in ledger.open_lots()] == [(1, 8)]
+
+    def test_realized_index_by_period(self) -> None:
+        ledger = LotLedger([_tx(1, "2023-01-10", "buy", 30, 100.0)])
+        ledger.apply([_tx(2, "2023-12-20", "sell", 10, 90.0), _tx(3, "2024-01-05", "sell", 10, 150.0)])
+        ledger.apply([_tx(4, "2024-03-05", "sell", 10, 120.0)])
+        assert ledger.realized_by_ticker("2023") == {"A": -100.0}
+        assert ledger.realized_by_ticker("2024") == {"A": 700.0}
+        assert ledger.realized_by_ticker("2024-03") == {"A": 200.0}
+        assert ledger.realized_by_ticker("2022") == {}
+
+    def test_sell_without_lot_is_unmatched(self) -> None:
+        ledger = LotLedger([_tx(1, "2024-01-10", "buy", 5, 100.0), _tx(2, "2024-02-01", "sell", 8, 120.0)])
+        assert ledger.unmatched == {"A": 3}
+        assert ledger.realized_by_ticker("2024") == {"A": 100.0}
+
+
+class TestLotSummary:
+    """取引履歴からの年間集計のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+        ]
+        for p in self._patches:
+            p.start()
+        lots._memo.clear()
+        self.client = MagicMock()
+        self.client.get_quotes.side_effect = lambda tickers: {t: 200.0 for t in tickers if t != "GONE"}
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_year_to_date_summary(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        portfolio.buy_stock("AAPL", 10, 100.0)
+        portfolio.sell_stock("AAPL", 15, 180.0)
+        portfolio.buy_stock("GONE", 1, 10.0)
+        year = int(portfolio.get_transactions()[0].date[:4])
+
+        summary = build_lot_summary(year, client=self.client)
+        assert summary.realized_pnl == pytest.approx(10 * 30 + 5 * 80)
+        aapl = next(t for t in summary.tickers if t.ticker == "AAPL")
+        assert aapl.shares == 5
+        assert aapl.unrealized_pnl == pytest.approx(5 * 100)
+        assert summary.unrealized_pnl == pytest.approx(5 * 100)
+        assert build_lot_summary(year - 1, client=self.client).realized_pnl == 0
+
+        text = render_lots(summary)
+        assert "保有ロット" in text
+        assert "GONE" in text
+
+    def test_memo_applies_only_new_transactions(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        build_lot_summary(client=self.client)
+        portfolio.sell_stock("AAPL", 4, 170.0)
+        with patch.object(lots, "LotLedger", side_effect=AssertionError("台帳を作り直した")):
+            summary = build_lot_summary(client=self.client)
+        assert summary.realized_pnl == pytest.approx(80.0)
+        assert [lot.shares for lot in summary.lots] == [6]
+
+    def test_empty(self) -> None:
+        assert "ありません" in render_lots(build_lot_summary(client=self.client))
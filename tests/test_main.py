@@ -1,7 +1,13 @@
 """CLIのユニットテスト"""
 
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
 from typer.testing import CliRunner
 
+from screening_test.data.client import StockInfo
 from screening_test.main import app
 
 
@@ -21,3 +27,64 @@ class TestCLI:
         result = self.runner.invoke(app, ["--help"])
         assert result.exit_code == 0
         assert "株式スクリーニングシステム" in result.output
+
+    def test_report_requires_target(self) -> None:
+        result = self.runner.invoke(app, ["report"])
+        assert result.exit_code == 1
+        assert "エラー" in result.output
+
+    @patch("screening_test.core.report.generate_reports")
+    def test_report_multiple_tickers(self, mock_gen: MagicMock) -> None:
+        mock_gen.return_value = {"AAPL": "Apple", "MSFT": "Microsoft"}
+        result = self.runner.invoke(app, ["report", "AAPL", "MSFT"])
+        assert result.exit_code == 0
+        mock_gen.assert_called_once_with(["AAPL", "MSFT"], include_technicals=True)
+        assert "Microsoft" in result.output
+
+    @patch("screening_test.core.watchlist.get_watchlist_tickers", return_value=["NVDA"])
+    @patch("screening_test.core.report.generate_reports")
+    def test_report_from_watchlist_to_directory(self, mock_gen: MagicMock, _mock_watchlist: MagicMock) -> None:
+        mock_gen.return_value = {"NVDA": "Nvidia"}
+        output_dir = Path(tempfile.mkdtemp()) / "reports"
+        result = self.runner.invoke(app, ["report", "--from-watchlist", "--output-dir", str(output_dir)])
+        assert result.exit_code == 0
+        mock_gen.assert_called_once_with(["NVDA"], include_technicals=True)
+        assert (output_dir / "NVDA.txt").exists()
+
+    @patch("screening_test.core.screening.save_snapshot")
+    @patch("screening_test.core.screening.fetch_stocks")
+    @patch("screening_test.core.report.build_reports", return_value={"7203.T": None})
+    def test_report_from_screen_json_is_parseable(
+        self, _mock_build: MagicMock, mock_fetch: MagicMock, _mock_snapshot: MagicMock
+    ) -> None:
+        mock_fetch.return_value = [StockInfo(ticker="7203.T", name="Toyota", sector="", market_cap=0, per=9.0)]
+        result = self.runner.invoke(app, ["report", "--from-screen", "--json"])
+        assert result.exit_code == 0
+        # スクリーニングの進捗は標準エラーに出る
+        assert json.loads(result.stdout) == {"7203.T": None}
+
+    @patch("screening_test.core.stress_test.build_stress_test", return_value=None)
+    def test_stress_json_error(self, _mock_build: MagicMock) -> None:
+        result = self.runner.invoke(app, ["stress", "FAKE", "--json"])
+        assert result.exit_code == 1
+        assert '"error"' in result.output
+
+    @patch("screening_test.core.historical_stress.build_historical_stress_test", return_value=None)
+    def test_stress_historical_json_error(self, _mock_build: MagicMock) -> None:
+        result = self.runner.invoke(app, ["stress", "FAKE", "--historical", "--json"])
+        assert result.exit_code == 1
+        assert '"error"' in result.output
+
+    def test_corr_requires_two_tickers(self) -> None:
+        result = self.runner.invoke(app, ["corr", "AAPL"])
+        assert result.exit_code == 1
+        assert "2銘柄以上" in result.output
+
+    def test_var_requires_target(self) -> None:
+        result = self.runner.invoke(app, ["var", "--json"])
+        assert result.exit_code == 1
+        assert '"error"' in result.output
+
+    def test_portfolio_json_unsupported_action(self) -> None:
+        result = self.runner.invoke(app, ["portfolio", "buy", "--json"])
+        assert result.exit_code == 1
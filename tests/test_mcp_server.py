@@ -1,19 +1,37 @@
 """MCPサーバーのユニットテスト"""
 
+import asyncio
+import json
 import tempfile
+from datetime import date
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from pydantic import AnyUrl
+
+from screening_test import mcp_server
 from screening_test.core import portfolio, watchlist
+from screening_test.data import snapshots
+from screening_test.data.client import StockInfo
 from screening_test.mcp_server import (
+    correlation_matrix,
     mcp,
+    monte_carlo_var,
     portfolio_buy,
+    portfolio_health,
+    portfolio_rebalance,
     portfolio_sell,
     portfolio_show,
+    portfolio_stress_test,
     report,
+    report_batch,
     screen,
+    screen_page,
+    stress_ranking,
     stress_test,
     watchlist_add,
+    watchlist_alert_add,
+    watchlist_check,
     watchlist_remove,
     watchlist_show,
 )
@@ -68,6 +86,21 @@ class TestScreenTool:
         mock_run.assert_called_once_with(market="us", preset="growth", top_n=10)
 
 
+class TestScreenPageTool:
+    """screen_pageツールのテスト"""
+
+    @patch("screening_test.core.screening.screen_page")
+    def test_returns_page(self, mock_page: MagicMock) -> None:
+        from screening_test.core.screening import ScreenPage
+
+        mock_page.return_value = ScreenPage(market="jpx", preset="value", total=1, offset=0, results=[])
+        assert screen_page(page_size=10)["total"] == 1
+        mock_page.assert_called_once_with(market="jpx", preset="value", page_size=10, cursor=None)
+
+    def test_invalid_cursor(self) -> None:
+        assert "error" in screen_page(cursor="broken")
+
+
 class TestReportTool:
     """reportツールのテスト"""
 
@@ -78,6 +111,30 @@ class TestReportTool:
         mock_gen.assert_called_once_with("AAPL")
         assert result == "テストレポート"
 
+    @patch("screening_test.core.report.generate_reports")
+    def test_report_batch(self, mock_gen: MagicMock) -> None:
+        mock_gen.return_value = {"AAPL": "A", "MSFT": "M"}
+        result = report_batch(["AAPL", "MSFT"])
+        mock_gen.assert_called_once_with(["AAPL", "MSFT"])
+        assert result["MSFT"] == "M"
+
+    @patch("screening_test.core.report.build_report")
+    def test_report_json(self, mock_build: MagicMock) -> None:
+        mock_build.return_value.model_dump.return_value = {"value_score": 50.0}
+        result = report("AAPL", output_format="json")
+        assert result == {"value_score": 50.0}
+
+    @patch("screening_test.core.report.build_report", return_value=None)
+    def test_report_json_error(self, _mock_build: MagicMock) -> None:
+        result = report("FAKE", output_format="json")
+        assert isinstance(result, dict)
+        assert "error" in result
+
+    def test_report_invalid_format(self) -> None:
+        result = report("AAPL", output_format="xml")
+        assert isinstance(result, str)
+        assert "エラー" in result
+
 
 class TestPortfolioTools:
     """ポートフォリオツールのテスト"""
@@ -88,14 +145,17 @@ class TestPortfolioTools:
         self._patch_data_dir = patch.object(portfolio, "DATA_DIR", self.temp_path)
         self._patch_portfolio = patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv")
         self._patch_transactions = patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv")
+        self._patch_db = patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db")
         self._patch_data_dir.start()
         self._patch_portfolio.start()
         self._patch_transactions.start()
+        self._patch_db.start()
 
     def teardown_method(self) -> None:
         self._patch_data_dir.stop()
         self._patch_portfolio.stop()
         self._patch_transactions.stop()
+        self._patch_db.stop()
 
     def test_portfolio_show_empty(self) -> None:
         result = portfolio_show()
@@ -114,6 +174,31 @@ class TestPortfolioTools:
         result = portfolio_sell("FAKE", 10, 100.0)
         assert "エラー" in result
 
+    def test_portfolio_show_json(self) -> None:
+        portfolio_buy("7203.T", 100, 3000.0)
+        result = portfolio_show(output_format="json")
+        assert isinstance(result, dict)
+        assert result["positions"][0]["ticker"] == "7203.T"
+
+    def test_portfolio_stress_test_empty(self) -> None:
+        assert "空" in portfolio_stress_test()
+        assert "error" in portfolio_stress_test(output_format="json")
+
+    def test_portfolio_rebalance_empty(self) -> None:
+        assert "空" in portfolio_rebalance()
+        assert portfolio_rebalance(output_format="json") == {"error": "ポートフォリオは空です"}
+
+    def test_portfolio_health_empty(self) -> None:
+        result = portfolio_health()
+        assert "空" in result
+        assert portfolio_health(output_format="json") == {
+            "holdings": [],
+            "total_value": 0.0,
+            "total_cost": 0.0,
+            "total_pnl": 0.0,
+            "total_pnl_pct": 0.0,
+        }
+
 
 class TestStressTestTool:
     """ストレステストツールのテスト"""
@@ -125,6 +210,51 @@ class TestStressTestTool:
         mock_run.assert_called_once_with("7203.T")
         assert result == "ストレステスト結果"
 
+    @patch("screening_test.core.stress_test.build_stress_test", return_value=None)
+    def test_stress_test_json_error(self, _mock_build: MagicMock) -> None:
+        result = stress_test("FAKE", output_format="json")
+        assert isinstance(result, dict)
+        assert "error" in result
+
+    def test_stress_ranking_json_error(self) -> None:
+        result = stress_ranking("jpx", scenarios=["隕石衝突"], output_format="json")
+        assert isinstance(result, dict)
+        assert "不明なシナリオ" in result["error"]
+
+    @patch("screening_test.core.historical_stress.run_historical_stress_test")
+    def test_stress_test_historical(self, mock_run: MagicMock) -> None:
+        mock_run.return_value = "ヒストリカル結果"
+        assert stress_test("7203.T", historical=True) == "ヒストリカル結果"
+        mock_run.assert_called_once_with("7203.T")
+
+
+class TestCorrelationTool:
+    """相関行列ツールのテスト"""
+
+    def test_unknown_source(self) -> None:
+        result = correlation_matrix(source="universe", output_format="json")
+        assert isinstance(result, dict)
+        assert "不明な取得元" in result["error"]
+
+    def test_requires_two_tickers(self) -> None:
+        result = correlation_matrix(["AAPL"])
+        assert isinstance(result, str)
+        assert "2銘柄以上" in result
+
+
+class TestMonteCarloTool:
+    """モンテカルロVaRツールのテスト"""
+
+    def test_invalid_method_json(self) -> None:
+        result = monte_carlo_var("7203.T", method="garch", output_format="json")
+        assert isinstance(result, dict)
+        assert "シミュレーション手法" in result["error"]
+
+    def test_invalid_format(self) -> None:
+        result = monte_carlo_var("7203.T", output_format="xml")
+        assert isinstance(result, str)
+        assert "不明な出力形式" in result
+
 
 class TestWatchlistTools:
     """ウォッチリストツールのテスト"""
@@ -134,12 +264,15 @@ class TestWatchlistTools:
         self.temp_path = Path(self.temp_dir)
         self._patch_data_dir = patch.object(watchlist, "DATA_DIR", self.temp_path)
         self._patch_watchlist = patch.object(watchlist, "WATCHLIST_FILE", self.temp_path / "watchlist.csv")
+        self._patch_db = patch.object(watchlist, "DB_FILE", self.temp_path / "watchlist.db")
         self._patch_data_dir.start()
         self._patch_watchlist.start()
+        self._patch_db.start()
 
     def teardown_method(self) -> None:
         self._patch_data_dir.stop()
         self._patch_watchlist.stop()
+        self._patch_db.stop()
 
     def test_watchlist_show_empty(self) -> None:
         result = watchlist_show()
@@ -162,3 +295,74 @@ class TestWatchlistTools:
     def test_watchlist_remove_nonexistent(self) -> None:
         result = watchlist_remove("FAKE")
         assert "登録されていません" in result
+
+    def test_watchlist_show_json(self) -> None:
+        watchlist_add("AAPL", "AI期待")
+        result = watchlist_show(output_format="json")
+        assert isinstance(result, dict)
+        assert [e["ticker"] for e in result["entries"]] == ["AAPL"]
+        assert result["entries"][0]["per"] is None
+
+    def test_watchlist_alerts(self) -> None:
+        assert "エラー" in watchlist_alert_add("FAKE", "price_above", 100)
+        result = watchlist_check(output_format="json")
+        assert isinstance(result, dict)
+        assert result["rules"] == 0
+        assert result["triggered"] == []
+        assert "エラー" in watchlist_check(output_format="xml")
+
+
+class TestResources:
+    """snapshot:// リソースと更新通知のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+            patch.object(snapshots, "SNAPSHOT_DIR", self.temp_path / "snapshots"),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+        mcp_server._subscriptions.clear()
+        mcp_server._resource_versions.clear()
+
+    def _read(self, uri: str) -> dict:
+        contents = list(asyncio.run(mcp_server.mcp.read_resource(uri)))
+        return json.loads(contents[0].content)
+
+    def test_fundamentals_snapshot(self) -> None:
+        stock = StockInfo(ticker="7203.T", name="Toyota", sector="", market_cap=0, per=9.0)
+        snapshots.save_snapshot("jpx", [stock], as_of=date(2024, 1, 5))
+        payload = self._read("snapshot://jpx/fundamentals")
+        assert payload["as_of"] == "2024-01-05"
+        assert payload["stocks"][0]["per"] == 9.0
+
+    def test_positions(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        assert self._read("snapshot://portfolio/positions")["positions"][0]["ticker"] == "AAPL"
+
+    def test_notifies_subscribers_once_per_change(self) -> None:
+        uri = "snapshot://portfolio/positions"
+        session = MagicMock()
+        session.send_resource_updated = AsyncMock()
+        mcp_server._resource_versions[uri] = mcp_server._resource_version(uri)
+        mcp_server._subscriptions[uri].add(session)
+
+        assert asyncio.run(mcp_server.notify_resource_changes()) == []
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        assert asyncio.run(mcp_server.notify_resource_changes()) == [uri]
+        session.send_resource_updated.assert_awaited_once_with(AnyUrl(uri))
+        assert asyncio.run(mcp_server.notify_resource_changes()) == []
+
+    def test_resource_version_of_snapshot(self) -> None:
+        uri = "snapshot://us/fundamentals"
+        assert mcp_server._resource_version(uri) is None
+        snapshots.save_snapshot("us", [], as_of=date(2024, 1, 5))
+        assert mcp_server._resource_version(uri) is not None
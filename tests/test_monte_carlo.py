@@ -0,0 +1,144 @@
+"""モンテカルロ・リスクエンジンのユニットテスト"""
+
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core import monte_carlo, portfolio
+from screening_test.core.monte_carlo import (
+    build_monte_carlo,
+    run_monte_carlo,
+    simulate_portfolio_returns,
+    value_at_risk,
+)
+
+
+class FakeHistoryClient:
+    """決まった値動きの過去株価を返すテスト用クライアント"""
+
+    def __init__(self, tickers: list[str], n_days: int = 300) -> None:
+        rng = np.random.default_rng(0)
+        index = pd.bdate_range("2023-01-02", periods=n_days)
+        self.frames = {
+            t: pd.DataFrame({"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_days)))}, index=index)
+            for t in tickers
+        }
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        return {t: self.frames.get(t, pd.DataFrame()) for t in tickers}
+
+
+class TestSimulation:
+    """シミュレーション本体のテスト"""
+
+    def setup_method(self) -> None:
+        rng = np.random.default_rng(1)
+        self.returns = rng.multivariate_normal([0.0005, 0.0002], [[1e-4, 5e-5], [5e-5, 2e-4]], size=500)
+
+    def test_seed_is_reproducible(self) -> None:
+        weights = np.array([0.5, 0.5])
+        a = simulate_portfolio_returns(self.returns, weights, 10, 1000, rng=np.random.default_rng(7))
+        b = simulate_portfolio_returns(self.returns, weights, 10, 1000, rng=np.random.default_rng(7))
+        np.testing.assert_array_equal(a, b)
+
+    @pytest.mark.parametrize("method", ["normal", "bootstrap"])
+    def test_chunking_does_not_change_result(self, method: str) -> None:
+        weights = np.array([0.3, 0.7])
+        whole = simulate_portfolio_returns(self.returns, weights, 5, 1000, method, np.random.default_rng(3))
+        with patch.object(monte_carlo, "MAX_CHUNK_ELEMENTS", 64):
+            chunked = simulate_portfolio_returns(self.returns, weights, 5, 1000, method, np.random.default_rng(3))
+        np.testing.assert_allclose(whole, chunked)
+
+    def test_normal_horizon_scales_volatility(self) -> None:
+        weights = np.array([1.0, 0.0])
+        one_day = simulate_portfolio_returns(self.returns, weights, 1, 50_000, rng=np.random.default_rng(0))
+        ten_day = simulate_portfolio_returns(self.returns, weights, 10, 50_000, rng=np.random.default_rng(0))
+        assert ten_day.std() / one_day.std() == pytest.approx(np.sqrt(10), rel=0.05)
+
+    def test_bootstrap_constant_returns(self) -> None:
+        returns = np.full((50, 1), np.log(1.01))
+        simulated = simulate_portfolio_returns(returns, np.array([1.0]), 3, 100, "bootstrap")
+        np.testing.assert_allclose(simulated, 1.01**3 - 1)
+
+    def test_unknown_method(self) -> None:
+        with pytest.raises(ValueError, match="シミュレーション手法"):
+            simulate_portfolio_returns(self.returns, np.array([0.5, 0.5]), 1, 10, "garch")
+
+    @pytest.mark.slow
+    def test_large_book_is_interactive(self) -> None:
+        rng = np.random.default_rng(0)
+        returns = rng.normal(0, 0.01, size=(500, 100))
+        weights = np.full(100, 0.01)
+        start = time.perf_counter()
+        simulate_portfolio_returns(returns, weights, 10, 100_000, rng=rng)
+        assert time.perf_counter() - start < 10.0
+
+
+class TestValueAtRisk:
+    """VaR / CVaR計算のテスト"""
+
+    def test_uniform_losses(self) -> None:
+        returns = -np.arange(1, 101) / 100  # 損失 1%〜100%
+        result = value_at_risk(returns, 1000.0, horizon=1, confidences=[0.9])[0]
+        assert result.var_pct == pytest.approx(90.1)
+        assert result.cvar_pct == pytest.approx(np.arange(91, 101).mean())
+        assert result.var == pytest.approx(901.0)
+        assert result.cvar >= result.var
+
+
+class TestBuildMonteCarlo:
+    """銘柄・ポートフォリオ単位の推定のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_single_ticker(self) -> None:
+        client = FakeHistoryClient(["AAPL"])
+        result = build_monte_carlo("AAPL", n_paths=5000, client=client)  # type: ignore[arg-type]
+        assert result.target == "AAPL"
+        assert result.weights == [1.0]
+        assert len(result.results) == 4
+        one_day_95 = result.results[0]
+        assert 0 < one_day_95.var_pct < one_day_95.cvar_pct
+        assert result.results[2].var_pct > one_day_95.var_pct  # 10日VaRは1日VaRより大きい
+
+    def test_portfolio_weights_and_missing(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 100.0)
+        portfolio.buy_stock("MSFT", 30, 100.0)
+        portfolio.buy_stock("GONE", 5, 100.0)
+        client = FakeHistoryClient(["AAPL", "MSFT"])
+        result = build_monte_carlo(use_portfolio=True, n_paths=2000, horizons=[1], client=client)  # type: ignore[arg-type]
+        assert result.target == "portfolio"
+        assert result.tickers == ["AAPL", "MSFT"]
+        assert result.missing == ["GONE"]
+        assert sum(result.weights) == pytest.approx(1.0)
+
+    def test_same_seed_same_result(self) -> None:
+        client = FakeHistoryClient(["AAPL"])
+        a = build_monte_carlo("AAPL", n_paths=1000, seed=5, client=client)  # type: ignore[arg-type]
+        b = build_monte_carlo("AAPL", n_paths=1000, seed=5, client=client)  # type: ignore[arg-type]
+        assert a.results == b.results
+
+    def test_errors(self) -> None:
+        client = FakeHistoryClient([])
+        assert "エラー" in run_monte_carlo(client=client)  # type: ignore[arg-type]
+        assert "空" in run_monte_carlo(use_portfolio=True, client=client)  # type: ignore[arg-type]
+        assert "過去株価" in run_monte_carlo("NONE", client=client)  # type: ignore[arg-type]
+        assert "信頼水準" in run_monte_carlo("AAPL", confidences=[1.5], client=client)  # type: ignore[arg-type]
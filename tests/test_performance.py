@@ -0,0 +1,127 @@
+"""ポートフォリオ・パフォーマンスのユニットテスト"""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core import performance, portfolio
+from screening_test.core.performance import build_performance, render_performance, show_performance
+
+
+class FakeHistoryClient:
+    """表示する日数を後から増やせるテスト用クライアント"""
+
+    def __init__(self, closes: dict[str, list[float]], start: str = "2024-01-01") -> None:
+        n_days = max(len(v) for v in closes.values())
+        self.index = pd.bdate_range(start, periods=n_days)
+        self.closes = closes
+        self.visible = n_days
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        return {
+            t: pd.DataFrame({"Close": self.closes[t][: self.visible]}, index=self.index[: self.visible])
+            if t in self.closes
+            else pd.DataFrame()
+            for t in tickers
+        }
+
+
+def _trade(day: str, action: str, ticker: str, shares: int, price: float) -> None:
+    """日付を指定して取引履歴を記録"""
+    with portfolio._transaction(write=True) as conn:
+        conn.execute(
+            "INSERT INTO transactions (date, action, ticker, shares, price) VALUES (?, ?, ?, ?, ?)",
+            (f"{day}T10:00:00", action, ticker, shares, price),
+        )
+
+
+class TestPerformance:
+    """日次パフォーマンスの再構成のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+        ]
+        for p in self._patches:
+            p.start()
+        performance._memo.clear()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_no_transactions(self) -> None:
+        assert build_performance(FakeHistoryClient({"A": [1.0]})) is None  # type: ignore[arg-type]
+        assert "取引履歴がありません" in show_performance(FakeHistoryClient({"A": [1.0]}))  # type: ignore[arg-type]
+
+    def test_nav_and_flow_adjusted_returns(self) -> None:
+        client = FakeHistoryClient({"A": [100.0, 110.0, 99.0, 99.0, 120.0], "B": [50.0] * 5})
+        _trade("2024-01-01", "buy", "A", 10, 100.0)
+        _trade("2024-01-03", "buy", "B", 20, 50.0)  # 追加入金はリターンに含めない
+        _trade("2024-01-05", "sell", "A", 10, 120.0)
+
+        result = build_performance(client)  # type: ignore[arg-type]
+        assert result is not None
+        assert result.dates[0] == "2024-01-01"
+        np.testing.assert_allclose(result.nav, [1000.0, 1100.0, 1990.0, 1990.0, 1000.0])
+        np.testing.assert_allclose(result.net_flows, [1000.0, 0.0, 1000.0, 0.0, -1200.0])
+        # 2日目 +10%、3日目 Aが-10%（Bは購入価格のまま）、5日目 Aが+21.2%
+        assert result.cumulative_return_pct[1] == pytest.approx(10.0)
+        assert result.drawdown_pct[2] < 0
+        assert result.max_drawdown_pct == pytest.approx(min(result.drawdown_pct))
+        assert result.total_return_pct == pytest.approx(result.cumulative_return_pct[-1])
+
+    def test_weekend_trade_and_missing_history(self) -> None:
+        client = FakeHistoryClient({"A": [100.0, 100.0, 100.0]})
+        _trade("2023-12-30", "buy", "A", 1, 100.0)  # 土曜日 → 次の営業日
+        _trade("2024-01-02", "buy", "GONE", 5, 20.0)
+        result = build_performance(client)  # type: ignore[arg-type]
+        assert result is not None
+        assert result.missing == ["GONE"]
+        np.testing.assert_allclose(result.nav, [100.0, 200.0, 200.0])
+
+    def test_incremental_extension_matches_full(self) -> None:
+        rng = np.random.default_rng(0)
+        client = FakeHistoryClient({"A": list(100 * np.exp(np.cumsum(rng.normal(0, 0.02, 60))))})
+        _trade("2024-01-01", "buy", "A", 10, client.closes["A"][0])
+        client.visible = 50
+        build_performance(client)  # type: ignore[arg-type]
+
+        client.visible = 60
+        with patch.object(performance, "_trade_matrices", side_effect=AssertionError("全体を再計算した")):
+            extended = build_performance(client)  # type: ignore[arg-type]
+
+        performance._memo.clear()
+        full = build_performance(client)  # type: ignore[arg-type]
+        assert extended is not None
+        assert full is not None
+        assert extended.dates == full.dates
+        np.testing.assert_allclose(extended.cumulative_return_pct, full.cumulative_return_pct)
+        np.testing.assert_allclose(extended.drawdown_pct, full.drawdown_pct, atol=1e-9)
+        assert extended.max_drawdown_pct == pytest.approx(full.max_drawdown_pct)
+
+    def test_new_trade_invalidates_memo(self) -> None:
+        client = FakeHistoryClient({"A": [100.0, 100.0, 100.0]})
+        _trade("2024-01-01", "buy", "A", 1, 100.0)
+        build_performance(client)  # type: ignore[arg-type]
+        _trade("2024-01-02", "buy", "A", 1, 100.0)
+        result = build_performance(client)  # type: ignore[arg-type]
+        assert result is not None
+        assert result.nav[-1] == pytest.approx(200.0)
+
+    def test_render(self) -> None:
+        client = FakeHistoryClient({"A": [100.0, 110.0]})
+        _trade("2024-01-01", "buy", "A", 1, 100.0)
+        result = build_performance(client)  # type: ignore[arg-type]
+        assert result is not None
+        text = render_performance(result)
+        assert "累積リターン" in text
+        assert "2024-01-02" in text
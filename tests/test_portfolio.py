@@ -1,8 +1,9 @@
 """ポートフォリオ管理のユニットテスト"""
 
+import sqlite3
 import tempfile
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from screening_test.core import portfolio
 
@@ -16,14 +17,17 @@ class TestPortfolio:
         self._patch_data_dir = patch.object(portfolio, "DATA_DIR", self.temp_path)
         self._patch_portfolio = patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv")
         self._patch_transactions = patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv")
+        self._patch_db = patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db")
         self._patch_data_dir.start()
         self._patch_portfolio.start()
         self._patch_transactions.start()
+        self._patch_db.start()
 
     def teardown_method(self) -> None:
         self._patch_data_dir.stop()
         self._patch_portfolio.stop()
         self._patch_transactions.stop()
+        self._patch_db.stop()
 
     def test_show_empty_portfolio(self) -> None:
         result = portfolio.show_portfolio()
@@ -80,3 +84,135 @@ class TestPortfolio:
     def test_manage_portfolio_buy_missing_params(self) -> None:
         result = portfolio.manage_portfolio("buy", ticker="AAPL")
         assert "エラー" in result
+
+    def test_portfolio_view(self) -> None:
+        portfolio.buy_stock("7203.T", 100, 3000.0)
+        view = portfolio.get_portfolio_view()
+        assert [p.ticker for p in view.positions] == ["7203.T"]
+
+    @patch("screening_test.data.client.get_default_client")
+    def test_health_check_model(self, mock_get_client: MagicMock) -> None:
+        mock_get_client.return_value.get_quotes.return_value = {"7203.T": 3300.0, "FAIL": None}
+        portfolio.buy_stock("7203.T", 100, 3000.0)
+        portfolio.buy_stock("FAIL", 10, 100.0)
+
+        result = portfolio.build_health_check()
+        mock_get_client.return_value.get_quotes.assert_called_once_with(["7203.T", "FAIL"])
+        mock_get_client.return_value.get_stock_info.assert_not_called()
+        assert result.total_value == 330000.0
+        assert result.total_pnl == 30000.0
+        assert result.holdings[1].pnl is None
+        text = portfolio.render_health_check(result)
+        assert "FAIL: データ取得失敗" in text
+
+
+class TestPortfolioStore:
+    """SQLiteストアのテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_migrates_legacy_csv(self) -> None:
+        (self.temp_path / "portfolio.csv").write_text(
+            "ticker,shares,avg_price,last_updated\n7203.T,100,3000.0,2024-01-05T10:00:00\n"
+        )
+        (self.temp_path / "transactions.csv").write_text(
+            "date,action,ticker,shares,price\n2024-01-05T10:00:00,buy,7203.T,100,3000.0\n"
+        )
+        assert portfolio._load_portfolio()["7203.T"].shares == 100
+        portfolio.buy_stock("7203.T", 100, 3200.0)
+        # 取り込みは初回のみ（再読み込みで重複しない）
+        transactions = portfolio.get_transactions("7203.T")
+        assert [(t.action, t.shares, t.price) for t in transactions] == [("buy", 100, 3000.0), ("buy", 100, 3200.0)]
+        assert portfolio._load_portfolio()["7203.T"].avg_price == 3100.0
+
+    def test_transaction_queries(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        portfolio.buy_stock("MSFT", 5, 300.0)
+        portfolio.sell_stock("AAPL", 4, 170.0)
+        assert [t.action for t in portfolio.get_transactions("AAPL")] == ["buy", "sell"]
+        assert len(portfolio.get_transactions()) == 3
+        today = portfolio.get_transactions()[0].date[:10]
+        assert len(portfolio.get_transactions(start=today, end=today)) == 3
+        assert portfolio.get_transactions(end="2000-01-01") == []
+
+    def test_failed_sell_leaves_no_transaction(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        assert "エラー" in portfolio.sell_stock("AAPL", 50, 170.0)
+        assert len(portfolio.get_transactions()) == 1
+        assert portfolio._load_portfolio()["AAPL"].shares == 10
+
+    def test_upgrades_version1_schema(self) -> None:
+        with sqlite3.connect(self.temp_path / "portfolio.db") as conn:
+            for statement in portfolio.SCHEMA:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO transactions (date, action, ticker, shares, price) VALUES ('2024', 'buy', 'A', 1, 1.0)"
+            )
+            conn.execute("PRAGMA user_version = 1")
+        conn.close()
+        portfolio.buy_stock("A", 1, 2.0)
+        assert [t.lot_id for t in portfolio.get_transactions()] == [None, None]
+        assert [t.id for t in portfolio.get_transactions(after_id=1)] == [2]
+
+    def test_sell_specific_lot(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        portfolio.buy_stock("AAPL", 10, 100.0)
+        assert "+600.00" in portfolio.sell_stock("AAPL", 5, 220.0, lot_id=2)
+        assert portfolio.get_transactions()[-1].lot_id == 2
+        assert "エラー" in portfolio.sell_stock("AAPL", 6, 220.0, lot_id=2)
+        assert "エラー" in portfolio.sell_stock("AAPL", 1, 220.0, lot_id=99)
+
+    def test_fifo_sell_matches_lot_ledger(self) -> None:
+        from screening_test.core.lots import LotLedger
+
+        portfolio.buy_stock("AAPL", 10, 100.0)
+        portfolio.buy_stock("AAPL", 10, 200.0)
+        result = portfolio.sell_stock("AAPL", 10, 150.0)
+        ledger = LotLedger(portfolio.get_transactions())
+        realized = ledger.realized_by_ticker(portfolio.get_transactions()[-1].date[:4])["AAPL"]
+        assert realized == 500.0
+        assert f"損益: {realized:+.2f}" in result
+        # 平均取得単価は残ったロット（200円×10株）の単価
+        assert portfolio._load_portfolio()["AAPL"].avg_price == 200.0
+
+    def test_sell_shares_held_before_history_use_avg_price(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 100.0)
+        with portfolio._transaction(write=True) as conn:
+            conn.execute("UPDATE positions SET shares = 15, avg_price = 120.0")  # 取引履歴のない5株を含む
+        assert "+560.00" in portfolio.sell_stock("AAPL", 12, 150.0)  # 10株×50円 + 2株×(150-120)円
+        assert portfolio._load_portfolio()["AAPL"].avg_price == 120.0
+
+    def test_positions_cached_until_store_changes(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        assert portfolio._load_portfolio()["AAPL"].shares == 10
+        with patch.object(portfolio, "_transaction", side_effect=AssertionError("再読み込みした")):
+            assert portfolio._load_portfolio()["AAPL"].shares == 10
+
+        # 別のプロセス（CLI）からの書き込みを再現
+        with sqlite3.connect(self.temp_path / "portfolio.db") as conn:
+            conn.execute("UPDATE positions SET shares = 3 WHERE ticker = 'AAPL'")
+        conn.close()
+        assert portfolio._load_portfolio()["AAPL"].shares == 3
+        portfolio.sell_stock("AAPL", 1, 170.0)
+        assert portfolio.get_portfolio_view().positions[0].shares == 2
+
+    def test_transaction_lookup_uses_index(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 150.0)
+        with sqlite3.connect(self.temp_path / "portfolio.db") as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE ticker = ? AND date >= ?", ("AAPL", "2024")
+            ).fetchall()
+        assert "idx_transactions_ticker_date" in str(plan)
@@ -0,0 +1,127 @@
+"""バックグラウンドの先読みのユニットテスト"""
+
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from screening_test.core import portfolio, prefetch, watchlist
+from screening_test.core.prefetch import Prefetcher, due_tickers, parse_targets, prefetch_tickers
+from screening_test.data.client import StockInfo, YFinanceClient
+from screening_test.data.scheduler import Priority
+
+
+class FakeClient(YFinanceClient):
+    """通信せずに銘柄情報を返すクライアント（FAILは取得失敗、取得したティッカーとバックグラウンドかを記録）"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.scheduler.interval = 0.0
+        self.scheduler.idle_seconds = {}
+        self.fetched: list[tuple[str, bool]] = []
+
+    def get_stock_info(self, ticker: str, refresh: bool = False) -> StockInfo | None:
+        cached = None if refresh else self._get_cached(ticker)
+        if cached is not None:
+            return StockInfo(**cached)
+        self._rate_limit()
+        self.fetched.append((ticker, self._current_priority() == Priority.BACKGROUND))
+        if ticker == "FAIL":
+            return None
+        info = StockInfo(ticker=ticker, name=ticker, sector="", market_cap=0)
+        self._set_cache(ticker, info.model_dump())
+        return info
+
+
+class TestPrefetch:
+    """先読み対象と取り直しのテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+            patch.object(watchlist, "DATA_DIR", self.temp_path),
+            patch.object(watchlist, "WATCHLIST_FILE", self.temp_path / "watchlist.csv"),
+            patch.object(watchlist, "DB_FILE", self.temp_path / "watchlist.db"),
+            patch.object(prefetch, "get_tickers", return_value=["M1", "HELD"]),
+            patch.dict(prefetch.MARKET_TICKERS, {"test": list}),
+        ]
+        for p in self._patches:
+            p.start()
+        portfolio.buy_stock("HELD", 10, 100.0)
+        watchlist.add_to_watchlist("WATCH")
+        self.client = FakeClient()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_parse_targets(self) -> None:
+        assert parse_targets(None) == []
+        assert parse_targets(" test, watchlist ,test") == ["test", "watchlist"]
+        with pytest.raises(ValueError, match="不明な先読み対象"):
+            parse_targets("nowhere")
+
+    def test_targets_in_priority_order(self) -> None:
+        assert prefetch_tickers(["test", "watchlist", "portfolio"]) == ["HELD", "WATCH", "M1"]
+        assert prefetch_tickers(["watchlist"]) == ["WATCH"]
+
+    def test_due_tickers(self) -> None:
+        now = datetime.now()
+        self.client._set_cache("SOON", {}, ttl=timedelta(minutes=10))
+        self.client._set_cache("SOONER", {}, ttl=timedelta(minutes=5))
+        self.client._set_cache("FRESH", {})
+        assert due_tickers(self.client, ["NEW", "SOON", "FRESH", "SOONER"], now) == ["SOONER", "SOON", "NEW"]
+
+    def test_run_once_refreshes_in_background(self) -> None:
+        prefetcher = Prefetcher(["portfolio", "watchlist"], client=self.client)
+        assert prefetcher.run_once() == 2
+        assert self.client.fetched == [("HELD", True), ("WATCH", True)]
+        # キャッシュが新しい間は取り直さない
+        assert prefetcher.run_once() == 0
+        assert len(self.client.fetched) == 2
+
+    def test_failed_ticker_is_not_retried_every_cycle(self) -> None:
+        watchlist.add_to_watchlist("FAIL")
+        prefetcher = Prefetcher(["watchlist"], client=self.client)
+        prefetcher.run_once()
+        prefetcher.run_once()
+        assert self.client.fetched.count(("FAIL", True)) == 1
+
+    def test_start_and_stop(self) -> None:
+        prefetcher = Prefetcher(["watchlist"], client=self.client, cycle_seconds=60)
+        prefetcher.start()
+        deadline = time.monotonic() + 5
+        while not self.client.fetched and time.monotonic() < deadline:
+            time.sleep(0.01)
+        prefetcher.stop(timeout=5)
+        assert self.client.fetched == [("WATCH", True)]
+
+    def test_stop_interrupts_wait_for_budget(self) -> None:
+        # 1件でバックグラウンドの上限に達し、2件目は60秒近く枠を待つ
+        self.client.scheduler.budgets = {Priority.BACKGROUND: 1}
+        prefetcher = Prefetcher(["portfolio", "watchlist"], client=self.client, cycle_seconds=60)
+        prefetcher.start()
+        deadline = time.monotonic() + 5
+        while not self.client.fetched and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        start = time.monotonic()
+        prefetcher.stop(timeout=5)
+        assert time.monotonic() - start < 1
+        assert self.client.fetched == [("HELD", True)]
+        assert self.client.scheduler._waiting == []
+
+    def test_from_env(self) -> None:
+        with patch.dict("os.environ", {prefetch.PREFETCH_ENV: ""}):
+            assert prefetch.prefetcher_from_env() is None
+        with patch.dict("os.environ", {prefetch.PREFETCH_ENV: "watchlist"}):
+            prefetcher = prefetch.prefetcher_from_env()
+        assert prefetcher is not None
+        assert prefetcher.targets == ["watchlist"]
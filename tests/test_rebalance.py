@@ -0,0 +1,172 @@
+"""リバランス最適化のユニットテスト"""
+
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core import covariance, portfolio
+from screening_test.core.rebalance import (
+    build_rebalance,
+    optimize_weights,
+    project_capped_simplex,
+    project_l1_ball,
+    render_rebalance,
+    run_rebalance,
+)
+
+
+class FakeClient:
+    """値動きとセクターが決まったテスト用クライアント（HIGHは高リターン）"""
+
+    def __init__(self, n_days: int = 300) -> None:
+        rng = np.random.default_rng(0)
+        index = pd.bdate_range("2023-01-02", periods=n_days)
+        drifts = {"HIGH": 0.002, "MID": 0.0005, "LOW": 0.0, "BANK": 0.001}
+        self.frames = {
+            t: pd.DataFrame({"Close": 100 * np.exp(np.cumsum(rng.normal(drift, 0.01, n_days)))}, index=index)
+            for t, drift in drifts.items()
+        }
+        self.sectors = {"HIGH": "Technology", "MID": "Technology", "LOW": "Utilities", "BANK": "Financial"}
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        return {t: self.frames.get(t, pd.DataFrame()) for t in tickers}
+
+    def get_stock_info_batch(self, tickers: list[str]) -> dict[str, SimpleNamespace | None]:
+        return {t: SimpleNamespace(sector=self.sectors[t]) if t in self.sectors else None for t in tickers}
+
+
+class TestProjections:
+    """制約集合への射影のテスト"""
+
+    def test_capped_simplex(self) -> None:
+        rng = np.random.default_rng(0)
+        v = rng.normal(0, 0.2, 50)
+        w = project_capped_simplex(v, 0.05, 1.0)
+        assert w.sum() == pytest.approx(1.0)
+        assert w.min() >= 0
+        assert w.max() <= 0.05 + 1e-12
+        # 射影はvとの距離が最小（ランダムな実行可能点より近い）
+        other = project_capped_simplex(rng.normal(0, 0.2, 50), 0.05, 1.0)
+        assert np.linalg.norm(w - v) <= np.linalg.norm(other - v)
+
+    def test_l1_ball(self) -> None:
+        center = np.array([0.5, 0.5, 0.0])
+        w = project_l1_ball(np.array([1.0, 0.0, 0.0]), center, 0.4)
+        np.testing.assert_allclose(w, [0.7, 0.3, 0.0])
+        inside = np.array([0.55, 0.45, 0.0])
+        np.testing.assert_array_equal(project_l1_ball(inside, center, 0.4), inside)
+
+
+class TestOptimizeWeights:
+    """平均分散最適化のテスト"""
+
+    def setup_method(self) -> None:
+        rng = np.random.default_rng(0)
+        returns = rng.normal(0.0004, 0.015, (500, 300)) + rng.normal(0, 0.01, (500, 1))
+        self.cov = np.cov(returns, rowvar=False) * 252
+        self.mu = returns.mean(axis=0) * 252
+        self.current = rng.dirichlet(np.ones(300))
+        self.sectors = rng.integers(0, 11, 300)
+
+    def test_unconstrained_two_assets_matches_closed_form(self) -> None:
+        cov = np.array([[0.04, 0.0], [0.0, 0.04]])
+        mu = np.array([0.10, 0.06])
+        w, _ = optimize_weights(mu, cov, np.array([0.5, 0.5]), max_weight=1.0, risk_aversion=5.0)
+        # 和=1の制約付き解析解: w1 - w2 = (μ1 - μ2) / (λσ²)
+        np.testing.assert_allclose(w, [0.6, 0.4], atol=1e-5)
+
+    def test_constraints_hold(self) -> None:
+        w, _ = optimize_weights(
+            self.mu, self.cov, self.current, max_weight=0.05, sector_ids=self.sectors, sector_cap=0.2, turnover=0.5
+        )
+        assert w.sum() == pytest.approx(1.0)
+        assert w.max() <= 0.05 + 1e-9
+        assert np.bincount(self.sectors, weights=w).max() <= 0.2 + 1e-4
+        assert np.abs(w - self.current).sum() <= 0.5 + 1e-4
+
+        def utility(x: np.ndarray) -> float:
+            return float(self.mu @ x - 1.5 * x @ self.cov @ x)
+
+        assert utility(w) > utility(self.current)
+
+    @pytest.mark.slow
+    def test_few_hundred_assets_is_fast(self) -> None:
+        start = time.perf_counter()
+        optimize_weights(
+            self.mu, self.cov, self.current, max_weight=0.05, sector_ids=self.sectors, sector_cap=0.2, turnover=0.5
+        )
+        assert time.perf_counter() - start < 1.0
+
+
+class TestBuildRebalance:
+    """保有銘柄からのリバランス案のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+        ]
+        for p in self._patches:
+            p.start()
+        covariance._cache.clear()
+        self.client = FakeClient()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_orders_move_towards_target(self) -> None:
+        portfolio.buy_stock("LOW", 100, 100.0)
+        portfolio.buy_stock("MID", 100, 100.0)
+        result = build_rebalance(["HIGH", "BANK"], max_weight=0.4, client=self.client)  # type: ignore[arg-type]
+        weights = {w.ticker: w.target_weight for w in result.weights}
+        assert sum(weights.values()) == pytest.approx(1.0)
+        assert weights["HIGH"] == pytest.approx(0.4, abs=1e-4)
+        assert result.feasible
+        assert result.violations == []
+        assert "近似解" not in render_rebalance(result)
+        # 満たせなかった制約を表示する（回転率の上限がなくても銘柄の上限で起こりうる）
+        infeasible = result.model_copy(update={"feasible": False, "violations": ["銘柄のウェイト上限"]})
+        assert "銘柄のウェイト上限を満たす解が見つからない" in render_rebalance(infeasible)
+        assert "売買回転率の上限" not in render_rebalance(infeasible)
+        assert result.target_return_pct > result.current_return_pct
+        assert any(o.ticker == "HIGH" and o.action == "buy" for o in result.orders)
+        assert result.orders[0].action == "sell"  # 売り注文を先に並べる
+        assert "売買注文" in render_rebalance(result)
+
+    def test_sector_cap_and_turnover(self) -> None:
+        portfolio.buy_stock("LOW", 100, 100.0)
+        portfolio.buy_stock("BANK", 100, 100.0)
+        result = build_rebalance(
+            ["HIGH", "MID"],
+            max_weight=0.5,
+            sector_cap=0.5,
+            turnover=0.4,
+            client=self.client,  # type: ignore[arg-type]
+        )
+        tech = sum(w.target_weight for w in result.weights if w.sector == "Technology")
+        assert tech <= 0.5 + 1e-4
+        assert result.turnover <= 0.4 + 1e-4
+
+    def test_missing_history_is_fixed(self) -> None:
+        portfolio.buy_stock("GONE", 10, 100.0)
+        portfolio.buy_stock("LOW", 10, 100.0)
+        result = build_rebalance(["HIGH"], max_weight=1.0, client=self.client)  # type: ignore[arg-type]
+        assert result.fixed == ["GONE"]
+        assert sum(w.target_weight for w in result.weights) == pytest.approx(1 - 1000 / result.total_value, abs=1e-6)
+
+    def test_errors(self) -> None:
+        assert "空" in run_rebalance(client=self.client)  # type: ignore[arg-type]
+        portfolio.buy_stock("LOW", 10, 100.0)
+        assert "不足" in run_rebalance(client=self.client)  # type: ignore[arg-type]
+        assert "届きません" in run_rebalance(["HIGH"], max_weight=0.3, client=self.client)  # type: ignore[arg-type]
+        assert "0〜1" in run_rebalance(["HIGH"], max_weight=1.5, client=self.client)  # type: ignore[arg-type]
@@ -0,0 +1,102 @@
+"""財務分析レポート生成のユニットテスト"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from screening_test.core.report import build_report, generate_report, generate_reports, render_report, save_reports
+from screening_test.data.client import StockInfo
+
+
+class FakeClient:
+    """銘柄情報の取得回数を記録するテスト用クライアント"""
+
+    def __init__(self) -> None:
+        self.batch_calls: list[list[str]] = []
+        self.history_calls: list[list[str]] = []
+
+    def get_historical_data(self, ticker: str, period: str = "1y") -> pd.DataFrame:
+        return self.get_historical_data_batch([ticker], period)[ticker]
+
+    def get_historical_data_batch(self, tickers: list[str], period: str = "1y") -> dict[str, pd.DataFrame]:  # noqa: ARG002
+        self.history_calls.append(tickers)
+        index = pd.bdate_range("2024-01-01", periods=30)
+        return {t: pd.DataFrame({"Close": np.linspace(100.0, 130.0, 30)}, index=index) for t in tickers}
+
+    def get_stock_info(self, ticker: str) -> StockInfo | None:
+        return self.get_stock_info_batch([ticker])[ticker]
+
+    def get_stock_info_batch(self, tickers: list[str]) -> dict[str, StockInfo | None]:
+        self.batch_calls.append(tickers)
+        return {
+            t: None
+            if t == "FAIL"
+            else StockInfo(ticker=t, name=f"{t} Corp", sector="Technology", market_cap=1e9, per=10.0)
+            for t in dict.fromkeys(tickers)
+        }
+
+
+class TestGenerateReport:
+    """レポート生成のテスト"""
+
+    def test_single_report(self) -> None:
+        result = generate_report("AAPL", client=FakeClient())  # type: ignore[arg-type]
+        assert "AAPL Corp" in result
+        assert "バリュースコア" in result
+
+    def test_build_report_model(self) -> None:
+        result = build_report("AAPL", client=FakeClient())  # type: ignore[arg-type]
+        assert result is not None
+        assert result.stock.ticker == "AAPL"
+        assert result.scores.per == 20.0
+        assert result.value_score == 20.0
+        assert result.verdict == "割高"
+        assert "判定: 割高" in render_report(result)
+
+    def test_build_report_without_technicals(self) -> None:
+        client = FakeClient()
+        result = build_report("AAPL", client=client, include_technicals=False)  # type: ignore[arg-type]
+        assert result is not None
+        assert result.technicals is None
+        assert client.history_calls == []
+        assert "テクニカル指標" not in render_report(result)
+
+    def test_build_report_missing(self) -> None:
+        assert build_report("FAIL", client=FakeClient()) is None  # type: ignore[arg-type]
+
+    def test_single_report_error(self) -> None:
+        result = generate_report("FAIL", client=FakeClient())  # type: ignore[arg-type]
+        assert "エラー" in result
+
+    def test_batch_uses_one_fetch_pass(self) -> None:
+        client = FakeClient()
+        reports = generate_reports(["AAPL", "MSFT", "FAIL"], client=client)  # type: ignore[arg-type]
+        assert len(client.batch_calls) == 1
+        assert client.history_calls == [["AAPL", "MSFT"]]
+        assert "テクニカル指標" in reports["AAPL"]
+        assert list(reports) == ["AAPL", "MSFT", "FAIL"]
+        assert "MSFT Corp" in reports["MSFT"]
+        assert "エラー" in reports["FAIL"]
+
+
+class TestSaveReports:
+    """レポート保存のテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self.reports = {"AAPL": "[bold]Apple[/bold]", "7203.T": "[green]Toyota[/green]"}
+
+    def test_save_to_directory_strips_markup(self) -> None:
+        written = save_reports(self.reports, output_dir=self.temp_path / "reports")
+        assert len(written) == 2
+        assert (self.temp_path / "reports" / "AAPL.txt").read_text(encoding="utf-8") == "Apple\n"
+
+    def test_save_to_single_file(self) -> None:
+        output = self.temp_path / "all.txt"
+        save_reports(self.reports, output_file=output)
+        content = output.read_text(encoding="utf-8")
+        assert "===== AAPL =====" in content
+        assert "Toyota" in content
+        assert "[green]" not in content
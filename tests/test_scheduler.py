@@ -0,0 +1,109 @@
+"""API呼び出しのスケジューラのユニットテスト"""
+
+import threading
+import time
+
+import pytest
+
+from screening_test.data.scheduler import Priority, RequestCancelledError, RequestScheduler
+
+
+def _queue(scheduler: RequestScheduler, priorities: list[Priority]) -> list[Priority]:
+    """枠が埋まっている間に指定の順で呼び出しを並べ、割り当てられた順を返す"""
+    order: list[Priority] = []
+    lock = threading.Lock()
+
+    def worker(priority: Priority) -> None:
+        scheduler.acquire(priority)
+        with lock:
+            order.append(priority)
+
+    scheduler.acquire()
+    threads = [threading.Thread(target=worker, args=(p,)) for p in priorities]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)  # 到着順を確定させる
+    for thread in threads:
+        thread.join(5)
+    return order
+
+
+class TestRequestScheduler:
+    """優先度・上限・空き枠の割り当てのテスト"""
+
+    def test_spaces_calls(self) -> None:
+        scheduler = RequestScheduler(interval=0.05)
+        starts = []
+        for _ in range(3):
+            scheduler.acquire()
+            starts.append(time.monotonic())
+        assert starts[2] - starts[0] >= 0.09
+
+    def test_higher_priority_overtakes_queued_work(self) -> None:
+        scheduler = RequestScheduler(interval=0.2, idle_seconds={})
+        order = _queue(scheduler, [Priority.BACKGROUND, Priority.BATCH, Priority.BATCH, Priority.INTERACTIVE])
+        assert order == [Priority.INTERACTIVE, Priority.BATCH, Priority.BATCH, Priority.BACKGROUND]
+
+    def test_interactive_latency_bounded_during_batch(self) -> None:
+        scheduler = RequestScheduler(interval=0.02)
+        stop = threading.Event()
+
+        def batch() -> None:
+            while not stop.is_set():
+                scheduler.acquire(Priority.BATCH)
+
+        workers = [threading.Thread(target=batch) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        time.sleep(0.1)
+        start = time.monotonic()
+        scheduler.acquire(Priority.INTERACTIVE)
+        latency = time.monotonic() - start
+        stop.set()
+        for worker in workers:
+            worker.join(5)
+        # 待っている一括処理の後ろには並ばない（FIFOなら4枠分待つ）
+        assert latency < 0.06
+
+    def test_budget_per_window(self) -> None:
+        scheduler = RequestScheduler(interval=0.0, budgets={Priority.BATCH: 2}, window=0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            scheduler.acquire(Priority.BATCH)
+        assert time.monotonic() - start >= 0.19
+        # 上限のないクラスは待たない
+        start = time.monotonic()
+        scheduler.acquire(Priority.INTERACTIVE)
+        assert time.monotonic() - start < 0.05
+
+    def test_budget_blocked_class_does_not_block_others(self) -> None:
+        scheduler = RequestScheduler(interval=0.0, budgets={Priority.INTERACTIVE: 1}, idle_seconds={}, window=0.5)
+        scheduler.acquire(Priority.INTERACTIVE)
+        done = threading.Event()
+        blocked = threading.Thread(target=lambda: (scheduler.acquire(Priority.INTERACTIVE), done.set()))
+        blocked.start()
+        time.sleep(0.02)
+        start = time.monotonic()
+        scheduler.acquire(Priority.BACKGROUND)
+        assert time.monotonic() - start < 0.1
+        assert not done.is_set()
+        blocked.join(5)
+
+    def test_background_waits_for_idle(self) -> None:
+        scheduler = RequestScheduler(interval=0.0, idle_seconds={Priority.BACKGROUND: 0.1})
+        scheduler.acquire(Priority.BATCH)
+        start = time.monotonic()
+        scheduler.acquire(Priority.BACKGROUND)
+        assert time.monotonic() - start >= 0.09
+
+    def test_cancel_interrupts_wait(self) -> None:
+        scheduler = RequestScheduler(interval=0.0, budgets={Priority.BACKGROUND: 1}, idle_seconds={}, window=60)
+        scheduler.acquire(Priority.BACKGROUND)
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        start = time.monotonic()
+        with pytest.raises(RequestCancelledError):
+            scheduler.acquire(Priority.BACKGROUND, cancel)
+        assert time.monotonic() - start < 1
+        # 取り消した呼び出しは枠を使わない
+        scheduler.acquire(Priority.INTERACTIVE)
@@ -0,0 +1,95 @@
+"""スクリーニングエンジンのユニットテスト"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from screening_test.core import screening
+from screening_test.core.screening import run_screening, screen_page
+from screening_test.data.client import StockInfo
+
+
+def _client() -> MagicMock:
+    """ティッカーの順にPERが高くなる（value プリセットでスコアが下がる）銘柄を返すテスト用クライアント"""
+    client = MagicMock()
+    client.get_stock_info_batch.side_effect = lambda tickers: {
+        t: StockInfo(ticker=t, name=t, sector="", market_cap=0, per=5.0 + i * 0.1) for i, t in enumerate(tickers)
+    }
+    return client
+
+
+class TestScreenPage:
+    """結果セットを保持したページ送りのテスト"""
+
+    def setup_method(self) -> None:
+        screening._result_sets.clear()
+        self.tickers = [f"T{i:04d}" for i in range(250)]
+        self._patches = [
+            patch.object(screening, "get_tickers", return_value=self.tickers),
+            patch.object(screening, "save_snapshot"),
+        ]
+        for p in self._patches:
+            p.start()
+        self.client = _client()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+        screening._result_sets.clear()
+
+    def test_pages_through_whole_ranking_once(self) -> None:
+        seen: list[str] = []
+        cursor = None
+        while True:
+            page = screen_page(page_size=100, cursor=cursor, client=self.client)
+            seen += [r["ticker"] for r in page.results]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert page.total == 250
+        assert page.offset == 200
+        assert seen == [r["ticker"] for r in run_screening(top_n=250, client=self.client, record_snapshot=False)]
+        assert len(seen) == 250
+        # ページ送りでは再計算しない（run_screeningの1回分を除く）
+        assert self.client.get_stock_info_batch.call_count == 2
+
+    def test_first_page_reuses_fresh_result_set(self) -> None:
+        first = screen_page(page_size=10, client=self.client)
+        again = screen_page(page_size=10, client=self.client)
+        assert first.results == again.results
+        assert self.client.get_stock_info_batch.call_count == 1
+        screen_page(preset="growth", page_size=10, client=self.client)
+        assert self.client.get_stock_info_batch.call_count == 2
+
+    def test_expired_and_invalid_cursor(self) -> None:
+        page = screen_page(page_size=10, client=self.client)
+        assert page.next_cursor is not None
+        with (
+            patch.object(screening.time, "monotonic", return_value=1e12),
+            pytest.raises(ValueError, match="有効期限"),
+        ):
+            screen_page(cursor=page.next_cursor, client=self.client)
+        with pytest.raises(ValueError, match="形式"):
+            screen_page(cursor="not-a-cursor", client=self.client)
+        with pytest.raises(ValueError, match="page_size"):
+            screen_page(page_size=0, client=self.client)
+
+    def test_result_sets_are_bounded(self) -> None:
+        for i in range(screening.RESULT_SET_LIMIT + 3):
+            screen_page(market=f"m{i}", page_size=1, client=self.client)
+        assert len(screening._result_sets) == screening.RESULT_SET_LIMIT
+
+    def test_first_page_and_resource_use_newest_result_set(self) -> None:
+        for i, tickers in enumerate((["OLD"], ["NEW"])):
+            screening._result_sets[f"set{i}"] = screening._ResultSet(
+                market="jpx",
+                preset="value",
+                created_at=time.monotonic(),
+                results=[{"ticker": t} for t in tickers],
+            )
+        page = screen_page(page_size=10, client=self.client)
+        found = screening.get_result_set("jpx", "value")
+        assert found is not None
+        assert page.results == found[1] == [{"ticker": "NEW"}]
+        self.client.get_stock_info_batch.assert_not_called()
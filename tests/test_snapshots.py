@@ -0,0 +1,58 @@
+"""ファンダメンタルズスナップショットのユニットテスト"""
+
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest.mock import patch
+
+from screening_test.data import snapshots
+from screening_test.data.client import StockInfo
+
+
+class TestSnapshots:
+    """スナップショットの保存・読み込みテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patch_dir = patch.object(snapshots, "SNAPSHOT_DIR", self.temp_path)
+        self._patch_dir.start()
+
+    def teardown_method(self) -> None:
+        self._patch_dir.stop()
+
+    def test_load_empty(self) -> None:
+        assert snapshots.load_snapshots("jpx") == {}
+
+    def test_save_and_load(self) -> None:
+        stock = StockInfo(ticker="7203.T", name="Toyota", sector="Consumer Cyclical", market_cap=1.0, per=10.0)
+        snapshots.save_snapshot("jpx", [stock], as_of=date(2024, 1, 5))
+        snapshots.save_snapshot("jpx", [stock], as_of=date(2023, 12, 1))
+        loaded = snapshots.load_snapshots("jpx")
+        assert list(loaded) == [date(2023, 12, 1), date(2024, 1, 5)]
+        assert loaded[date(2024, 1, 5)][0].per == 10.0
+
+    def test_same_day_overwrites(self) -> None:
+        first = StockInfo(ticker="A", name="A", sector="", market_cap=0)
+        second = StockInfo(ticker="B", name="B", sector="", market_cap=0)
+        snapshots.save_snapshot("us", [first], as_of=date(2024, 1, 5))
+        snapshots.save_snapshot("us", [second], as_of=date(2024, 1, 5))
+        loaded = snapshots.load_snapshots("us")
+        assert [s.ticker for s in loaded[date(2024, 1, 5)]] == ["B"]
+
+    def test_ignores_unrelated_files(self) -> None:
+        (self.temp_path / "jpx").mkdir()
+        (self.temp_path / "jpx" / "notes.json").write_text("[]")
+        assert snapshots.load_snapshots("jpx") == {}
+
+    def test_load_latest_only(self) -> None:
+        assert snapshots.load_latest_snapshot("jpx") is None
+        (self.temp_path / "jpx").mkdir()
+        (self.temp_path / "jpx" / "notes.json").write_text("not json")
+        old = StockInfo(ticker="OLD", name="", sector="", market_cap=0)
+        new = StockInfo(ticker="NEW", name="", sector="", market_cap=0)
+        snapshots.save_snapshot("jpx", [new], as_of=date(2024, 1, 5))
+        snapshots.save_snapshot("jpx", [old], as_of=date(2023, 12, 1))
+        latest = snapshots.load_latest_snapshot("jpx")
+        assert latest is not None
+        assert latest[0] == date(2024, 1, 5)
+        assert [s.ticker for s in latest[1]] == ["NEW"]
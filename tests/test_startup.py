@@ -0,0 +1,67 @@
+"""CLIの起動時間のテスト: 通信・DataFrameを使わないコマンドで重いモジュールを読み込まない"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import screening_test
+
+SRC_DIR = Path(screening_test.__file__).resolve().parents[1]
+HEAVY_MODULES = ["pandas", "numpy", "yfinance"]
+
+# 新しいプロセスでコマンドを実行し、読み込みから終了までの秒数と読み込まれた重いモジュールを出力する
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from screening_test.main import app
+try:
+    app(sys.argv[1:], standalone_mode=False)
+finally:
+    elapsed = time.perf_counter() - start
+    heavy = [m for m in {heavy!r} if m in sys.modules]
+    print(json.dumps({{"elapsed": elapsed, "heavy": heavy}}), file=sys.stderr)
+"""
+
+# コマンド → 読み込みから終了までの上限（秒）。現状の数倍の余裕を持たせ、重い依存の読み込みだけを検出する
+BUDGETS = {
+    ("version",): 0.5,
+    ("--help",): 0.5,
+    ("watchlist", "show"): 0.8,
+    ("portfolio", "show"): 0.8,
+}
+
+
+def _run(args: tuple[str, ...], cwd: Path) -> dict[str, object]:
+    """子プロセスでコマンドを実行し、計測結果を返す"""
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD.format(heavy=HEAVY_MODULES), *args],
+        cwd=cwd,
+        env={"PYTHONPATH": str(SRC_DIR), "PATH": ""},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=False,
+    )
+    assert proc.returncode == 0, proc.stderr
+    result: dict[str, object] = json.loads(proc.stderr.strip().splitlines()[-1])
+    return result
+
+
+class TestStartup:
+    """コマンドごとの起動時間の上限のテスト"""
+
+    @pytest.mark.parametrize("args", list(BUDGETS), ids=" ".join)
+    def test_does_not_import_heavy_modules(self, args: tuple[str, ...], tmp_path: Path) -> None:
+        assert _run(args, tmp_path)["heavy"] == []
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("args", list(BUDGETS), ids=" ".join)
+    def test_within_budget(self, args: tuple[str, ...], tmp_path: Path) -> None:
+        # 初回はバイトコードのコンパイル等を含むため、2回目を計測する
+        _run(args, tmp_path)
+        elapsed = _run(args, tmp_path)["elapsed"]
+        assert isinstance(elapsed, float)
+        assert elapsed < BUDGETS[args]
@@ -1,8 +1,38 @@
 """ストレステストのユニットテスト"""
 
+import tempfile
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from unittest.mock import patch
+
 import pytest
 
-from screening_test.core.stress_test import SCENARIOS, _classify_impact, _get_sector_sensitivity
+from screening_test.core import portfolio
+from screening_test.core.stress_test import (
+    SCENARIOS,
+    _classify_impact,
+    _get_sector_sensitivity,
+    build_portfolio_stress_test,
+    build_stress_ranking,
+    build_stress_test,
+    rank_stress_resilience,
+    render_stress_test,
+    run_portfolio_stress_test,
+    run_stress_ranking,
+    run_stress_test,
+)
+from screening_test.data.client import StockInfo
+from screening_test.data.scheduler import Priority
+
+
+class FakeClient:
+    """固定の銘柄情報を返すテスト用クライアント"""
+
+    def __init__(self, info: StockInfo | None) -> None:
+        self.info = info
+
+    def get_stock_info(self, ticker: str) -> StockInfo | None:  # noqa: ARG002
+        return self.info
 
 
 class TestClassifyImpact:
@@ -49,3 +79,127 @@ class TestScenarios:
     def test_all_shocks_negative(self) -> None:
         for scenario in SCENARIOS:
             assert scenario["shock_pct"] < 0
+
+
+class TestBuildStressTest:
+    """ストレステスト結果モデルのテスト"""
+
+    def test_result_model(self) -> None:
+        info = StockInfo(ticker="AAPL", name="Apple", sector="Technology", market_cap=1.0, current_price=100.0)
+        result = build_stress_test("AAPL", client=FakeClient(info))  # type: ignore[arg-type]
+        assert result is not None
+        assert result.sector_sensitivity == 1.3
+        assert len(result.scenarios) == 8
+        assert result.worst_scenario == "テクノロジーバブル崩壊"
+        assert result.scenarios[0].estimated_price == pytest.approx(100.0 * (1 - 0.15 * 1.3))
+        assert "最悪シナリオ" in render_stress_test(result)
+
+    def test_missing_price(self) -> None:
+        info = StockInfo(ticker="X", name="X", sector="", market_cap=0)
+        assert build_stress_test("X", client=FakeClient(info)) is None  # type: ignore[arg-type]
+        assert "エラー" in run_stress_test("X", client=FakeClient(None))  # type: ignore[arg-type]
+
+
+class BatchClient:
+    """銘柄ごとの情報を一括で返すテスト用クライアント"""
+
+    def __init__(self, infos: dict[str, StockInfo]) -> None:
+        self.infos = infos
+        self.batch_calls = 0
+
+    def get_stock_info_batch(self, tickers: list[str]) -> dict[str, StockInfo | None]:
+        self.batch_calls += 1
+        return {t: self.infos.get(t) for t in tickers}
+
+    def priority(self, priority: Priority) -> AbstractContextManager[None]:  # noqa: ARG002
+        return nullcontext()
+
+
+class TestPortfolioStressTest:
+    """ポートフォリオ全体のストレステストのテスト"""
+
+    def setup_method(self) -> None:
+        self.temp_path = Path(tempfile.mkdtemp())
+        self._patches = [
+            patch.object(portfolio, "DATA_DIR", self.temp_path),
+            patch.object(portfolio, "PORTFOLIO_FILE", self.temp_path / "portfolio.csv"),
+            patch.object(portfolio, "TRANSACTIONS_FILE", self.temp_path / "transactions.csv"),
+            patch.object(portfolio, "DB_FILE", self.temp_path / "portfolio.db"),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def teardown_method(self) -> None:
+        for p in self._patches:
+            p.stop()
+
+    def test_empty_portfolio(self) -> None:
+        assert build_portfolio_stress_test(client=BatchClient({})) is None  # type: ignore[arg-type]
+        assert "空" in run_portfolio_stress_test(client=BatchClient({}))  # type: ignore[arg-type]
+
+    def test_matrix_pnl(self) -> None:
+        portfolio.buy_stock("AAPL", 10, 90.0)
+        portfolio.buy_stock("KO", 20, 40.0)
+        portfolio.buy_stock("GONE", 5, 100.0)
+        client = BatchClient(
+            {
+                "AAPL": StockInfo(ticker="AAPL", name="", sector="Technology", market_cap=0, current_price=100.0),
+                "KO": StockInfo(ticker="KO", name="", sector="Consumer Defensive", market_cap=0, current_price=50.0),
+            }
+        )
+        result = build_portfolio_stress_test(client=client)  # type: ignore[arg-type]
+        assert result is not None
+        assert client.batch_calls == 1
+        assert result.total_value == pytest.approx(1000.0 + 1000.0 + 500.0)
+
+        # 金利上昇(-15%): AAPL 1000*-15%*1.3, KO 1000*-15%*0.6, GONE 500*-15%*1.0（平均取得単価で評価）
+        expected = -150 * 1.3 - 150 * 0.6 - 75.0
+        assert result.scenarios[0].pnl == pytest.approx(expected)
+        assert result.scenarios[0].pnl_pct == pytest.approx(expected / 2500 * 100)
+        assert result.positions[2].price_is_fallback
+        assert result.worst_scenario == "テクノロジーバブル崩壊"
+
+        text = run_portfolio_stress_test(client=client)  # type: ignore[arg-type]
+        assert "最悪シナリオ" in text
+        assert "GONE" in text
+
+
+class TestStressRanking:
+    """市場全体のストレス耐性ランキングのテスト"""
+
+    def setup_method(self) -> None:
+        self.stocks = [
+            StockInfo(ticker="TECH", name="", sector="Technology", market_cap=0),
+            StockInfo(ticker="UTIL", name="", sector="Utilities", market_cap=0),
+            StockInfo(ticker="FIN", name="", sector="Financial Services", market_cap=0),
+        ]
+
+    def test_rank_by_sector_then_market_cap(self) -> None:
+        stocks = [*self.stocks, StockInfo(ticker="UTIL2", name="", sector="Utilities", market_cap=1e12)]
+        entries = rank_stress_resilience(stocks)
+        assert [e.ticker for e in entries] == ["UTIL2", "UTIL", "FIN", "TECH"]
+        assert entries[0].worst_scenario == "テクノロジーバブル崩壊"
+        assert entries[0].worst_change_pct == pytest.approx(-40.0 * 0.5)
+        assert len(entries[0].changes_pct) == len(SCENARIOS)
+
+    def test_selected_scenarios(self) -> None:
+        entries = rank_stress_resilience(self.stocks, ["パンデミック", "流動性危機"])
+        tech = next(e for e in entries if e.ticker == "TECH")
+        assert tech.changes_pct == pytest.approx([-35.0 * 1.3, -25.0 * 1.3])
+        assert tech.average_change_pct == pytest.approx(-30.0 * 1.3)
+        assert tech.worst_scenario == "パンデミック"
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError, match="不明なシナリオ"):
+            rank_stress_resilience(self.stocks, ["隕石衝突"])
+
+    @patch("screening_test.core.stress_test.get_tickers", return_value=["TECH", "UTIL", "FIN", "GONE"])
+    def test_build_uses_one_batch_fetch(self, _mock_tickers: object) -> None:
+        client = BatchClient({s.ticker: s for s in self.stocks})
+        result = build_stress_ranking("us", top_n=2, client=client)  # type: ignore[arg-type]
+        assert client.batch_calls == 1
+        assert [e.ticker for e in result.entries] == ["UTIL", "FIN"]
+        assert result.scenarios == [str(s["name"]) for s in SCENARIOS]
+
+    def test_run_unknown_market(self) -> None:
+        assert "不明な市場" in run_stress_ranking("mars", client=BatchClient({}))  # type: ignore[arg-type]
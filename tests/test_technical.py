@@ -0,0 +1,91 @@
+"""テクニカル指標のユニットテスト"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from screening_test.core import technical
+from screening_test.core.technical import compute_technicals, get_technicals
+
+
+def _history(closes: list[float] | np.ndarray, start: str = "2024-01-01") -> pd.DataFrame:
+    index = pd.bdate_range(start, periods=len(closes))
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+class CountingClient:
+    """過去株価の取得回数を記録するテスト用クライアント"""
+
+    def __init__(self, history: pd.DataFrame) -> None:
+        self.history = history
+        self.calls = 0
+
+    def get_historical_data(self, ticker: str, period: str = "1y") -> pd.DataFrame:  # noqa: ARG002
+        self.calls += 1
+        return self.history
+
+
+class TestComputeTechnicals:
+    """指標計算のテスト"""
+
+    def test_empty_history(self) -> None:
+        assert compute_technicals(pd.DataFrame()) is None
+
+    def test_moving_averages(self) -> None:
+        result = compute_technicals(_history(np.arange(1.0, 201.0)))
+        assert result is not None
+        assert result.sma_25 == pytest.approx(np.arange(176.0, 201.0).mean())
+        assert result.sma_200 == pytest.approx(100.5)
+        assert result.last_close == 200.0
+
+    def test_short_history_leaves_long_sma_empty(self) -> None:
+        result = compute_technicals(_history([100.0, 101.0, 102.0]))
+        assert result is not None
+        assert result.sma_25 is None
+        assert result.rsi_14 is None
+
+    def test_drawdown_and_distance_from_high(self) -> None:
+        result = compute_technicals(_history([100.0, 120.0, 90.0, 108.0]))
+        assert result is not None
+        assert result.max_drawdown_pct == pytest.approx(-25.0)
+        assert result.distance_from_high_pct == pytest.approx(-10.0)
+
+    def test_rsi_only_gains(self) -> None:
+        result = compute_technicals(_history(np.arange(1.0, 31.0)))
+        assert result is not None
+        assert result.rsi_14 == 100.0
+
+    def test_rsi_mixed(self) -> None:
+        closes = 100 + np.tile([1.0, -1.0], 20).cumsum()
+        result = compute_technicals(_history(closes))
+        assert result is not None
+        assert result.rsi_14 is not None
+        assert 40.0 < result.rsi_14 < 60.0
+
+    def test_volatility_of_constant_series_is_zero(self) -> None:
+        result = compute_technicals(_history([100.0] * 10))
+        assert result is not None
+        assert result.volatility_pct == pytest.approx(0.0)
+
+
+class TestMemoization:
+    """メモ化のテスト"""
+
+    def setup_method(self) -> None:
+        technical._memo.clear()
+
+    def test_same_last_date_reuses_result(self) -> None:
+        client = CountingClient(_history(np.arange(1.0, 50.0)))
+        first = get_technicals("AAPL", client=client)  # type: ignore[arg-type]
+        second = get_technicals("AAPL", client=client)  # type: ignore[arg-type]
+        assert first is second
+
+    def test_new_day_recomputes(self) -> None:
+        client = CountingClient(_history(np.arange(1.0, 50.0)))
+        first = get_technicals("AAPL", client=client)  # type: ignore[arg-type]
+        client.history = _history(np.arange(1.0, 51.0))
+        second = get_technicals("AAPL", client=client)  # type: ignore[arg-type]
+        assert first is not None
+        assert second is not None
+        assert second.last_close == 50.0
+        assert second is not first
@@ -1,10 +1,15 @@
 """ウォッチリスト管理のユニットテスト"""
 
+import sqlite3
 import tempfile
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
 
 from screening_test.core import watchlist
+from screening_test.data.client import Quote, StockInfo, YFinanceClient
 
 
 class TestWatchlist:
@@ -15,12 +20,15 @@ class TestWatchlist:
         self.temp_path = Path(self.temp_dir)
         self._patch_data_dir = patch.object(watchlist, "DATA_DIR", self.temp_path)
         self._patch_watchlist = patch.object(watchlist, "WATCHLIST_FILE", self.temp_path / "watchlist.csv")
+        self._patch_db = patch.object(watchlist, "DB_FILE", self.temp_path / "watchlist.db")
         self._patch_data_dir.start()
         self._patch_watchlist.start()
+        self._patch_db.start()
 
     def teardown_method(self) -> None:
         self._patch_data_dir.stop()
         self._patch_watchlist.stop()
+        self._patch_db.stop()
 
     def test_show_empty_watchlist(self) -> None:
         result = watchlist.show_watchlist()
@@ -65,3 +73,132 @@ class TestWatchlist:
     def test_manage_watchlist_add_no_ticker(self) -> None:
         result = watchlist.manage_watchlist("add")
         assert "エラー" in result
+
+    def test_migrates_legacy_csv(self) -> None:
+        (self.temp_path / "watchlist.csv").write_text(
+            "ticker,reason,added_at\n7203.T,旧形式,2024-01-01T00:00:00\n", encoding="utf-8"
+        )
+        assert watchlist.get_watchlist_tickers() == ["7203.T"]
+        assert "旧形式" in watchlist.show_watchlist()
+
+    def test_import_csv(self) -> None:
+        watchlist.add_to_watchlist("7203.T", "登録済み")
+        with_header = self.temp_path / "with_header.csv"
+        with_header.write_text("ticker,reason\n7203.T,重複\n6758.T,ゲーム\n", encoding="utf-8")
+        result = watchlist.manage_watchlist("import", file=with_header)
+        assert "1件を追加" in result
+        assert "重複: 1件" in result
+
+        headerless = self.temp_path / "headerless.csv"
+        headerless.write_text("9984.T\n8306.T\n9984.T\n", encoding="utf-8")
+        assert "2件を追加" in watchlist.import_watchlist(headerless, reason="一括")
+        assert watchlist.get_watchlist_tickers() == ["7203.T", "6758.T", "9984.T", "8306.T"]
+        assert "登録済み" in watchlist.show_watchlist()
+
+    def test_import_csv_header_variants(self) -> None:
+        bom = self.temp_path / "excel.csv"
+        bom.write_text("ticker,reason\nAAPL,BOM付き\n", encoding="utf-8-sig")
+        capitalized = self.temp_path / "capitalized.csv"
+        capitalized.write_text(" Ticker , Reason \nNVDA,大文字\n", encoding="utf-8")
+        assert "1件を追加" in watchlist.import_watchlist(bom)
+        assert "1件を追加" in watchlist.import_watchlist(capitalized)
+        entries = {e.ticker: e.reason for e in watchlist._load_watchlist()}
+        assert entries == {"AAPL": "BOM付き", "NVDA": "大文字"}
+
+    def test_import_json(self) -> None:
+        path = self.temp_path / "list.json"
+        path.write_text('["AAPL", {"ticker": "NVDA", "reason": "AI"}]', encoding="utf-8")
+        assert "2件を追加" in watchlist.import_watchlist(path, reason="米国株")
+        entries = {e.ticker: e.reason for e in watchlist._load_watchlist()}
+        assert entries == {"AAPL": "米国株", "NVDA": "AI"}
+
+    def test_import_invalid_json(self) -> None:
+        path = self.temp_path / "broken.json"
+        path.write_text('{"ticker": "AAPL"}', encoding="utf-8")
+        assert "エラー" in watchlist.manage_watchlist("import", file=path)
+        assert "エラー" in watchlist.manage_watchlist("import")
+        for entry in ('{"ticker": "AAPL", "reason": [1]}', '{"ticker": "AAPL", "added_at": {}}', '{"ticker": [1]}'):
+            path.write_text(f"[{entry}]", encoding="utf-8")
+            assert "文字列で指定" in watchlist.manage_watchlist("import", file=path)
+        assert watchlist.get_watchlist_tickers() == []
+
+    def test_export_round_trip(self) -> None:
+        watchlist.add_to_watchlist("7203.T", "割安")
+        watchlist.add_to_watchlist("AAPL", "AI期待")
+        for name in ("out.csv", "out.json"):
+            path = self.temp_path / name
+            assert "2件" in watchlist.manage_watchlist("export", file=path)
+            with (
+                patch.object(watchlist, "DB_FILE", self.temp_path / f"{name}.db"),
+                patch.object(watchlist, "WATCHLIST_FILE", self.temp_path / "missing.csv"),
+            ):
+                watchlist.import_watchlist(path)
+                restored = watchlist._load_watchlist()
+            assert [(e.ticker, e.reason) for e in restored] == [("7203.T", "割安"), ("AAPL", "AI期待")]
+
+    def test_export_to_unwritable_path(self) -> None:
+        # 書き出し先がディレクトリ
+        assert "エラー" in watchlist.manage_watchlist("export", file=self.temp_path)
+
+    def test_lookup_uses_primary_key(self) -> None:
+        watchlist.add_to_watchlist("7203.T")
+        with watchlist._transaction() as conn:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM watchlist WHERE ticker = ?", ("7203.T",)).fetchall()
+        assert any("USING INDEX" in row["detail"] or "PRIMARY KEY" in row["detail"] for row in plan)
+
+    def test_upgrades_version1_schema(self) -> None:
+        with sqlite3.connect(self.temp_path / "watchlist.db") as conn:
+            for statement in watchlist.SCHEMA:
+                conn.execute(statement)
+            conn.execute("INSERT INTO watchlist VALUES ('7203.T', '旧版', '2024-01-01')")
+            conn.execute("PRAGMA user_version = 1")
+        conn.close()
+        watchlist.remove_from_watchlist("7203.T")
+        assert watchlist.get_watchlist_tickers() == []
+
+    def test_view_with_metrics(self) -> None:
+        watchlist.add_to_watchlist("7203.T", "割安")
+        watchlist.add_to_watchlist("FAIL", "取得不可")
+        client = MagicMock()
+        client.get_stock_info_batch.return_value = {
+            "7203.T": StockInfo(
+                ticker="7203.T", name="Toyota", sector="", market_cap=0, per=9.0, pbr=1.0, dividend_yield=2.5
+            ),
+            "FAIL": None,
+        }
+        client.get_quotes_with_changes.return_value = {"7203.T": Quote(price=2500.0, change_pct=-1.5), "FAIL": None}
+
+        view = watchlist.build_watchlist_view(client=client)
+        client.get_stock_info_batch.assert_called_once_with(["7203.T", "FAIL"])
+        toyota, failed = view.entries
+        assert (toyota.per, toyota.pbr, toyota.current_price, toyota.change_pct) == (9.0, 1.0, 2500.0, -1.5)
+        assert toyota.value_score is not None
+        assert failed.value_score is None
+        text = watchlist.render_watchlist_view(view)
+        assert "-1.50%" in text
+        assert "取得できなかった銘柄: FAIL" in text
+
+    def test_view_downloads_quotes_once(self) -> None:
+        watchlist.add_to_watchlist("7203.T")
+        watchlist.add_to_watchlist("FAIL")
+        client = YFinanceClient()
+        closes = pd.DataFrame({"7203.T": [2400.0, 2500.0]})
+        with (
+            patch.object(client, "get_stock_info_batch", return_value={"7203.T": None, "FAIL": None}),
+            patch.object(client, "_download_closes", return_value=closes) as mock_download,
+        ):
+            view = watchlist.build_watchlist_view(client=client)
+        # 取得できなかった銘柄も含め、現在値と前日比は1回の一括ダウンロードで取得する
+        mock_download.assert_called_once_with(["7203.T", "FAIL"])
+        toyota, failed = view.entries
+        assert toyota.current_price == 2500.0
+        assert toyota.change_pct == pytest.approx(100 / 24)
+        assert (failed.current_price, failed.change_pct) == (None, None)
+
+    def test_view_without_metrics_skips_fetch(self) -> None:
+        watchlist.add_to_watchlist("7203.T", "割安")
+        client = MagicMock()
+        view = watchlist.build_watchlist_view(client=client, metrics=False)
+        assert [e.ticker for e in view.entries] == ["7203.T"]
+        assert client.method_calls == []
+        assert "空" in watchlist.render_watchlist_view(watchlist.WatchlistView(entries=[]))